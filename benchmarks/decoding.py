@@ -0,0 +1,107 @@
+"""
+Micro-benchmark for turning fetched order rows into BuyOrder models.
+
+Compares the per-value Decimal divide and quantize the amount columns
+used to do, per-value scaleb, and the column-at-a-time path used by order
+listings and exports. No database is needed.
+
+    python benchmarks/decoding.py [--rows 100000] [--repeat 5]
+"""
+import argparse
+import decimal
+import random
+import timeit
+from decimal import Decimal
+from uuid import uuid4
+
+from currency import (
+    Currency,
+    bulk_from_fiat_units,
+    bulk_from_satoshi,
+    from_fiat_units,
+    from_satoshi,
+)
+from ordering.queries import BuyOrder
+
+BTC_EXP = Decimal(10) ** -8
+FIAT_EXP = Decimal(10) ** -4
+
+
+def quantized(rows):
+    return [
+        BuyOrder.construct(
+            id=order_id,
+            request_id=request_id,
+            bitcoins=(Decimal(bought) / 10 ** 8).quantize(
+                BTC_EXP, decimal.ROUND_UP,
+            ),
+            bought_for=(Decimal(paid) / 10 ** 4).quantize(FIAT_EXP),
+            currency=currency,
+        )
+        for order_id, request_id, bought, paid, currency in rows
+    ]
+
+
+def scaled(rows):
+    return [
+        BuyOrder.construct(
+            id=order_id,
+            request_id=request_id,
+            bitcoins=from_satoshi(bought),
+            bought_for=from_fiat_units(paid),
+            currency=currency,
+        )
+        for order_id, request_id, bought, paid, currency in rows
+    ]
+
+
+def amounts_only(rows):
+    bought = [row[2] for row in rows]
+    paid = [row[3] for row in rows]
+    return {
+        "quantized": lambda: [
+            (Decimal(value) / 10 ** 8).quantize(BTC_EXP, decimal.ROUND_UP)
+            for value in bought
+        ] + [(Decimal(value) / 10 ** 4).quantize(FIAT_EXP) for value in paid],
+        "scaled": lambda: (
+            [from_satoshi(value) for value in bought]
+            + [from_fiat_units(value) for value in paid]
+        ),
+        "bulk": lambda: (
+            bulk_from_satoshi(bought) + bulk_from_fiat_units(paid)
+        ),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = [
+        (
+            uuid4(),
+            uuid4(),
+            random.randint(10 ** 4, 10 ** 12),
+            random.randint(10 ** 4, 10 ** 10),
+            random.choice(list(Currency)),
+        )
+        for _ in range(args.rows)
+    ]
+    assert quantized(rows) == scaled(rows) == BuyOrder.from_rows(rows)
+
+    cases = {
+        **{f"amounts {name}": run for name, run in amounts_only(rows).items()},
+        "orders quantized": lambda: quantized(rows),
+        "orders scaled": lambda: scaled(rows),
+        "orders bulk": lambda: BuyOrder.from_rows(rows),
+    }
+    print(f"{args.rows} rows, best of {args.repeat}")
+    for name, run in cases.items():
+        best = min(timeit.repeat(run, number=1, repeat=args.repeat))
+        print(f"{name:<20} {best * 1000:9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
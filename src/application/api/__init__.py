@@ -1,15 +1,41 @@
+from dataclasses import dataclass
+
 from fastapi import FastAPI
 from injector import Injector, Module, provider, singleton
 
+from application.metrics import Metrics
+from application.tracing import Tracer
+from application.workers import WorkerPool
+
 from . import monitors, ordering
+from .metrics import RouteMetrics
+from .tracing import RouteTracing
 
 
+@dataclass
 class APIModule(Module):
+    workers: int = 0
+
+    @provider
+    @singleton
+    def worker_pool(self) -> WorkerPool:
+        return WorkerPool(self.workers)
+
     @provider
     @singleton
-    def app(self, container: Injector) -> FastAPI:
+    def app(
+            self,
+            container: Injector,
+            workers: WorkerPool,
+            metrics: Metrics,
+            tracer: Tracer,
+    ) -> FastAPI:
         app = FastAPI()
         app.state.injector = container
+        app.add_middleware(RouteMetrics, metrics=metrics)
+        app.add_middleware(RouteTracing, tracer=tracer)
+        app.add_event_handler("shutdown", tracer.flush)
+        app.add_event_handler("shutdown", workers.shutdown)
         app.include_router(monitors.router, prefix="/monitors")
         app.include_router(ordering.router, prefix="/orders")
         return app
@@ -0,0 +1,49 @@
+from time import perf_counter
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from application.metrics import Metrics
+
+from .tools import RouteTemplates
+
+
+class RouteMetrics:
+    """
+    Times every HTTP request until its response is sent, labelled by the
+    path template of the matched route, so /orders/{order_id} is one series.
+    """
+
+    def __init__(self, app: ASGIApp, metrics: Metrics) -> None:
+        self._app = app
+        self._latency = metrics.histogram(
+            "http_request_duration_seconds",
+            "Time spent answering an HTTP request.",
+            labels=("method", "route", "status"),
+        )
+        self._route = RouteTemplates()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return await self._app(scope, receive, send)
+
+        status = 500
+
+        async def send_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = perf_counter()
+        try:
+            await self._app(scope, receive, send_status)
+        finally:
+            self._latency.observe(
+                perf_counter() - started,
+                scope["method"],
+                self._route(scope),
+                str(status),
+            )
+
+
+__all__ = ["RouteMetrics"]
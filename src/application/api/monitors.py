@@ -1,4 +1,14 @@
 from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel
+
+from application.metrics import Metrics
+from application.workers import WorkerPool
+from ordering.db import OutboxRelay
+
+from .tools import Injects
+
+PROMETHEUS_TEXT = "text/plain; version=0.0.4; charset=utf-8"
 
 router = APIRouter()
 
@@ -6,3 +16,33 @@ router = APIRouter()
 @router.get("/ping", name="monitors:ping")
 async def ping():
     pass
+
+
+@router.get(
+    "/metrics", name="monitors:metrics", response_class=PlainTextResponse,
+)
+async def metrics(metrics: Metrics = Injects(Metrics)) -> PlainTextResponse:
+    return PlainTextResponse(
+        metrics.render(), media_type=PROMETHEUS_TEXT,
+    )
+
+
+class OutboxStatus(BaseModel):
+    pending: int
+    lag_seconds: float
+    dead: int
+
+
+@router.get(
+    "/outbox", name="monitors:outbox", response_model=OutboxStatus,
+)
+async def outbox(
+        relay: OutboxRelay = Injects(OutboxRelay),
+        workers: WorkerPool = Injects(WorkerPool),
+) -> OutboxStatus:
+    lag = await workers(relay.lag)
+    return OutboxStatus(
+        pending=lag.pending,
+        lag_seconds=lag.oldest.total_seconds(),
+        dead=lag.dead,
+    )
@@ -1,33 +1,175 @@
 from __future__ import annotations
 
+from datetime import datetime
 from decimal import Decimal
-from typing import Text
+from enum import Enum
+from hashlib import blake2b
+from typing import Dict, List, Optional, Set, Text
+from urllib.parse import urlencode
 from uuid import UUID
 
-from fastapi import APIRouter, Body, Request, Response
-from fastapi.responses import JSONResponse, RedirectResponse
-from pydantic import BaseModel, condecimal
+from fastapi import APIRouter, Body, Header, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, RedirectResponse, StreamingResponse
+from pydantic import BaseModel, condecimal, conlist
 
 from application.bus import CommandBus
-from currency import Currency
-from ordering import commands, errors
-from ordering.queries import BuyOrder, BuyOrdersQueries
+from application.db import LSN_PATTERN, ReadSessions
+from application.workers import WorkerPool
+from currency import Currency, StaleExchangeRate
+from ordering import commands, errors, service
+from ordering.export import ExportFormat, encode_orders
+from ordering.queries import BuyOrder, BuyOrdersQueries, OrderPage, OrderStatus
+from ordering.stats import BucketSize, OrderStats, StatsQueries
 
 from .tools import Injects
 
 router = APIRouter()
 
+MAX_BATCH_SIZE = 1000
+MAX_PAGE_SIZE = 500
+IMMUTABLE = "public, max-age=31536000, immutable"
+# Changes every order's entity tag; bump whenever BuyOrder is serialized
+# differently.
+ORDER_REPRESENTATION = 1
+
+
+@router.get(
+    "/", name="orders:list_orders", response_model=OrderPage,
+    responses={400: {"description": "Invalid cursor"}},
+)
+async def list_orders(
+        limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+        cursor: Optional[Text] = None,
+        currency: Optional[Currency] = None,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+        queries: BuyOrdersQueries = Injects(BuyOrdersQueries),
+        workers: WorkerPool = Injects(WorkerPool),
+) -> OrderPage | Response:
+    try:
+        return await workers(
+            queries.list_orders,
+            limit,
+            after=cursor,
+            currency=currency,
+            created_from=created_from,
+            created_to=created_to,
+        )
+    except errors.InvalidCursor:
+        return JSONResponse({"detail": "Invalid cursor"}, status_code=400)
+
+
+@router.get(
+    "/export", name="orders:export_orders",
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "content": {
+                export_format.media_type: {} for export_format in ExportFormat
+            },
+            "description": "All orders, one per line",
+        },
+    },
+)
+async def export_orders(
+        export_format: ExportFormat = Query(
+            ExportFormat.NDJSON, alias="format",
+        ),
+        queries: BuyOrdersQueries = Injects(BuyOrdersQueries),
+) -> StreamingResponse:
+    # A plain generator is iterated on the threadpool, so fetching chunks
+    # from the database does not block the event loop.
+    return StreamingResponse(
+        encode_orders(queries.export_orders(), export_format),
+        media_type=export_format.media_type,
+        headers={
+            "Content-Disposition": (
+                f"attachment; filename=orders.{export_format.value}"
+            ),
+        },
+    )
+
+
+@router.get("/stats", name="orders:get_stats", response_model=OrderStats)
+async def get_stats(
+        bucket: BucketSize = BucketSize.DAY,
+        currency: Optional[Currency] = None,
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None,
+        stats: StatsQueries = Injects(StatsQueries),
+        workers: WorkerPool = Injects(WorkerPool),
+) -> OrderStats:
+    return await workers(
+        stats.get_stats,
+        bucket,
+        currency=currency,
+        created_from=created_from,
+        created_to=created_to,
+    )
+
 
 @router.get(
     "/{order_id}", name="orders:get_order", response_model=BuyOrder,
-    responses={404: {"description": "Unknown order id"}}
+    responses={
+        304: {"description": "Order not modified"},
+        404: {"description": "Unknown order id"},
+    },
 )
 async def get_order(
         order_id: UUID,
+        response: Response,
+        if_none_match: Optional[Text] = Header(None),
+        consistent_with: Optional[Text] = Query(None, regex=LSN_PATTERN),
         queries: BuyOrdersQueries = Injects(BuyOrdersQueries),
+        workers: WorkerPool = Injects(WorkerPool),
 ) -> BuyOrder | Response:
-    order = queries.get_order(order_id)
-    return order or JSONResponse({"detail": "Unknown order"}, status_code=404)
+    order = await workers(queries.get_order, order_id, consistent_with)
+    if order is None:
+        return JSONResponse({"detail": "Unknown order"}, status_code=404)
+
+    headers = _cache_headers(order)
+    tags = _entity_tags(if_none_match)
+    if headers["ETag"] in tags or "*" in tags:
+        return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return order
+
+
+def _cache_headers(order: BuyOrder) -> Dict[Text, Text]:
+    # Orders never change and are never deleted, so only a new
+    # representation of them invalidates a cached copy.
+    representation = f"{ORDER_REPRESENTATION}:{order.json()}"
+    digest = blake2b(representation.encode(), digest_size=16).hexdigest()
+    return {"ETag": f'"{digest}"', "Cache-Control": IMMUTABLE}
+
+
+def _entity_tags(if_none_match: Optional[Text]) -> Set[Text]:
+    if if_none_match is None:
+        return set()
+    return {
+        tag.strip().removeprefix("W/") for tag in if_none_match.split(",")
+    }
+
+
+@router.get(
+    "/requests/{request_id}", name="orders:get_order_status",
+    response_model=OrderStatus,
+    responses={404: {"description": "Unknown request id"}}
+)
+async def get_order_status(
+        request_id: UUID,
+        consistent_with: Optional[Text] = Query(None, regex=LSN_PATTERN),
+        queries: BuyOrdersQueries = Injects(BuyOrdersQueries),
+        workers: WorkerPool = Injects(WorkerPool),
+) -> OrderStatus | Response:
+    status = await workers(
+        queries.get_order_status, request_id, consistent_with,
+    )
+    return status or JSONResponse(
+        {"detail": "Unknown request"}, status_code=404,
+    )
 
 
 class CreateBuyOrderError(BaseModel):
@@ -39,17 +181,30 @@ class BuyOrderCreated(BaseModel):
     location: Text
 
 
+class BuyOrderAccepted(BaseModel):
+    request_id: UUID
+    location: Text
+
+
 @router.post(
     "/", name="orders:create_order",
     status_code=201,
     response_model=BuyOrderCreated,
-    responses={409: {"model": CreateBuyOrderError}},
+    responses={
+        202: {
+            "model": BuyOrderAccepted,
+            "description": "Accepted for later processing",
+        },
+        409: {"model": CreateBuyOrderError},
+        503: {"model": CreateBuyOrderError},
+    },
 )
 async def create_order(
         request: Request,
         response: Response,
         bus: CommandBus = Injects(CommandBus),
-        queries: BuyOrdersQueries = Injects(BuyOrdersQueries),
+        sessions: ReadSessions = Injects(ReadSessions),
+        workers: WorkerPool = Injects(WorkerPool),
         request_id: UUID = Body(...),
         amount: condecimal(
             decimal_places=4, gt=Decimal(0), lt=Decimal(1_000_000_000),
@@ -57,12 +212,13 @@ async def create_order(
         currency: Currency = Body(...),
 ) -> BuyOrderCreated | Response:
     try:
-        bus.handle(
+        order_id = await workers(
+            bus.handle,
             commands.CreateBuyOrder(
                 id=request_id,
                 amount=amount,
                 currency=Currency[currency],
-            )
+            ),
         )
     except errors.OrderAlreadyExists as error:
         return RedirectResponse(
@@ -72,15 +228,149 @@ async def create_order(
             status_code=301,
         )
     except errors.BalanceLimitExceeded as error:
-        message = f"Exceeded {error.limit}BTC ordering limit"
-        return JSONResponse(status_code=409, content={"detail": message})
+        return JSONResponse(
+            status_code=409, content={"detail": _limit_exceeded(error)},
+        )
+    except StaleExchangeRate:
+        message = "Exchange rate is not available"
+        return JSONResponse(status_code=503, content={"detail": message})
+    except errors.BudgetLeaseExpired:
+        message = "Ordering budget lease expired, retry the request"
+        return JSONResponse(status_code=503, content={"detail": message})
 
-    order_id = queries.get_order_id(request_id)
-    location = request.app.url_path_for(
-        "orders:get_order", order_id=str(order_id)
+    token = await workers(sessions.consistency_token)
+    if order_id is None:
+        location = _consistent(
+            request.app.url_path_for(
+                "orders:get_order_status", request_id=str(request_id),
+            ),
+            token,
+        )
+        accepted = BuyOrderAccepted(request_id=request_id, location=location)
+        return JSONResponse(
+            status_code=202,
+            content=jsonable_encoder(accepted),
+            headers={"Location": location},
+        )
+
+    location = _consistent(
+        request.app.url_path_for("orders:get_order", order_id=str(order_id)),
+        token,
     )
     response.headers["Location"] = location
     response.status_code = 201
     return BuyOrderCreated(order_id=order_id, location=location)
 
+
+def _consistent(location: Text, token: Optional[Text]) -> Text:
+    if token is None:
+        return location
+    return f"{location}?{urlencode({'consistent_with': token})}"
+
+
+class CreateBuyOrderRequest(BaseModel):
+    request_id: UUID
+    amount: condecimal(
+        decimal_places=4, gt=Decimal(0), lt=Decimal(1_000_000_000),
+    )
+    currency: Currency
+
+
+class BatchItemStatus(str, Enum):
+    CREATED = "created"
+    EXISTS = "exists"
+    LIMIT_EXCEEDED = "limit_exceeded"
+
+
+class BuyOrderBatchItem(BaseModel):
+    request_id: UUID
+    status: BatchItemStatus
+    order_id: Optional[UUID] = None
+    location: Optional[Text] = None
+    detail: Optional[Text] = None
+
+
+class BuyOrderBatchCreated(BaseModel):
+    results: List[BuyOrderBatchItem]
+
+
+@router.post(
+    "/batch", name="orders:create_orders",
+    response_model=BuyOrderBatchCreated,
+    responses={
+        409: {"model": CreateBuyOrderError},
+        503: {"model": CreateBuyOrderError},
+    },
+)
+async def create_orders(
+        request: Request,
+        bus: CommandBus = Injects(CommandBus),
+        workers: WorkerPool = Injects(WorkerPool),
+        orders: conlist(
+            CreateBuyOrderRequest, min_items=1, max_items=MAX_BATCH_SIZE,
+        ) = Body(...),
+        atomic: bool = Body(False),
+) -> BuyOrderBatchCreated | Response:
+    try:
+        outcomes = await workers(
+            bus.handle,
+            commands.CreateBuyOrders(
+                orders=[
+                    commands.CreateBuyOrder(
+                        id=order.request_id,
+                        amount=order.amount,
+                        currency=order.currency,
+                    )
+                    for order in orders
+                ],
+                atomic=atomic,
+            ),
+        )
+    except errors.BalanceLimitExceeded as error:
+        return JSONResponse(
+            status_code=409, content={"detail": _limit_exceeded(error)},
+        )
+    except StaleExchangeRate:
+        message = "Exchange rate is not available"
+        return JSONResponse(status_code=503, content={"detail": message})
+    except errors.BudgetLeaseExpired:
+        message = "Ordering budget lease expired, retry the request"
+        return JSONResponse(status_code=503, content={"detail": message})
+
+    return BuyOrderBatchCreated(
+        results=[
+            _batch_item(request, order.request_id, outcome)
+            for order, outcome in zip(orders, outcomes)
+        ]
+    )
+
+
+def _batch_item(
+        request: Request, request_id: UUID, outcome: service.Outcome,
+) -> BuyOrderBatchItem:
+    if isinstance(outcome, errors.BalanceLimitExceeded):
+        return BuyOrderBatchItem(
+            request_id=request_id,
+            status=BatchItemStatus.LIMIT_EXCEEDED,
+            detail=_limit_exceeded(outcome),
+        )
+
+    if isinstance(outcome, errors.OrderAlreadyExists):
+        order_id, status = outcome.order_id, BatchItemStatus.EXISTS
+    else:
+        order_id, status = outcome, BatchItemStatus.CREATED
+    return BuyOrderBatchItem(
+        request_id=request_id,
+        status=status,
+        order_id=order_id,
+        location=request.app.url_path_for(
+            "orders:get_order", order_id=str(order_id),
+        ),
+    )
+
+
+def _limit_exceeded(error: errors.BalanceLimitExceeded) -> Text:
+    return f"Exceeded {error.limit_btc:f}BTC ordering limit"
+
+
 __all__ = ["router"]
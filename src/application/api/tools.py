@@ -1,6 +1,7 @@
-from typing import Any, Type, TypeVar
+from typing import Any, Callable, Dict, Text, Type, TypeVar
 
 from fastapi import Depends, Request
+from starlette.types import Scope
 
 TypeToInject = TypeVar("TypeToInject")
 
@@ -12,4 +13,32 @@ def Injects(item: Type[TypeToInject]) -> TypeToInject:
     return Depends(inject)
 
 
-__all__ = ["Injects"]
+class RouteTemplates:
+    """
+    Path template of the route that handled a request, such as
+    /orders/{order_id}, or "unmatched" when no route of the app did, e.g.
+    for endpoints of mounted apps. Templates are looked up once per endpoint.
+    """
+
+    def __init__(self) -> None:
+        self._templates: Dict[Callable, Text] = {}
+
+    def __call__(self, scope: Scope) -> Text:
+        endpoint = scope.get("endpoint")
+        if endpoint is None:
+            return "unmatched"
+        template = self._templates.get(endpoint)
+        if template is None:
+            template = next(
+                (
+                    route.path
+                    for route in scope["app"].routes
+                    if getattr(route, "endpoint", None) is endpoint
+                ),
+                "unmatched",
+            )
+            self._templates[endpoint] = template
+        return template
+
+
+__all__ = ["Injects", "RouteTemplates"]
@@ -0,0 +1,39 @@
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from application.tracing import Tracer
+
+from .tools import RouteTemplates
+
+
+class RouteTracing:
+    """
+    Opens the root span of every HTTP request, named after the method and
+    the path template of the matched route.
+    """
+
+    def __init__(self, app: ASGIApp, tracer: Tracer) -> None:
+        self._app = app
+        self._tracer = tracer
+        self._route = RouteTemplates()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            return await self._app(scope, receive, send)
+
+        with self._tracer.span(f"HTTP {scope['method']}") as span:
+
+            async def send_status(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    span.set(status=message["status"])
+                await send(message)
+
+            try:
+                await self._app(scope, receive, send_status)
+            finally:
+                if span.sampled:
+                    route = self._route(scope)
+                    span.name = f"{scope['method']} {route}"
+                    span.set(route=route, path=scope["path"])
+
+
+__all__ = ["RouteTracing"]
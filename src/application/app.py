@@ -1,24 +1,112 @@
 import logging.config
+from functools import partial
 
 from fastapi import FastAPI
 from injector import Injector
 
-from currency import CurrencyModule
-from ordering import OrderingModule
+from currency import CurrencyModule, RatePoller
+from ordering import OrderBatcher, OrderingModule, commands, events
+from ordering.db import BudgetLease, StatsRollup
 
 from .api import APIModule
+from .bus import BusModule, CommandBus, EventBus, ListenerLanes
 from .db import DBModule
 from .settings import Settings
+from .tracing import TracingModule
 
 
 def create_app(container: Injector) -> FastAPI:
     settings = container.get(Settings)
     logging.config.fileConfig(settings.config, disable_existing_loggers=False)
-    container.binder.install(APIModule)
-    container.binder.install(DBModule(settings.database_url))
-    container.binder.install(CurrencyModule(settings.coindesk_api_url))
-    container.binder.install(OrderingModule(settings.ordered_btc_limit))
-    return container.get(FastAPI)
+    container.binder.install(APIModule(settings.pipeline_workers))
+    container.binder.install(
+        TracingModule(
+            settings.trace_export_path, sample_rate=settings.trace_sample_rate,
+        )
+    )
+    container.binder.install(
+        BusModule(
+            event_lanes=settings.event_lanes,
+            event_queue_size=settings.event_queue_size,
+            listener_workers=settings.listener_workers,
+            listener_timeout=settings.listener_timeout,
+        )
+    )
+    container.binder.install(
+        DBModule(
+            settings.database_url,
+            replica_urls=settings.database_replica_urls,
+            replica_wait=settings.replica_wait,
+            pool_size=settings.database_pool_size,
+            max_overflow=settings.database_max_overflow,
+            pool_timeout=settings.database_pool_timeout,
+            pool_pre_ping=settings.database_pool_pre_ping,
+            statement_timeout=settings.statement_timeout,
+            slow_query=settings.slow_query_threshold,
+        )
+    )
+    container.binder.install(
+        CurrencyModule(
+            settings.coindesk_api_url,
+            pool_size=settings.coindesk_pool_size,
+            connect_timeout=settings.coindesk_connect_timeout,
+            read_timeout=settings.coindesk_read_timeout,
+            retries=settings.coindesk_retries,
+            retry_backoff=settings.coindesk_retry_backoff,
+            cache_ttl=settings.coindesk_cache_ttl,
+            poll_interval=settings.coindesk_poll_interval,
+            max_staleness=settings.coindesk_max_staleness,
+        )
+    )
+    container.binder.install(
+        OrderingModule(
+            settings.ordered_btc_limit,
+            batch_window=settings.order_batch_window,
+            batch_size=settings.order_batch_size,
+            lease_size=settings.budget_lease_size,
+            lease_ttl=settings.budget_lease_ttl,
+            sql_admission=settings.sql_admission,
+            outbox=settings.event_outbox,
+            outbox_batch_size=settings.outbox_batch_size,
+            outbox_poll_interval=settings.outbox_poll_interval,
+            outbox_workers=settings.outbox_relay_workers,
+            outbox_max_attempts=settings.outbox_max_attempts,
+            outbox_retry_backoff=settings.outbox_retry_backoff,
+            accept_later=settings.accept_orders_later,
+            queue_batch_size=settings.order_queue_batch_size,
+            queue_poll_interval=settings.order_queue_poll_interval,
+            queue_workers=settings.order_queue_workers,
+            cache_size=settings.order_cache_size,
+            cache_negative_ttl=settings.order_cache_negative_ttl,
+            stats_window=settings.stats_rollup_window,
+            stats_interval=settings.stats_rollup_interval,
+        )
+    )
+
+    app = container.get(FastAPI)
+    app.add_event_handler("startup", partial(_prepare_dispatch, container))
+    if settings.coindesk_poll_interval:
+        poller = container.get(RatePoller)
+        app.add_event_handler("startup", poller.start)
+        app.add_event_handler("shutdown", poller.stop)
+    if settings.stats_rollup_interval:
+        rollup = container.get(StatsRollup)
+        app.add_event_handler("startup", rollup.start)
+        app.add_event_handler("shutdown", rollup.stop)
+    if settings.order_batch_window:
+        app.add_event_handler("shutdown", container.get(OrderBatcher).stop)
+    if settings.event_lanes:
+        app.add_event_handler("shutdown", container.get(ListenerLanes).stop)
+    if settings.budget_lease_size:
+        app.add_event_handler("shutdown", container.get(BudgetLease).release)
+    return app
+
+
+def _prepare_dispatch(container: Injector) -> None:
+    container.get(CommandBus).prepare(
+        commands.CreateBuyOrder, commands.CreateBuyOrders,
+    )
+    container.get(EventBus).prepare(events.BuyOrderCreated)
 
 
 def factory() -> FastAPI:  # pragma: no cover
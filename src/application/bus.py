@@ -1,17 +1,40 @@
 import logging
-from datetime import datetime
-from typing import Generic, Text, Type, TypeVar
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as ListenerTimeout
+from contextvars import Context, copy_context
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from queue import Queue
+from threading import BoundedSemaphore, Thread
+from time import monotonic
+from typing import (
+    Any,
+    Dict,
+    Generic,
+    Hashable,
+    List,
+    Optional,
+    Text,
+    Tuple,
+    Type,
+    TypeVar,
+)
 from uuid import UUID, uuid4
 
 from injector import (
     Injector,
+    Module,
     UnknownProvider,
     UnsatisfiedRequirement,
     inject,
+    provider,
     singleton,
 )
 from pydantic import BaseModel, Field
 
+from .metrics import Histogram, Metrics
+from .tracing import Tracer
+
 log = logging.getLogger(__name__)
 
 
@@ -39,12 +62,19 @@ class Event(BaseModel):
         std_str = super().__str__()
         return f"<Event:{self.__class__.__name__} {std_str}>"
 
+    @property
+    def ordering_key(self) -> Hashable:
+        """
+        Events sharing the key reach listeners in the order they were emitted.
+        """
+        return self.command_id
+
 
 TCommand = TypeVar("TCommand")
 
 
 class Handler(Generic[TCommand]):
-    def __call__(self, command: TCommand) -> None:
+    def __call__(self, command: TCommand) -> Any:
         raise NotImplementedError
 
 
@@ -53,12 +83,49 @@ class Handler(Generic[TCommand]):
 class CommandBus:
     def __init__(self, container: Injector) -> None:
         self._get = container.get
+        self._handlers: Dict[Type[Command], Handler] = {}
+        metrics = container.get(Metrics)
+        self._latency = metrics.histogram(
+            "command_duration_seconds",
+            "Time spent handling a command.",
+            labels=("command",),
+        )
+        self._failures = metrics.counter(
+            "command_failures_total",
+            "Commands whose handler raised.",
+            labels=("command", "error"),
+        )
+        self._tracer = container.get(Tracer)
 
-    def handle(self, command: Command) -> None:
+    def prepare(self, *command_types: Type[Command]) -> None:
+        """
+        Resolves handlers up front, so commands without a handler fail fast.
+        """
+        for command_cls in command_types:
+            self._resolve(command_cls)
+
+    def handle(self, command: Command) -> Any:
         log.debug(command)
         command_cls: Type[Command] = type(command)
+        handler = self._handlers.get(command_cls)
+        if handler is None:
+            handler = self._resolve(command_cls)
+        name = command_cls.__name__
+        try:
+            with self._tracer.span(
+                    f"command {name}",
+                    trace_id=command.id,
+                    command_id=str(command.id),
+            ), self._latency.time(name):
+                return handler(command)
+        except Exception as error:
+            self._failures.inc(command_cls.__name__, type(error).__name__)
+            raise
+
+    def _resolve(self, command_cls: Type[Command]) -> Handler:
         handler = self._get(Handler[command_cls])
-        handler(command)
+        self._handlers[command_cls] = handler
+        return handler
 
 
 TEvent = TypeVar("TEvent")
@@ -69,22 +136,222 @@ class Listener(Generic[TEvent]):
         raise NotImplementedError
 
 
+Delivery = Tuple[Event, List[Listener], Context]
+
+
+class ObservedListener(Listener):
+    """
+    Times a listener and traces each call in the trace of the command the
+    event came from.
+    """
+
+    def __init__(
+            self,
+            listener: Listener,
+            latency: Histogram,
+            tracer: Tracer,
+            event: Text,
+    ) -> None:
+        self._listener = listener
+        self._latency = latency
+        self._tracer = tracer
+        self._labels = (event, _name_of(listener))
+
+    def __call__(self, event: Event) -> None:
+        with self._tracer.span(
+                f"listener {self._labels[1]}",
+                trace_id=event.command_id,
+                event_id=str(event.id),
+                command_id=str(event.command_id),
+        ), self._latency.time(*self._labels):
+            self._listener(event)
+
+    def __repr__(self) -> Text:
+        return repr(self._listener)
+
+
+def _name_of(listener: Listener) -> Text:
+    return getattr(listener, "__qualname__", type(listener).__qualname__)
+
+
+class ListenerLanes:
+    """
+    Delivers events on background lanes with bounded queues; emitting into
+    a full lane blocks. Events with the same ordering key share a lane and
+    reach listeners in emit order. Listeners run in the context of the
+    emitter, so their spans join its trace. Listeners of one event run in
+    parallel on a bounded pool, each within a timeout, and their failures
+    are only logged, so one slow or failing listener does not stall the
+    others.
+
+    A listener call holds one of `workers` slots until it returns, even
+    after it timed out. When listeners hang and no slot frees up before the
+    timeout, the call is skipped instead of queueing behind them.
+    """
+
+    def __init__(
+            self,
+            lanes: int,
+            queue_size: int,
+            workers: int,
+            timeout: timedelta,
+    ) -> None:
+        self._queues: List[Queue[Optional[Delivery]]] = [
+            Queue(maxsize=queue_size) for _ in range(lanes)
+        ]
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="listener",
+        )
+        self._slots = BoundedSemaphore(workers)
+        self._timeout = timeout.total_seconds()
+        self._threads = [
+            Thread(
+                target=self._run, args=(lane,), name=f"event-lane-{n}",
+                daemon=True,
+            )
+            for n, lane in enumerate(self._queues)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, event: Event, listeners: List[Listener]) -> None:
+        lane = self._queues[hash(event.ordering_key) % len(self._queues)]
+        lane.put((event, listeners, copy_context()))
+
+    def stop(self) -> None:
+        for lane in self._queues:
+            lane.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._executor.shutdown(wait=False)
+
+    def _run(self, lane: Queue[Optional[Delivery]]) -> None:
+        while (delivery := lane.get()) is not None:
+            self._deliver(*delivery)
+
+    def _deliver(
+            self, event: Event, listeners: List[Listener], context: Context,
+    ) -> None:
+        deadline = monotonic() + self._timeout
+
+        def remaining() -> float:
+            return max(deadline - monotonic(), 0)
+
+        calls = []
+        for listener in listeners:
+            if not self._slots.acquire(timeout=remaining()):
+                log.error("No worker free for %r on %s", listener, event)
+                continue
+            call = self._executor.submit(context.copy().run, listener, event)
+            call.add_done_callback(self._release)
+            calls.append((listener, call))
+        for listener, call in calls:
+            try:
+                call.result(timeout=remaining())
+            except ListenerTimeout:
+                log.error("Listener %r timed out on %s", listener, event)
+            except Exception:
+                log.exception("Listener %r failed on %s", listener, event)
+
+    def _release(self, _) -> None:
+        self._slots.release()
+
+
 @inject
 @singleton
 class EventBus:
-    def __init__(self, container: Injector) -> None:
+    def __init__(
+            self, container: Injector, lanes: Optional[ListenerLanes] = None,
+    ) -> None:
         self._get = container.get
+        self._lanes = lanes
+        self._listeners: Dict[Type, List[Listener]] = {}
+        metrics = container.get(Metrics)
+        self._emitted = metrics.counter(
+            "events_emitted_total", "Events emitted.", labels=("event",),
+        )
+        self._latency = metrics.histogram(
+            "listener_duration_seconds",
+            "Time a listener spent on an event.",
+            labels=("event", "listener"),
+        )
+        self._tracer = container.get(Tracer)
+
+    def prepare(self, *event_types: Type[Event]) -> None:
+        for event_cls in event_types:
+            self._resolve(event_cls)
 
     def emit(self, event: TEvent) -> None:
         log.debug(event)
+        listeners = self._listeners_of(event)
+        if self._lanes is None:
+            for listener in listeners:
+                listener(event)
+        elif listeners:
+            self._lanes.submit(event, listeners)
+
+    def deliver(self, event: TEvent) -> None:
+        """
+        Calls listeners in the calling thread even when lanes are set up, so
+        the caller learns whether all of them succeeded.
+        """
+        log.debug(event)
+        for listener in self._listeners_of(event):
+            listener(event)
+
+    def _listeners_of(self, event: TEvent) -> List[Listener]:
         event_cls: Type[TEvent] = type(event)
+        listeners = self._listeners.get(event_cls)
+        if listeners is None:
+            listeners = self._resolve(event_cls)
+        self._emitted.inc(event_cls.__name__)
+        return listeners
+
+    def _resolve(self, event_cls: Type) -> List[Listener]:
         try:
-            listeners = self._get(list[Listener[event_cls]])
+            listeners = [
+                ObservedListener(
+                    listener, self._latency, self._tracer, event_cls.__name__,
+                )
+                for listener in self._get(list[Listener[event_cls]])
+            ]
         except (UnsatisfiedRequirement, UnknownProvider):
             listeners = []
+        self._listeners[event_cls] = listeners
+        return listeners
 
-        for listener in listeners:
-            listener(event)
+
+@dataclass
+class BusModule(Module):
+    event_lanes: int = 0
+    event_queue_size: int = 1000
+    listener_workers: int = 8
+    listener_timeout: timedelta = timedelta(seconds=5)
+
+    @provider
+    @singleton
+    def listener_lanes(self) -> ListenerLanes:
+        return ListenerLanes(
+            self.event_lanes,
+            queue_size=self.event_queue_size,
+            workers=self.listener_workers,
+            timeout=self.listener_timeout,
+        )
+
+    @provider
+    @singleton
+    def event_bus(self, container: Injector) -> EventBus:
+        lanes = container.get(ListenerLanes) if self.event_lanes else None
+        return EventBus(container, lanes)
 
 
-__all__ = ["Command", "CommandBus", "Event", "EventBus", "Handler", "Listener"]
+__all__ = [
+    "BusModule",
+    "Command",
+    "CommandBus",
+    "Event",
+    "EventBus",
+    "Handler",
+    "Listener",
+    "ListenerLanes",
+]
@@ -0,0 +1,130 @@
+import sys
+from argparse import ArgumentParser, FileType, Namespace
+from typing import List, Optional, Union
+
+from injector import Injector
+
+from currency import from_satoshi
+from ordering import CommandQueue
+from ordering.db import BalanceLedger, OutboxRelay, StatsRebuilder
+from ordering.export import ExportFormat, encode_orders
+from ordering.queries import BuyOrdersQueries
+
+from .app import create_app
+
+
+def verify_balance(container: Injector, args: Namespace) -> int:
+    check = container.get(BalanceLedger).verify()
+    ledger, orders = from_satoshi(check.ledger), from_satoshi(check.orders)
+    print(f"ledger={ledger:f}BTC orders={orders:f}BTC")
+    return 0 if check.consistent else 1
+
+
+def relay_events(container: Injector, args: Namespace) -> int:
+    relay = container.get(OutboxRelay)
+    if args.once:
+        print(f"relayed={relay.drain()}")
+        return 0
+
+    _run_until_interrupted(relay)
+    return 0
+
+
+def process_orders(container: Injector, args: Namespace) -> int:
+    queue = container.get(CommandQueue)
+    if args.once:
+        print(f"processed={queue.drain()}")
+        return 0
+
+    _run_until_interrupted(queue)
+    return 0
+
+
+def export_orders(container: Injector, args: Namespace) -> int:
+    chunks = container.get(BuyOrdersQueries).export_orders()
+    for text in encode_orders(chunks, ExportFormat(args.format)):
+        args.output.write(text)
+    args.output.flush()
+    return 0
+
+
+def rebuild_stats(container: Injector, args: Namespace) -> int:
+    days = container.get(StatsRebuilder).rebuild(workers=args.workers)
+    print(f"rebuilt_days={days}")
+    return 0
+
+
+def _run_until_interrupted(workers: Union[CommandQueue, OutboxRelay]) -> None:
+    workers.start()
+    try:
+        workers.join()
+    except KeyboardInterrupt:
+        workers.stop()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = ArgumentParser(prog="workflow")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    verify = commands.add_parser(
+        "verify-balance",
+        help="Check balance ledger against sum of bought bitcoins",
+    )
+    verify.set_defaults(run=verify_balance)
+
+    relay = commands.add_parser(
+        "relay-events",
+        help="Deliver events from the outbox to their listeners",
+    )
+    relay.add_argument(
+        "--once", action="store_true",
+        help="Deliver pending events and exit",
+    )
+    relay.set_defaults(run=relay_events)
+
+    process = commands.add_parser(
+        "process-orders",
+        help="Process orders accepted for later processing",
+    )
+    process.add_argument(
+        "--once", action="store_true",
+        help="Process pending orders and exit",
+    )
+    process.set_defaults(run=process_orders)
+
+    export = commands.add_parser(
+        "export-orders",
+        help="Write all buy orders as NDJSON or CSV",
+    )
+    export.add_argument(
+        "--format",
+        choices=[export_format.value for export_format in ExportFormat],
+        default=ExportFormat.NDJSON.value,
+    )
+    export.add_argument(
+        "--output", type=FileType("w"), default=sys.stdout,
+        help="File to write to (default: standard output)",
+    )
+    export.set_defaults(run=export_orders)
+
+    rebuild = commands.add_parser(
+        "rebuild-stats",
+        help="Recompute order statistics from stored orders",
+    )
+    rebuild.add_argument(
+        "--workers", type=int, default=4,
+        help="Number of days rebuilt in parallel",
+    )
+    rebuild.set_defaults(run=rebuild_stats)
+
+    args = parser.parse_args(argv)
+    container = Injector()
+    create_app(container)
+    return args.run(container, args)
+
+
+if __name__ == "__main__":  # pragma: no cover
+    sys.exit(main())
+
+
+__all__ = ["main"]
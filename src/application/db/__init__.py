@@ -1,10 +1,16 @@
 from dataclasses import dataclass
+from datetime import timedelta
+from typing import Sequence
 
 from injector import Module, provider, singleton
 from sqlalchemy import create_engine
 from sqlalchemy.engine import Engine
 from sqlalchemy.orm import declarative_base, sessionmaker
 
+from application.metrics import Metrics
+
+from .instrumentation import EngineMetrics, TimedQueuePool
+from .replicas import LSN_PATTERN, ReadSessions
 from .transaction import Transaction
 
 Base = declarative_base()
@@ -13,16 +19,72 @@ Base = declarative_base()
 @dataclass
 class DBModule(Module):
     database_url: str
+    replica_urls: Sequence[str] = ()
+    replica_wait: timedelta = timedelta(milliseconds=200)
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_timeout: timedelta = timedelta(seconds=30)
+    pool_pre_ping: bool = False
+    statement_timeout: timedelta = timedelta(0)
+    slow_query: timedelta = timedelta(0)
+
+    @provider
+    @singleton
+    def engine_metrics(self, metrics: Metrics) -> EngineMetrics:
+        return EngineMetrics(metrics, slow_query=self.slow_query)
 
     @provider
     @singleton
-    def engine(self) -> Engine:
-        return create_engine(self.database_url, echo=False, future=True)
+    def engine(self, instruments: EngineMetrics) -> Engine:
+        return instruments.instrument(
+            "primary", self._create_engine(self.database_url),
+        )
 
     @provider
     @singleton
     def maker(self, engine: Engine) -> sessionmaker:
         return sessionmaker(bind=engine, autoflush=False, autocommit=False)
 
+    @provider
+    @singleton
+    def read_sessions(
+            self, maker: sessionmaker, instruments: EngineMetrics,
+    ) -> ReadSessions:
+        replicas = [
+            sessionmaker(
+                bind=instruments.instrument(
+                    f"replica-{number}", self._create_engine(url),
+                ),
+                autoflush=False,
+                autocommit=False,
+            )
+            for number, url in enumerate(self.replica_urls)
+        ]
+        return ReadSessions(maker, replicas, wait=self.replica_wait)
+
+    def _create_engine(self, url: str) -> Engine:
+        connect_args = {}
+        if self.statement_timeout:
+            timeout_ms = int(self.statement_timeout.total_seconds() * 1000)
+            connect_args["options"] = f"-c statement_timeout={timeout_ms}"
+        return create_engine(
+            url,
+            echo=False,
+            future=True,
+            poolclass=TimedQueuePool,
+            pool_size=self.pool_size,
+            max_overflow=self.max_overflow,
+            pool_timeout=self.pool_timeout.total_seconds(),
+            pool_pre_ping=self.pool_pre_ping,
+            connect_args=connect_args,
+        )
+
 
-__all__ = ["Base", "DBModule", "Transaction"]
+__all__ = [
+    "Base",
+    "DBModule",
+    "EngineMetrics",
+    "LSN_PATTERN",
+    "ReadSessions",
+    "Transaction",
+]
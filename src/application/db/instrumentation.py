@@ -0,0 +1,143 @@
+import logging
+import re
+from datetime import timedelta
+from functools import partial
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterator, Optional, Text, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
+
+from application.metrics import Metrics
+
+slow_log = logging.getLogger("application.db.slow")
+
+_WHITESPACE = re.compile(r"\s+")
+_PLACEHOLDER = re.compile(r"%\(\w+\)s|%s")
+_VALUES_LIST = re.compile(r"\(\?(?:, \?)+\)")
+
+
+class TimedQueuePool(QueuePool):
+    """
+    QueuePool timing how long callers wait to check a connection out. The
+    timing survives the pool being recreated after a disconnect.
+    """
+
+    checkout_wait: Optional[Callable[[float], None]] = None
+
+    def connect(self):
+        if self.checkout_wait is None:
+            return super().connect()
+        started = perf_counter()
+        try:
+            return super().connect()
+        finally:
+            self.checkout_wait(perf_counter() - started)
+
+    def recreate(self) -> "TimedQueuePool":
+        pool = super().recreate()
+        pool.checkout_wait = self.checkout_wait
+        return pool
+
+
+class EngineMetrics:
+    """
+    Times every statement by its normalized SQL, times pool checkouts and
+    reports pool occupancy of each instrumented engine. Statements slower
+    than `slow_query` are logged with bind parameter values redacted.
+    """
+
+    def __init__(
+            self, metrics: Metrics, slow_query: timedelta = timedelta(0),
+    ) -> None:
+        self._slow_query = slow_query.total_seconds()
+        self._engines: Dict[Text, Engine] = {}
+        self._statements = metrics.histogram(
+            "db_statement_duration_seconds",
+            "Time spent executing an SQL statement.",
+            labels=("engine", "statement"),
+        )
+        self._checkout = metrics.histogram(
+            "db_pool_checkout_wait_seconds",
+            "Time spent waiting to check a connection out of the pool.",
+            labels=("engine",),
+        )
+        pool_gauges = (
+            ("db_pool_size", "Connections the pool keeps open.", "size"),
+            ("db_pool_checked_out", "Connections in use.", "checkedout"),
+            ("db_pool_overflow", "Connections over the pool size.", "overflow"),
+        )
+        for name, documentation, read in pool_gauges:
+            metrics.sampled(
+                "gauge",
+                name,
+                documentation,
+                partial(self._pool_samples, read),
+                labels=("engine",),
+            )
+
+    def instrument(self, name: Text, engine: Engine) -> Engine:
+        self._engines[name] = engine
+        engine.pool.checkout_wait = (
+            lambda seconds: self._checkout.observe(seconds, name)
+        )
+
+        @event.listens_for(engine, "after_cursor_execute")
+        def finished(conn, cursor, statement, parameters, *_) -> None:
+            elapsed = perf_counter() - conn.info["query_started"]
+            self._finished(name, elapsed, statement, parameters)
+
+        event.listen(engine, "before_cursor_execute", _started)
+        return engine
+
+    def _finished(
+            self,
+            engine: Text,
+            elapsed: float,
+            statement: Text,
+            parameters: Any,
+    ) -> None:
+        self._statements.observe(elapsed, engine, normalize(statement))
+        if self._slow_query and elapsed >= self._slow_query:
+            slow_log.warning(
+                "Slow statement on %s took %.3fs: %s parameters=%s",
+                engine,
+                elapsed,
+                _WHITESPACE.sub(" ", statement).strip(),
+                redact(parameters),
+            )
+
+    def _pool_samples(self, read: Text) -> Iterator[Tuple[Tuple[Text], int]]:
+        for name, engine in self._engines.items():
+            yield (name,), getattr(engine.pool, read)()
+
+
+def _started(conn, *_) -> None:
+    # Statements on one connection run one after another.
+    conn.info["query_started"] = perf_counter()
+
+
+def normalize(statement: Text) -> Text:
+    """
+    One line of SQL with placeholders shown as `?` and expanded IN lists
+    collapsed, so a statement is a single series whatever its parameters.
+    """
+    single_line = _WHITESPACE.sub(" ", statement).strip()
+    return _VALUES_LIST.sub("(?, ...)", _PLACEHOLDER.sub("?", single_line))
+
+
+def redact(parameters: Any) -> Any:
+    """Bind parameters with each value replaced by the name of its type."""
+    if isinstance(parameters, dict):
+        return {name: _redacted(value) for name, value in parameters.items()}
+    if parameters and isinstance(parameters[0], (dict, list, tuple)):
+        return f"<{len(parameters)} parameter sets>"
+    return tuple(_redacted(value) for value in parameters)
+
+
+def _redacted(value: Any) -> Text:
+    return f"<{type(value).__name__}>"
+
+
+__all__ = ["EngineMetrics", "TimedQueuePool", "normalize", "redact"]
@@ -0,0 +1,67 @@
+from datetime import timedelta
+from itertools import cycle
+from time import monotonic, sleep
+from typing import Optional, Sequence, Text
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session, sessionmaker
+
+LSN_PATTERN = r"^[0-9A-Fa-f]{1,8}/[0-9A-Fa-f]{1,8}$"
+
+CURRENT_LSN = text("SELECT pg_current_wal_lsn()::text")
+REPLAYED = text(
+    "SELECT CASE WHEN pg_is_in_recovery() "
+    "THEN pg_last_wal_replay_lsn() ELSE pg_current_wal_lsn() END "
+    ">= CAST(:lsn AS pg_lsn)"
+)
+
+
+class ReadSessions:
+    """
+    Sessions for queries, taken from read replicas in turn. A consistency
+    token (a WAL position of the primary) makes the session wait up to
+    `wait` for the replica to replay it, and fall back to the primary if it
+    does not. Without replicas every session is a primary one.
+    """
+
+    def __init__(
+            self,
+            primary: sessionmaker,
+            replicas: Sequence[sessionmaker] = (),
+            wait: timedelta = timedelta(milliseconds=200),
+            poll_interval: timedelta = timedelta(milliseconds=10),
+    ) -> None:
+        self._primary = primary
+        self._replicas = cycle(replicas) if replicas else None
+        self._wait = wait.total_seconds()
+        self._poll_interval = poll_interval.total_seconds()
+
+    def __call__(self, consistent_with: Optional[Text] = None) -> Session:
+        if self._replicas is None:
+            return self._primary()
+
+        session = next(self._replicas)()
+        if consistent_with is None or self._replayed(session, consistent_with):
+            return session
+
+        session.close()
+        return self._primary()
+
+    def consistency_token(self) -> Optional[Text]:
+        """WAL position of the primary covering everything committed so far."""
+        if self._replicas is None:
+            return None
+
+        with self._primary() as session:
+            return session.execute(CURRENT_LSN).scalar()
+
+    def _replayed(self, session: Session, lsn: Text) -> bool:
+        deadline = monotonic() + self._wait
+        while not session.execute(REPLAYED, {"lsn": lsn}).scalar():
+            if monotonic() >= deadline:
+                return False
+            sleep(self._poll_interval)
+        return True
+
+
+__all__ = ["LSN_PATTERN", "ReadSessions"]
@@ -0,0 +1,222 @@
+from __future__ import annotations
+
+from bisect import bisect_left
+from contextlib import contextmanager
+from threading import Lock
+from time import perf_counter
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Sequence,
+    Text,
+    Tuple,
+    Union,
+)
+
+from injector import singleton
+
+DEFAULT_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0,
+    10.0,
+)
+
+Labels = Tuple[Text, ...]
+Sample = Tuple[Text, Sequence[Tuple[Text, Text]], float]
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(
+            self, name: Text, documentation: Text, labels: Labels = (),
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._values: Dict[Labels, float] = {}
+        self._lock = Lock()
+
+    def inc(self, *values: Text, amount: float = 1) -> None:
+        with self._lock:
+            self._values[values] = self._values.get(values, 0) + amount
+
+    def samples(self) -> Iterator[Sample]:
+        with self._lock:
+            values = sorted(self._values.items())
+        for label_values, count in values:
+            yield self.name, tuple(zip(self.labels, label_values)), count
+
+
+class Histogram:
+    """
+    Counts observations into cumulative buckets. Each series keeps one slot
+    per bucket plus the +Inf slot and the running sum, so observing is a
+    bisect and two additions under the metric's lock.
+    """
+
+    kind = "histogram"
+
+    def __init__(
+            self,
+            name: Text,
+            documentation: Text,
+            labels: Labels = (),
+            buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._buckets = tuple(buckets)
+        self._series: Dict[Labels, List[float]] = {}
+        self._lock = Lock()
+
+    def observe(self, seconds: float, *values: Text) -> None:
+        slot = bisect_left(self._buckets, seconds)
+        with self._lock:
+            series = self._series.get(values)
+            if series is None:
+                series = self._series[values] = [0] * (len(self._buckets) + 2)
+            series[slot] += 1
+            series[-1] += seconds
+
+    @contextmanager
+    def time(self, *values: Text) -> Iterator[None]:
+        started = perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(perf_counter() - started, *values)
+
+    def samples(self) -> Iterator[Sample]:
+        with self._lock:
+            series = sorted(
+                (label_values, list(slots))
+                for label_values, slots in self._series.items()
+            )
+        bounds = [_format(bound) for bound in self._buckets] + ["+Inf"]
+        for label_values, slots in series:
+            labels = tuple(zip(self.labels, label_values))
+            total = 0
+            for bound, count in zip(bounds, slots):
+                total += count
+                yield f"{self.name}_bucket", labels + (("le", bound),), total
+            yield f"{self.name}_count", labels, total
+            yield f"{self.name}_sum", labels, slots[-1]
+
+
+class Sampled:
+    """
+    Metric read at scrape time, for state that is already counted elsewhere.
+    """
+
+    def __init__(
+            self,
+            kind: Text,
+            name: Text,
+            documentation: Text,
+            read: Callable[[], Iterable[Tuple[Labels, float]]],
+            labels: Labels = (),
+    ) -> None:
+        self.kind = kind
+        self.name = name
+        self.documentation = documentation
+        self.labels = labels
+        self._read = read
+
+    def samples(self) -> Iterator[Sample]:
+        for label_values, value in self._read():
+            yield self.name, tuple(zip(self.labels, label_values)), value
+
+
+Metric = Union[Counter, Histogram, Sampled]
+
+
+@singleton
+class Metrics:
+    """
+    Registry of the process's metrics. Asking for a metric by a name already
+    registered returns the existing one, so components created per request
+    share their series.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: Dict[Text, Metric] = {}
+        self._lock = Lock()
+
+    def counter(
+            self, name: Text, documentation: Text, labels: Labels = (),
+    ) -> Counter:
+        return self._register(Counter(name, documentation, labels))
+
+    def histogram(
+            self,
+            name: Text,
+            documentation: Text,
+            labels: Labels = (),
+            buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labels, buckets))
+
+    def sampled(
+            self,
+            kind: Text,
+            name: Text,
+            documentation: Text,
+            read: Callable[[], Iterable[Tuple[Labels, float]]],
+            labels: Labels = (),
+    ) -> None:
+        with self._lock:
+            self._metrics[name] = Sampled(
+                kind, name, documentation, read, labels,
+            )
+
+    def render(self) -> Text:
+        """Metrics in the Prometheus text exposition format 0.0.4."""
+        with self._lock:
+            metrics = sorted(self._metrics.items())
+        lines = []
+        for name, metric in metrics:
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            for sample, labels, value in metric.samples():
+                lines.append(f"{sample}{_labels(labels)} {_format(value)}")
+        return "\n".join(lines) + "\n"
+
+    def _register(self, metric: Metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+
+def _labels(labels: Sequence[Tuple[Text, Text]]) -> Text:
+    if not labels:
+        return ""
+    pairs = ",".join(
+        f'{name}="{_escape(value)}"' for name, value in labels
+    )
+    return f"{{{pairs}}}"
+
+
+def _escape(value: Text) -> Text:
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\n", "\\n")
+        .replace('"', '\\"')
+    )
+
+
+def _format(value: float) -> Text:
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+__all__ = [
+    "Counter",
+    "DEFAULT_BUCKETS",
+    "Histogram",
+    "Metrics",
+]
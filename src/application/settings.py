@@ -1,6 +1,7 @@
+from datetime import timedelta
 from decimal import Decimal
 from os.path import dirname, join
-from typing import Text
+from typing import List, Optional, Text
 
 from pydantic import BaseSettings, Field, condecimal
 
@@ -13,7 +14,91 @@ class Settings(BaseSettings):
     coindesk_api_url: Text = Field(
         "https://api.coindesk.com/v1/", env="COINDESK_API_URL",
     )
+    coindesk_pool_size: int = Field(10, env="COINDESK_POOL_SIZE")
+    coindesk_connect_timeout: timedelta = Field(
+        timedelta(seconds=3), env="COINDESK_CONNECT_TIMEOUT",
+    )
+    coindesk_read_timeout: timedelta = Field(
+        timedelta(seconds=10), env="COINDESK_READ_TIMEOUT",
+    )
+    coindesk_retries: int = Field(3, env="COINDESK_RETRIES")
+    coindesk_retry_backoff: float = Field(0.1, env="COINDESK_RETRY_BACKOFF")
+    coindesk_cache_ttl: timedelta = Field(
+        timedelta(0), env="COINDESK_CACHE_TTL",
+    )
+    coindesk_poll_interval: timedelta = Field(
+        timedelta(0), env="COINDESK_POLL_INTERVAL",
+    )
+    coindesk_max_staleness: timedelta = Field(
+        timedelta(minutes=5), env="COINDESK_MAX_STALENESS",
+    )
     database_url: Text = Field(..., env="DATABASE_URL")
+    database_replica_urls: List[Text] = Field(
+        [], env="DATABASE_REPLICA_URLS",
+    )
+    replica_wait: timedelta = Field(
+        timedelta(milliseconds=200), env="REPLICA_WAIT",
+    )
+    database_pool_size: int = Field(5, env="DATABASE_POOL_SIZE")
+    database_max_overflow: int = Field(10, env="DATABASE_MAX_OVERFLOW")
+    database_pool_timeout: timedelta = Field(
+        timedelta(seconds=30), env="DATABASE_POOL_TIMEOUT",
+    )
+    database_pool_pre_ping: bool = Field(False, env="DATABASE_POOL_PRE_PING")
+    statement_timeout: timedelta = Field(
+        timedelta(0), env="STATEMENT_TIMEOUT",
+    )
+    slow_query_threshold: timedelta = Field(
+        timedelta(0), env="SLOW_QUERY_THRESHOLD",
+    )
     ordered_btc_limit: condecimal(decimal_places=8) = Field(
         default=Decimal(100), env="ORDERED_BTC_LIMIT",
     )
+    budget_lease_size: condecimal(decimal_places=8) = Field(
+        default=Decimal(0), env="BUDGET_LEASE_SIZE",
+    )
+    budget_lease_ttl: timedelta = Field(
+        timedelta(seconds=30), env="BUDGET_LEASE_TTL",
+    )
+    sql_admission: bool = Field(False, env="SQL_ADMISSION")
+    event_outbox: bool = Field(False, env="EVENT_OUTBOX")
+    outbox_batch_size: int = Field(100, env="OUTBOX_BATCH_SIZE")
+    outbox_poll_interval: timedelta = Field(
+        timedelta(seconds=1), env="OUTBOX_POLL_INTERVAL",
+    )
+    outbox_relay_workers: int = Field(1, env="OUTBOX_RELAY_WORKERS")
+    outbox_max_attempts: int = Field(10, env="OUTBOX_MAX_ATTEMPTS")
+    outbox_retry_backoff: timedelta = Field(
+        timedelta(seconds=1), env="OUTBOX_RETRY_BACKOFF",
+    )
+    accept_orders_later: bool = Field(False, env="ACCEPT_ORDERS_LATER")
+    order_queue_batch_size: int = Field(100, env="ORDER_QUEUE_BATCH_SIZE")
+    order_queue_poll_interval: timedelta = Field(
+        timedelta(seconds=1), env="ORDER_QUEUE_POLL_INTERVAL",
+    )
+    order_queue_workers: int = Field(1, env="ORDER_QUEUE_WORKERS")
+    order_cache_size: int = Field(10_000, env="ORDER_CACHE_SIZE")
+    order_cache_negative_ttl: timedelta = Field(
+        timedelta(seconds=1), env="ORDER_CACHE_NEGATIVE_TTL",
+    )
+    stats_rollup_window: timedelta = Field(
+        timedelta(hours=1), env="STATS_ROLLUP_WINDOW",
+    )
+    stats_rollup_interval: timedelta = Field(
+        timedelta(seconds=10), env="STATS_ROLLUP_INTERVAL",
+    )
+    event_lanes: int = Field(0, env="EVENT_LANES")
+    event_queue_size: int = Field(1000, env="EVENT_QUEUE_SIZE")
+    listener_workers: int = Field(8, env="LISTENER_WORKERS")
+    listener_timeout: timedelta = Field(
+        timedelta(seconds=5), env="LISTENER_TIMEOUT",
+    )
+    order_batch_window: timedelta = Field(
+        timedelta(0), env="ORDER_BATCH_WINDOW",
+    )
+    order_batch_size: int = Field(100, env="ORDER_BATCH_SIZE")
+    pipeline_workers: int = Field(0, env="PIPELINE_WORKERS")
+    trace_export_path: Optional[Text] = Field(None, env="TRACE_EXPORT_PATH")
+    trace_sample_rate: float = Field(
+        0.0, ge=0.0, le=1.0, env="TRACE_SAMPLE_RATE",
+    )
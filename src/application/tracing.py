@@ -0,0 +1,279 @@
+from __future__ import annotations
+
+import atexit
+import json
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from os import urandom
+from queue import Full, Queue
+from threading import Lock, Thread
+from time import time_ns
+from typing import (
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Text,
+    Tuple,
+)
+from uuid import UUID
+
+from injector import Module, provider, singleton
+
+log = logging.getLogger(__name__)
+
+SERVICE_NAME = "workflow"
+
+_current: ContextVar[Optional[Span]] = ContextVar("span", default=None)
+
+
+@dataclass
+class Span:
+    name: Text
+    trace_id: Text
+    span_id: Text
+    parent_id: Optional[Text] = None
+    sampled: bool = True
+    attributes: Dict[Text, Any] = field(default_factory=dict)
+    start_ns: int = 0
+    end_ns: int = 0
+    error: Optional[Text] = None
+    links: List[Tuple[Text, Text]] = field(default_factory=list)
+
+    def set(self, **attributes: Any) -> None:
+        if self.sampled:
+            self.attributes.update(attributes)
+
+
+class SpanExporter:
+    def export(self, spans: Sequence[Span]) -> None:
+        raise NotImplementedError
+
+
+class OTLPFileExporter(SpanExporter):
+    """
+    Appends spans to a file as OTLP/JSON trace requests, one per line, the
+    layout the OpenTelemetry collector's file exporter writes and its file
+    receiver reads.
+    """
+
+    def __init__(self, path: Text) -> None:
+        self._path = path
+        self._lock = Lock()
+
+    def export(self, spans: Sequence[Span]) -> None:
+        line = json.dumps(_otlp_request(spans), separators=(",", ":"))
+        with self._lock, open(self._path, "a", encoding="utf-8") as file:
+            file.write(line + "\n")
+
+
+@singleton
+class Tracer:
+    """
+    Opens spans nested through context variables, so a span started in a
+    request carries over to the threads the request hands work to. Whether
+    a trace is recorded is decided once at its root from the trace id, so
+    all spans of a trace are kept or dropped together, and the same command
+    is sampled alike in every process. Roots started for a command or an
+    event take its id as the trace id, which correlates them with logs.
+    Spans of dropped traces cost a context variable lookup. Work done for
+    several traces at once links the spans of the other traces.
+
+    Full batches of finished spans are exported by a background thread;
+    when `max_queued` batches wait for it, further ones are dropped rather
+    than slowing down traced work.
+    """
+
+    def __init__(
+            self,
+            exporter: Optional[SpanExporter] = None,
+            sample_rate: float = 0.0,
+            batch_size: int = 64,
+            max_queued: int = 16,
+    ) -> None:
+        self._exporter = exporter
+        self._threshold = int(sample_rate * 2 ** 64) if exporter else 0
+        self._batch_size = batch_size
+        self._finished: List[Span] = []
+        self._lock = Lock()
+        self._batches: Queue[List[Span]] = Queue(maxsize=max_queued)
+        self._thread: Optional[Thread] = None
+
+    @contextmanager
+    def span(
+            self,
+            name: Text,
+            trace_id: Optional[UUID] = None,
+            links: Iterable[Optional[Span]] = (),
+            **attributes: Any,
+    ) -> Iterator[Span]:
+        parent = _current.get()
+        if parent is None:
+            if not self._threshold:
+                yield _DROPPED
+                return
+            trace = trace_id.hex if trace_id is not None else urandom(16).hex()
+            sampled = int(trace[:16], 16) < self._threshold
+            span = Span(name, trace, _span_id(), sampled=sampled)
+        elif not parent.sampled:
+            yield parent
+            return
+        else:
+            span = Span(
+                name, parent.trace_id, _span_id(), parent_id=parent.span_id,
+            )
+        span.set(**attributes)
+        span.links = [
+            (linked.trace_id, linked.span_id)
+            for linked in links
+            if linked is not None and linked.sampled
+        ]
+
+        token = _current.set(span)
+        span.start_ns = time_ns()
+        try:
+            yield span
+        except BaseException as error:
+            span.error = type(error).__name__
+            raise
+        finally:
+            _current.reset(token)
+            if span.sampled:
+                span.end_ns = time_ns()
+                self._finish(span)
+
+    def flush(self) -> None:
+        """Exports buffered spans and waits until all batches are exported."""
+        with self._lock:
+            finished, self._finished = self._finished, []
+        if finished:
+            self._queue(finished, block=True)
+        self._batches.join()
+
+    def _finish(self, span: Span) -> None:
+        with self._lock:
+            self._finished.append(span)
+            if len(self._finished) < self._batch_size:
+                return
+            finished, self._finished = self._finished, []
+        self._queue(finished, block=False)
+
+    def _queue(self, batch: List[Span], block: bool) -> None:
+        with self._lock:
+            if self._thread is None:
+                self._thread = Thread(
+                    target=self._export, name="span-exporter", daemon=True,
+                )
+                self._thread.start()
+        try:
+            self._batches.put(batch, block=block)
+        except Full:
+            log.warning("Dropped %d spans, export queue full", len(batch))
+
+    def _export(self) -> None:
+        while True:
+            batch = self._batches.get()
+            try:
+                self._exporter.export(batch)
+            except Exception:
+                log.exception("Could not export %d spans", len(batch))
+            finally:
+                self._batches.task_done()
+
+
+_DROPPED = Span("", "0" * 32, "0" * 16, sampled=False)
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def _span_id() -> Text:
+    return urandom(8).hex()
+
+
+def _otlp_request(spans: Sequence[Span]) -> Dict[Text, Any]:
+    return {
+        "resourceSpans": [{
+            "resource": {
+                "attributes": [_attribute("service.name", SERVICE_NAME)],
+            },
+            "scopeSpans": [{
+                "scope": {"name": __name__},
+                "spans": [_otlp_span(span) for span in spans],
+            }],
+        }],
+    }
+
+
+def _otlp_span(span: Span) -> Dict[Text, Any]:
+    otlp = {
+        "traceId": span.trace_id,
+        "spanId": span.span_id,
+        "name": span.name,
+        "kind": 1,
+        "startTimeUnixNano": str(span.start_ns),
+        "endTimeUnixNano": str(span.end_ns),
+        "attributes": [
+            _attribute(key, value) for key, value in span.attributes.items()
+        ],
+        "status": {"code": 1},
+    }
+    if span.parent_id is not None:
+        otlp["parentSpanId"] = span.parent_id
+    if span.links:
+        otlp["links"] = [
+            {"traceId": trace_id, "spanId": span_id}
+            for trace_id, span_id in span.links
+        ]
+    if span.error is not None:
+        otlp["status"] = {"code": 2, "message": span.error}
+    return otlp
+
+
+def _attribute(key: Text, value: Any) -> Dict[Text, Any]:
+    if isinstance(value, bool):
+        typed = {"boolValue": value}
+    elif isinstance(value, int):
+        typed = {"intValue": str(value)}
+    elif isinstance(value, float):
+        typed = {"doubleValue": value}
+    else:
+        typed = {"stringValue": str(value)}
+    return {"key": key, "value": typed}
+
+
+@dataclass
+class TracingModule(Module):
+    export_path: Optional[Text] = None
+    sample_rate: float = 0.0
+    batch_size: int = 64
+
+    @provider
+    @singleton
+    def tracer(self) -> Tracer:
+        if not self.export_path:
+            return Tracer()
+        tracer = Tracer(
+            OTLPFileExporter(self.export_path),
+            sample_rate=self.sample_rate,
+            batch_size=self.batch_size,
+        )
+        # Spans buffered by the CLI and worker processes are kept too.
+        atexit.register(tracer.flush)
+        return tracer
+
+
+__all__ = [
+    "OTLPFileExporter",
+    "Span",
+    "SpanExporter",
+    "Tracer",
+    "TracingModule",
+    "current_span",
+]
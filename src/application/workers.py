@@ -0,0 +1,105 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from contextvars import copy_context
+from datetime import timedelta
+from functools import partial
+from threading import Event, Thread
+from typing import Callable, List, Optional, TypeVar
+
+log = logging.getLogger(__name__)
+
+Result = TypeVar("Result")
+
+
+class WorkerPool:
+    """
+    Runs blocking steps of the request pipeline (bus, queries, CoinDesk)
+    on a bounded thread pool so the event loop keeps serving other requests.
+    With no workers the steps run inline on the event loop.
+    """
+
+    def __init__(self, workers: int = 0) -> None:
+        self._executor: Optional[ThreadPoolExecutor] = None
+        if workers:
+            self._executor = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="pipeline",
+            )
+
+    async def __call__(
+            self, func: Callable[..., Result], *args, **kwargs,
+    ) -> Result:
+        if self._executor is None:
+            return func(*args, **kwargs)
+
+        loop = asyncio.get_running_loop()
+        context = copy_context()
+        return await loop.run_in_executor(
+            self._executor, partial(context.run, func, *args, **kwargs),
+        )
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+
+class BatchWorkers:
+    """
+    Background threads repeatedly calling a batch step, which returns the
+    number of processed items. A worker sleeps between calls only after a
+    partial batch, so backlogs are drained without delay.
+    """
+
+    def __init__(
+            self,
+            step: Callable[[], int],
+            batch_size: int,
+            every: timedelta,
+            workers: int = 1,
+            name: str = "batch",
+    ) -> None:
+        self._step = step
+        self._batch_size = batch_size
+        self._interval = every.total_seconds()
+        self._workers = workers
+        self._name = name
+        self._stopped = Event()
+        self._threads: List[Thread] = []
+
+    def drain(self) -> int:
+        processed = total = self._step()
+        while processed == self._batch_size:
+            processed = self._step()
+            total += processed
+        return total
+
+    def start(self) -> None:
+        self._stopped.clear()
+        self._threads = [
+            Thread(target=self._run, name=f"{self._name}-{n}", daemon=True)
+            for n in range(self._workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def join(self) -> None:
+        for thread in self._threads:
+            thread.join()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self.join()
+        self._threads = []
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                processed = self._step()
+            except Exception:
+                log.exception("Could not process %s batch", self._name)
+                processed = 0
+            if processed < self._batch_size:
+                self._stopped.wait(self._interval)
+
+
+__all__ = ["BatchWorkers", "WorkerPool"]
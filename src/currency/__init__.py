@@ -1,25 +1,87 @@
 from dataclasses import dataclass
+from datetime import timedelta
 
-from injector import Module, provider
+from injector import Module, provider, singleton
 
-from .exchange_rate import BTCRate, ExchangeRateService
-from .types import BTC, Currency, Fiat
+from application.metrics import Metrics
+from application.tracing import Tracer
+
+from .errors import StaleExchangeRate
+from .exchange_rate import (
+    BTCRate,
+    CacheStats,
+    ExchangeRateService,
+    RatePoller,
+    pooled_session,
+)
+from .types import (
+    BTC,
+    Currency,
+    Fiat,
+    FiatUnits,
+    Satoshi,
+    bulk_from_fiat_units,
+    bulk_from_satoshi,
+    from_fiat_units,
+    from_satoshi,
+    satoshis_for,
+    to_fiat_units,
+    to_satoshi,
+)
 
 
 @dataclass
 class CurrencyModule(Module):
     coindesk_url: str
+    pool_size: int = 10
+    connect_timeout: timedelta = timedelta(seconds=3)
+    read_timeout: timedelta = timedelta(seconds=10)
+    retries: int = 3
+    retry_backoff: float = 0.1
+    cache_ttl: timedelta = timedelta(0)
+    poll_interval: timedelta = timedelta(0)
+    max_staleness: timedelta = timedelta(minutes=5)
+
+    @provider
+    @singleton
+    def service(
+            self, metrics: Metrics, tracer: Tracer,
+    ) -> ExchangeRateService:
+        return ExchangeRateService(
+            self.coindesk_url,
+            cache_ttl=self.cache_ttl,
+            max_staleness=self.max_staleness if self.poll_interval else None,
+            session=pooled_session(
+                self.pool_size, self.retries, self.retry_backoff,
+            ),
+            timeout=(self.connect_timeout, self.read_timeout),
+            metrics=metrics,
+            tracer=tracer,
+        )
 
     @provider
-    def service(self) -> ExchangeRateService:
-        return ExchangeRateService(self.coindesk_url)
+    @singleton
+    def poller(self, service: ExchangeRateService) -> RatePoller:
+        return RatePoller(service, every=self.poll_interval)
 
 
 __all__ = [
     "BTC",
     "BTCRate",
+    "bulk_from_fiat_units",
+    "bulk_from_satoshi",
+    "CacheStats",
     "Currency",
     "CurrencyModule",
     "ExchangeRateService",
     "Fiat",
+    "FiatUnits",
+    "from_fiat_units",
+    "from_satoshi",
+    "RatePoller",
+    "Satoshi",
+    "satoshis_for",
+    "StaleExchangeRate",
+    "to_fiat_units",
+    "to_satoshi",
 ]
@@ -0,0 +1,8 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class StaleExchangeRate(Exception):
+    last_update: Optional[datetime]
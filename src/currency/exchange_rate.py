@@ -1,11 +1,26 @@
-from datetime import datetime
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from threading import Event, Lock, Thread
+from time import monotonic
+from typing import Dict, Iterable, Iterator, Optional, Tuple
 from urllib.parse import urljoin
 
 import requests
 from pydantic import BaseModel, condecimal
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from application.metrics import Metrics
+from application.tracing import Tracer
 
+from .errors import StaleExchangeRate
 from .types import Currency, Fiat
 
+log = logging.getLogger(__name__)
+
 
 class BTCRate(BaseModel):
     price: condecimal(decimal_places=4)
@@ -18,20 +33,160 @@ class CurrentPrices(BaseModel):
     prices: dict[str, condecimal(decimal_places=8)]
 
 
+@dataclass
+class CacheStats:
+    """Cache results, counted under a lock by any request or poller thread."""
+
+    hits: int = 0
+    misses: int = 0
+    refreshes: int = 0
+    _lock: Lock = field(
+        default_factory=Lock, init=False, repr=False, compare=False,
+    )
+
+    def hit(self) -> None:
+        with self._lock:
+            self.hits += 1
+
+    def miss(self) -> None:
+        with self._lock:
+            self.misses += 1
+
+    def refreshed(self) -> None:
+        with self._lock:
+            self.refreshes += 1
+
+
 class ExchangeRateService:
-    def __init__(self, url: str) -> None:
+    """
+    Current bitcoin prices from CoinDesk, fetched per lookup, cached for
+    `cache_ttl` or served from snapshots a poller refreshes.
+
+    The TTL counts from when a snapshot was fetched, not from its
+    `updatedISO`. This is on purpose: CoinDesk publishes about once a
+    minute, so a snapshot is often older than a short TTL as soon as it is
+    fetched, and expiring at `updated + ttl` would fetch on every lookup.
+    Prices are therefore at most `cache_ttl` plus the upstream interval
+    old, and each rate's `on_date` tells its real age.
+    """
+
+    def __init__(
+            self,
+            url: str,
+            cache_ttl: timedelta = timedelta(0),
+            max_staleness: Optional[timedelta] = None,
+            session: Optional[requests.Session] = None,
+            timeout: Tuple[timedelta, timedelta] = (
+                timedelta(seconds=3), timedelta(seconds=10),
+            ),
+            metrics: Optional[Metrics] = None,
+            tracer: Optional[Tracer] = None,
+    ) -> None:
         self._url = urljoin(url, "bpi/currentprice.json")
+        self._session = session or requests.Session()
+        self._timeout = tuple(limit.total_seconds() for limit in timeout)
+        self._ttl = cache_ttl.total_seconds()
+        self._max_staleness = (
+            max_staleness.total_seconds() if max_staleness is not None else None
+        )
+        self._cached: Tuple[float, Optional[CurrentPrices]] = (0.0, None)
+        self._fetching = Lock()
+        self.stats = CacheStats()
+        self._tracer = tracer or Tracer()
+        metrics = metrics or Metrics()
+        self._fetch_latency = metrics.histogram(
+            "exchange_rate_fetch_duration_seconds",
+            "Time spent fetching current prices from CoinDesk.",
+        )
+        metrics.sampled(
+            "counter",
+            "exchange_rate_cache_total",
+            "Exchange rate lookups by cache result.",
+            self._cache_samples,
+            labels=("result",),
+        )
+        metrics.sampled(
+            "counter",
+            "exchange_rate_refreshes_total",
+            "Fetches that brought newer prices.",
+            lambda: [((), self.stats.refreshes)],
+        )
 
     def get_bitcoin_rate(self, for_currency: Currency) -> BTCRate:
+        return self._to_rate(self._get_snapshot(), for_currency)
+
+    def get_bitcoin_rates(
+            self, for_currencies: Iterable[Currency],
+    ) -> Dict[Currency, BTCRate]:
+        currencies = set(for_currencies)
+        if not currencies:
+            return {}
+
+        current = self._get_snapshot()
+        return {
+            currency: self._to_rate(current, currency)
+            for currency in currencies
+        }
+
+    def refresh(self) -> CurrentPrices:
         current = self._get_prices()
+        _, previous = self._cached
+        if previous is None or previous.updated != current.updated:
+            self.stats.refreshed()
+        self._cached = (monotonic(), current)
+        return current
+
+    def _get_snapshot(self) -> CurrentPrices:
+        if self._max_staleness is not None:
+            return self._from_background()
+
+        if not self._ttl:
+            self.stats.miss()
+            return self._get_prices()
+
+        if (current := self._from_cache()) is not None:
+            return current
+
+        with self._fetching:
+            if (current := self._from_cache()) is not None:
+                return current
+
+            self.stats.miss()
+            return self.refresh()
+
+    def _from_cache(self) -> Optional[CurrentPrices]:
+        fetched_at, current = self._cached
+        if current is None or monotonic() >= fetched_at + self._ttl:
+            return None
+        self.stats.hit()
+        return current
+
+    def _from_background(self) -> CurrentPrices:
+        fetched_at, current = self._cached
+        if current is None or monotonic() - fetched_at > self._max_staleness:
+            self.stats.miss()
+            raise StaleExchangeRate(current and current.updated)
+        self.stats.hit()
+        return current
+
+    @staticmethod
+    def _to_rate(current: CurrentPrices, currency: Currency) -> BTCRate:
         return BTCRate(
-            price=current.prices[for_currency.name],
-            currency=for_currency,
+            price=current.prices[currency.name],
+            currency=currency,
             on_date=current.updated,
         )
 
+    def _cache_samples(self) -> Iterator[Tuple[Tuple[str], int]]:
+        yield ("hit",), self.stats.hits
+        yield ("miss",), self.stats.misses
+
     def _get_prices(self) -> CurrentPrices:
-        response = requests.get(self._url)
+        with self._tracer.span(
+                "CoinDesk current prices", url=self._url,
+        ) as span, self._fetch_latency.time():
+            response = self._session.get(self._url, timeout=self._timeout)
+            span.set(status=response.status_code)
         response.raise_for_status()
         data = response.json()
         return CurrentPrices(
@@ -41,3 +196,49 @@ class ExchangeRateService:
                 for currency, index in data["bpi"].items()
             }
         )
+
+
+def pooled_session(
+        pool_size: int, retries: int, backoff_factor: float,
+) -> requests.Session:
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=(429, 500, 502, 503, 504),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_maxsize=pool_size, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class RatePoller:
+    def __init__(self, service: ExchangeRateService, every: timedelta) -> None:
+        self._service = service
+        self._interval = every.total_seconds()
+        self._stopped = Event()
+        self._thread: Optional[Thread] = None
+
+    def start(self) -> None:
+        self.poll()
+        self._stopped.clear()
+        self._thread = Thread(target=self._run, name="rate-poller", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def poll(self) -> None:
+        try:
+            self._service.refresh()
+        except Exception:
+            log.exception("Could not refresh exchange rates")
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self._interval):
+            self.poll()
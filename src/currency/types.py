@@ -3,6 +3,15 @@ from __future__ import annotations
 import decimal
 from decimal import Decimal
 from enum import Enum
+from itertools import repeat
+from typing import Iterable, List, NewType
+
+SATOSHI_PLACES = 8
+FIAT_PLACES = 4
+
+# Whole 1e-8 fractions of a bitcoin and 1e-4 fractions of a fiat currency.
+Satoshi = NewType("Satoshi", int)
+FiatUnits = NewType("FiatUnits", int)
 
 
 class Currency(str, Enum):
@@ -17,3 +26,45 @@ def BTC(value: Decimal | float) -> Decimal:
 
 def Fiat(value: Decimal | float) -> Decimal:
     return Decimal(value).quantize(Decimal(10) ** -4)
+
+
+def to_satoshi(bitcoins: Decimal | int) -> Satoshi:
+    """Satoshis in `bitcoins`, rounded up like BTC()."""
+    scaled = Decimal(bitcoins).scaleb(SATOSHI_PLACES)
+    return Satoshi(int(scaled.to_integral_value(decimal.ROUND_UP)))
+
+
+def to_fiat_units(amount: Decimal | int) -> FiatUnits:
+    """Fiat units in `amount`, rounded half even like Fiat()."""
+    scaled = Decimal(amount).scaleb(FIAT_PLACES)
+    return FiatUnits(int(scaled.to_integral_value(decimal.ROUND_HALF_EVEN)))
+
+
+def from_satoshi(satoshis: int) -> Decimal:
+    return Decimal(satoshis).scaleb(-SATOSHI_PLACES)
+
+
+def from_fiat_units(units: int) -> Decimal:
+    return Decimal(units).scaleb(-FIAT_PLACES)
+
+
+def bulk_from_satoshi(column: Iterable[int]) -> List[Decimal]:
+    """from_satoshi() over a whole result column at once."""
+    return _scaled_down(column, SATOSHI_PLACES)
+
+
+def bulk_from_fiat_units(column: Iterable[int]) -> List[Decimal]:
+    """from_fiat_units() over a whole result column at once."""
+    return _scaled_down(column, FIAT_PLACES)
+
+
+def _scaled_down(column: Iterable[int], places: int) -> List[Decimal]:
+    # Decimal(int) and scaleb are exact; mapping the unbound methods keeps
+    # the whole loop in C instead of paying a Python call per value.
+    decimals = map(Decimal, column)
+    return list(map(Decimal.scaleb, decimals, repeat(-places)))
+
+
+def satoshis_for(paid: FiatUnits, price: FiatUnits) -> Satoshi:
+    """Satoshis bought for `paid` at `price` per bitcoin, rounded up."""
+    return Satoshi(-(-paid * 10 ** SATOSHI_PLACES // price))
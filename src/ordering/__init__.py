@@ -1,41 +1,177 @@
 from dataclasses import dataclass
+from datetime import timedelta
 from decimal import Decimal
 from typing import cast
 
-from injector import Injector, Module, provider
+from injector import Injector, Module, multiprovider, provider, singleton
 
-from application.bus import Handler
+from application.bus import EventBus, Handler, Listener
+from application.db import ReadSessions, Transaction
+from application.metrics import Metrics
+from application.tracing import Tracer
+from currency import to_satoshi
 
-from . import commands, db, errors, events, queries
-from .commands import CreateBuyOrder
+from . import commands, db, errors, events, export, queries, stats
+from .batching import OrderBatcher
+from .commands import CreateBuyOrder, CreateBuyOrders
+from .events import BuyOrderCreated
+from .queue import CommandQueue
 from .service import Service
 
 
 @dataclass
 class OrderingModule(Module):
     ordered_btc_limit: Decimal
+    batch_window: timedelta = timedelta(0)
+    batch_size: int = 100
+    lease_size: Decimal = Decimal(0)
+    lease_ttl: timedelta = timedelta(seconds=30)
+    sql_admission: bool = False
+    outbox: bool = False
+    outbox_batch_size: int = 100
+    outbox_poll_interval: timedelta = timedelta(seconds=1)
+    outbox_workers: int = 1
+    outbox_max_attempts: int = 10
+    outbox_retry_backoff: timedelta = timedelta(seconds=1)
+    accept_later: bool = False
+    queue_batch_size: int = 100
+    queue_poll_interval: timedelta = timedelta(seconds=1)
+    queue_workers: int = 1
+    cache_size: int = 10_000
+    cache_negative_ttl: timedelta = timedelta(seconds=1)
+    stats_window: timedelta = timedelta(hours=1)
+    stats_interval: timedelta = timedelta(seconds=10)
 
     @provider
     def service(self, container: Injector) -> Service:
         return container.create_object(
             Service,
-            additional_kwargs={"ordered_btc_limit": self.ordered_btc_limit},
+            additional_kwargs={
+                "ordered_btc_limit": to_satoshi(self.ordered_btc_limit),
+            },
         )
 
     @provider
-    def create_buy_order(self, ordering: Service) -> Handler[CreateBuyOrder]:
+    def create_buy_order(self, container: Injector) -> Handler[CreateBuyOrder]:
+        if self.accept_later:
+            queue = container.get(CommandQueue)
+            return cast(Handler[CreateBuyOrder], queue.enqueue)
+        if self.batch_window:
+            return cast(Handler[CreateBuyOrder], container.get(OrderBatcher))
+        ordering = container.get(Service)
         return cast(Handler[CreateBuyOrder], ordering.create_buy_order)
 
+    @provider
+    def create_buy_orders(
+            self, ordering: Service,
+    ) -> Handler[CreateBuyOrders]:
+        return cast(Handler[CreateBuyOrders], ordering.create_buy_orders)
+
+    @provider
+    @singleton
+    def batcher(
+            self, ordering: Service, metrics: Metrics, tracer: Tracer,
+    ) -> OrderBatcher:
+        return OrderBatcher(
+            ordering,
+            window=self.batch_window,
+            max_size=self.batch_size,
+            metrics=metrics,
+            tracer=tracer,
+        )
+
+    @provider
+    @singleton
+    def command_queue(
+            self, transaction: Transaction, ordering: Service,
+    ) -> CommandQueue:
+        return CommandQueue(
+            transaction,
+            ordering,
+            batch_size=self.queue_batch_size,
+            every=self.queue_poll_interval,
+            workers=self.queue_workers,
+        )
+
+    @provider
+    @singleton
+    def order_cache(self) -> queries.BuyOrderCache:
+        return queries.BuyOrderCache(
+            self.cache_size, negative_ttl=self.cache_negative_ttl,
+        )
+
+    @provider
+    @singleton
+    def stats_rollup(self, rebuilder: db.StatsRebuilder) -> db.StatsRollup:
+        return db.StatsRollup(
+            rebuilder, window=self.stats_window, every=self.stats_interval,
+        )
+
+    @provider
+    def stats_queries(self, sessions: ReadSessions) -> stats.StatsQueries:
+        return stats.StatsQueries(sessions, limit=self.ordered_btc_limit)
+
+    @multiprovider
+    def warm_order_cache(
+            self, cache: queries.BuyOrderCache,
+    ) -> list[Listener[BuyOrderCreated]]:
+        return [cast(Listener[BuyOrderCreated], cache.warm)]
+
     @provider
     def orm_repository(self, container: Injector) -> db.Repository:
+        if self.sql_admission:
+            return container.create_object(
+                db.SQLAdmissionRepository,
+                additional_kwargs={
+                    "limit": to_satoshi(self.ordered_btc_limit),
+                },
+            )
+        if self.lease_size:
+            return container.create_object(db.LeasedRepository)
         return container.create_object(db.ORMRepository)
 
+    @provider
+    def event_publisher(self, container: Injector) -> db.EventPublisher:
+        if self.outbox:
+            return db.OutboxPublisher()
+        return container.get(db.AfterCommitPublisher)
+
+    @provider
+    @singleton
+    def outbox_relay(
+            self, transaction: Transaction, bus: EventBus,
+    ) -> db.OutboxRelay:
+        return db.OutboxRelay(
+            transaction,
+            bus,
+            event_types=[BuyOrderCreated],
+            batch_size=self.outbox_batch_size,
+            every=self.outbox_poll_interval,
+            workers=self.outbox_workers,
+            max_attempts=self.outbox_max_attempts,
+            retry_backoff=self.outbox_retry_backoff,
+        )
+
+    @provider
+    @singleton
+    def budget_lease(self, transaction: Transaction) -> db.BudgetLease:
+        return db.BudgetLease(
+            transaction,
+            limit=to_satoshi(self.ordered_btc_limit),
+            size=to_satoshi(self.lease_size),
+            ttl=self.lease_ttl,
+        )
+
 
 __all__ = [
+    "CommandQueue",
     "commands",
     "errors",
     "events",
+    "export",
+    "OrderBatcher",
     "Service",
     "OrderingModule",
     "queries",
+    "stats",
 ]
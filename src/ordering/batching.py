@@ -0,0 +1,127 @@
+from __future__ import annotations
+
+import logging
+from concurrent.futures import Future
+from contextvars import Context, copy_context
+from datetime import timedelta
+from queue import Empty, SimpleQueue
+from threading import Lock, Thread
+from time import monotonic
+from typing import List, Optional, Tuple
+from uuid import UUID
+
+from application.metrics import Metrics
+from application.tracing import Tracer, current_span
+
+from .commands import CreateBuyOrder
+from .service import Outcome, Service
+
+log = logging.getLogger(__name__)
+
+Pending = Tuple[CreateBuyOrder, "Future[UUID]", Context]
+
+BATCH_SIZES = (1, 2, 5, 10, 20, 50, 100)
+
+
+class OrderBatcher:
+    """
+    Handler[CreateBuyOrder] gathering commands of concurrent callers within
+    a time window and admitting them under a single balance lock. A batch
+    is admitted in the context of its first caller, so it is traced within
+    that caller's trace and links the spans of the other callers.
+    """
+
+    def __init__(
+            self,
+            service: Service,
+            window: timedelta,
+            max_size: int,
+            metrics: Optional[Metrics] = None,
+            tracer: Optional[Tracer] = None,
+    ) -> None:
+        self._service = service
+        self._tracer = tracer or Tracer()
+        metrics = metrics or Metrics()
+        self._batch_size = metrics.histogram(
+            "order_batch_size",
+            "Commands admitted together in one batch.",
+            buckets=BATCH_SIZES,
+        )
+        self._batches = metrics.counter(
+            "order_batches_total", "Batches of commands admitted.",
+        )
+        self._window = window.total_seconds()
+        self._max_size = max_size
+        self._queue: SimpleQueue[Optional[Pending]] = SimpleQueue()
+        self._starting = Lock()
+        self._thread: Optional[Thread] = None
+
+    def __call__(self, command: CreateBuyOrder) -> UUID:
+        self._start()
+        result: Future[UUID] = Future()
+        self._queue.put((command, result, copy_context()))
+        return result.result()
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    def _start(self) -> None:
+        with self._starting:
+            if self._thread is None:
+                self._thread = Thread(
+                    target=self._run, name="order-batcher", daemon=True,
+                )
+                self._thread.start()
+
+    def _run(self) -> None:
+        while (batch := self._collect()) is not None:
+            self._admit(batch)
+
+    def _collect(self) -> Optional[List[Pending]]:
+        if (first := self._queue.get()) is None:
+            return None
+
+        batch = [first]
+        deadline = monotonic() + self._window
+        while len(batch) < self._max_size:
+            try:
+                timeout = max(deadline - monotonic(), 0)
+                pending = self._queue.get(timeout=timeout)
+            except Empty:
+                break
+            if pending is None:
+                self._queue.put(None)
+                break
+            batch.append(pending)
+        return batch
+
+    def _admit(self, batch: List[Pending]) -> None:
+        self._batch_size.observe(len(batch))
+        self._batches.inc()
+        _, _, first_context = batch[0]
+        try:
+            outcomes = first_context.run(self._admit_traced, batch)
+        except Exception as error:
+            log.exception("Could not admit batch of %d orders", len(batch))
+            for _, result, _ in batch:
+                result.set_exception(error)
+            return
+
+        for (_, result, _), outcome in zip(batch, outcomes):
+            if isinstance(outcome, Exception):
+                result.set_exception(outcome)
+            else:
+                result.set_result(outcome)
+
+    def _admit_traced(self, batch: List[Pending]) -> List[Outcome]:
+        commands = [command for command, _, _ in batch]
+        others = [context.run(current_span) for _, _, context in batch[1:]]
+        with self._tracer.span(
+                "OrderBatcher.admit",
+                links=others,
+                command_ids=",".join(str(command.id) for command in commands),
+        ):
+            return self._service.create_buy_order_batch(commands)
@@ -1,3 +1,5 @@
+from typing import List
+
 from pydantic import condecimal
 
 from application.bus import Command
@@ -7,3 +9,8 @@ from currency import Currency
 class CreateBuyOrder(Command):
     amount: condecimal(decimal_places=4)
     currency: Currency
+
+
+class CreateBuyOrders(Command):
+    orders: List[CreateBuyOrder]
+    atomic: bool = False
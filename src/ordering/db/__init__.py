@@ -1,4 +1,34 @@
-from .buy_order import ORMRepository
+from .admission import SQLAdmissionRepository
+from .buy_order import BalanceCheck, BalanceLedger, ORMRepository
 from .interface import BuyOrder, Repository
+from .lease import BudgetLease, LeasedRepository
+from .outbox import (
+    AfterCommitPublisher,
+    DeliveryStatus,
+    EventPublisher,
+    OutboxLag,
+    OutboxPublisher,
+    OutboxRelay,
+)
+from .stats import DBOrderStats, DBStatsWatermark, StatsRebuilder, StatsRollup
 
-__all__ = ["BuyOrder", "ORMRepository", "Repository"]
+__all__ = [
+    "AfterCommitPublisher",
+    "BalanceCheck",
+    "BalanceLedger",
+    "BudgetLease",
+    "BuyOrder",
+    "DBOrderStats",
+    "DBStatsWatermark",
+    "DeliveryStatus",
+    "EventPublisher",
+    "LeasedRepository",
+    "ORMRepository",
+    "OutboxLag",
+    "OutboxPublisher",
+    "OutboxRelay",
+    "Repository",
+    "SQLAdmissionRepository",
+    "StatsRebuilder",
+    "StatsRollup",
+]
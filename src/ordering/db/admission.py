@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from typing import ContextManager, List
+from uuid import UUID
+
+import sqlalchemy as sa
+from injector import inject
+
+from application.bus import Event
+from application.db import Transaction
+from application.metrics import Metrics
+from application.tracing import Tracer
+from currency import BTCRate, FiatUnits, Satoshi
+
+from ..errors import BalanceLimitExceeded, OrderAlreadyExists
+from .balance import DBBuyOrdersBalance
+from .buy_order import DBBuyOrder, ORMRepository
+from .interface import BuyOrder
+from .outbox import EventPublisher
+from .types import SatoshiColumn
+
+_columns = DBBuyOrder.__table__.c
+
+ADMIT_BUY_ORDER = sa.text(
+    "SELECT status, order_id FROM admit_buy_order("
+    ":order_id, :request_id, :paid, :bought,"
+    " :currency, :price, :rate_date, :limit"
+    ")"
+).bindparams(
+    sa.bindparam("order_id", type_=_columns.order_id.type),
+    sa.bindparam("request_id", type_=_columns.request_id.type),
+    sa.bindparam("paid", type_=_columns.paid.type),
+    sa.bindparam("bought", type_=_columns.bought.type),
+    sa.bindparam("currency", type_=_columns.currency.type),
+    sa.bindparam("price", type_=_columns.price.type),
+    sa.bindparam("rate_date", type_=_columns.rate_date.type),
+    sa.bindparam("limit", type_=SatoshiColumn),
+).columns(status=sa.String, order_id=_columns.order_id.type)
+
+
+@inject
+class SQLAdmissionRepository(ORMRepository):
+    """
+    Admits each BuyOrder with one call of admit_buy_order database function,
+    which checks duplicates and the limit, inserts the order and books it in
+    the ledger. The ledger stays locked for a single round trip only.
+
+    `lock` reads the booked balance without locking it, so the Service can
+    reject orders over the limit early; the balance may lag concurrent
+    admissions and admit_buy_order has the final say.
+    """
+
+    def __init__(
+            self,
+            transaction: Transaction,
+            publisher: EventPublisher,
+            metrics: Metrics,
+            tracer: Tracer,
+            limit: Satoshi,
+    ) -> None:
+        super().__init__(transaction, publisher, metrics, tracer)
+        self._limit = limit
+
+    @contextmanager
+    def lock(
+            self, expected: Satoshi = Satoshi(0),
+    ) -> ContextManager[Satoshi]:
+        events: List[Event] = []
+        with self._transaction() as session:
+            self._locked.session = session
+            self._locked.pending_events = events
+
+            yield session.execute(
+                sa.select(DBBuyOrdersBalance.bought)
+            ).scalar_one()
+
+            self._publisher.stage(session, events)
+            del self._locked.session
+            del self._locked.pending_events
+
+        self._publisher.publish(events)
+
+    def create(
+            self,
+            request_id: UUID,
+            paid: FiatUnits,
+            bought: Satoshi,
+            with_rate: BTCRate,
+    ) -> BuyOrder:
+        entry = DBBuyOrder(
+            request_id=request_id,
+            paid=paid,
+            bought=bought,
+            exchange_rate=with_rate,
+        )
+        status, order_id = self._locked.session.execute(
+            ADMIT_BUY_ORDER,
+            {
+                "order_id": entry.id,
+                "request_id": entry.request_id,
+                "paid": entry.paid,
+                "bought": entry.bought,
+                "currency": entry._currency,
+                "price": entry._price,
+                "rate_date": entry._rate_date,
+                "limit": self._limit,
+            },
+        ).one()
+
+        if status == "duplicate":
+            raise OrderAlreadyExists(order_id)
+        if status == "limit_exceeded":
+            raise BalanceLimitExceeded(self._limit)
+        return entry
@@ -0,0 +1,27 @@
+from datetime import datetime
+
+import sqlalchemy as sa
+
+from application.db import Base
+from currency import Satoshi
+
+from .types import SatoshiColumn
+
+
+class DBBuyOrdersBalance(Base):
+    __tablename__ = "buy_orders_balance"
+
+    id: int = sa.Column(sa.Integer, primary_key=True)
+    bought: Satoshi = sa.Column(SatoshiColumn, nullable=False)
+
+
+class DBBudgetLease(Base):
+    __tablename__ = "budget_leases"
+
+    id: int = sa.Column(sa.Integer, primary_key=True)
+    holder: str = sa.Column(sa.String(255), nullable=False)
+    granted: Satoshi = sa.Column(SatoshiColumn, nullable=False)
+    used: Satoshi = sa.Column(SatoshiColumn, nullable=False, default=0)
+    expires_at: datetime = sa.Column(
+        sa.DateTime(timezone=True), nullable=False, index=True,
+    )
@@ -1,32 +1,41 @@
 from __future__ import annotations
 
 from contextlib import contextmanager
+from dataclasses import dataclass
 from datetime import datetime
 from decimal import Decimal
-from typing import ContextManager, List, Text
+from threading import local
+from time import perf_counter
+from typing import Collection, ContextManager, Dict, List, Text
 from uuid import UUID, uuid4
 
 import sqlalchemy as sa
 import sqlalchemy_utils as sa_utils
 from injector import inject
 from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import Session
 
-from application.bus import Event, EventBus
+from application.bus import Event
 from application.db import Base, Transaction
-from currency import BTCRate, Currency
+from application.metrics import Metrics
+from application.tracing import Tracer
+from currency import BTCRate, Currency, FiatUnits, Satoshi
 
+from ..errors import OrderAlreadyExists
+from .balance import DBBudgetLease, DBBuyOrdersBalance
 from .interface import BuyOrder, Repository
-from .types import BtcAmountColumn, FiatAmountColumn
+from .outbox import EventPublisher
+from .types import FiatAmountColumn, FiatUnitsColumn, SatoshiColumn
 
 
 class DBBuyOrder(Base, BuyOrder):
     def __init__(
             self,
             request_id: UUID,
-            paid: Decimal,
-            bought: Decimal,
+            paid: FiatUnits,
+            bought: Satoshi,
             exchange_rate: BTCRate,
     ) -> None:
         self.id = uuid4()
@@ -36,13 +45,16 @@ class DBBuyOrder(Base, BuyOrder):
         self.exchange_rate = exchange_rate
 
     __tablename__ = "buy_orders"
+    __table_args__ = (
+        sa.Index("ix_buy_orders_when_created", "when_created", "id"),
+    )
 
     _db_id: int = sa.Column("id", sa.Integer, primary_key=True)
     id: UUID = sa.Column("order_id", sa_utils.UUIDType, unique=True)
     request_id: UUID = sa.Column(sa_utils.UUIDType, unique=True)
 
-    paid: Decimal = sa.Column(FiatAmountColumn)
-    bought: Decimal = sa.Column(BtcAmountColumn)
+    paid: FiatUnits = sa.Column(FiatUnitsColumn)
+    bought: Satoshi = sa.Column(SatoshiColumn)
 
     _currency: Currency = sa.Column(
         "currency", sa.Enum(Currency, naive_enum=False)
@@ -65,7 +77,7 @@ class DBBuyOrder(Base, BuyOrder):
         self._rate_date = value.on_date
 
     when_created: datetime = sa.Column(
-        "when_created", sa.DateTime, default=datetime.utcnow, index=True
+        "when_created", sa.DateTime, default=datetime.utcnow,
     )
     _when_updated: datetime = sa.Column(
         "when_updated", sa.DateTime, onupdate=datetime.utcnow,
@@ -78,47 +90,77 @@ class DBBuyOrder(Base, BuyOrder):
             f" db_id={self._db_id}"
             f" order_id={self.id}"
             f" request_id={self.request_id}"
-            f" amount={self.bought!s}BTC"
+            f" amount={self.bought}sat"
             ">"
         )
 
 
+class LockedState(local):
+    session: Session
+    balance: DBBuyOrdersBalance
+    pending_events: List[Event]
+
+
 @inject
 class ORMRepository(Repository):
-    _session: Session
-    _pending_events: List[Event]
-
-    def __init__(self, transaction: Transaction, bus: EventBus) -> None:
+    def __init__(
+            self,
+            transaction: Transaction,
+            publisher: EventPublisher,
+            metrics: Metrics,
+            tracer: Tracer,
+    ) -> None:
         self._transaction = transaction
-        self._bus = bus
+        self._publisher = publisher
+        self._locked = LockedState()
+        self._tracer = tracer
+        self._lock_wait = metrics.histogram(
+            "order_lock_wait_seconds",
+            "Time spent waiting for the ordering balance lock.",
+        )
+        self._lock_hold = metrics.histogram(
+            "order_lock_hold_seconds",
+            "Time the ordering balance lock was held, until commit.",
+        )
 
     @contextmanager
-    def lock(self) -> ContextManager[Decimal]:
+    def lock(
+            self, expected: Satoshi = Satoshi(0),
+    ) -> ContextManager[Satoshi]:
         events = []
-        with self._transaction() as session:
-            self._session = session
-            self._pending_events = events
-
-            lock = f"LOCK TABLE {DBBuyOrder.__tablename__} IN EXCLUSIVE MODE;"
-            session.execute(lock)
-
-            yield self._calculate_balance()
-
-            del self._session
-            del self._pending_events
-
-        for event in events:
-            self._bus.emit(event)
-
-    def _calculate_balance(self) -> Decimal:
-        balance, = self._session.query(func.sum(DBBuyOrder.bought)).one()
-        return Decimal(balance or 0)
+        locked = None
+        try:
+            with self._transaction() as session:
+                self._locked.session = session
+                self._locked.pending_events = events
+
+                waiting = perf_counter()
+                with self._tracer.span("ORMRepository.lock"):
+                    self._locked.balance = (
+                        session.query(DBBuyOrdersBalance)
+                        .with_for_update()
+                        .one()
+                    )
+                locked = perf_counter()
+                self._lock_wait.observe(locked - waiting)
+
+                yield self._locked.balance.bought
+
+                self._publisher.stage(session, events)
+                del self._locked.session
+                del self._locked.balance
+                del self._locked.pending_events
+        finally:
+            if locked is not None:  # pragma: no branch
+                self._lock_hold.observe(perf_counter() - locked)
+
+        self._publisher.publish(events)
 
     def create(
             self,
             request_id: UUID,
-            paid: Decimal,
-            bought: Decimal,
+            paid: FiatUnits,
+            bought: Satoshi,
             with_rate: BTCRate,
     ) -> BuyOrder:
         entry = DBBuyOrder(
@@ -128,18 +170,85 @@ class ORMRepository(Repository):
             exchange_rate=with_rate,
         )
 
-        self._session.add(entry)
-        self._session.flush()
+        with self._tracer.span(
+                "ORMRepository.create", request_id=str(request_id),
+        ):
+            self._insert(entry)
+        self._book(bought)
         return entry
 
+    def _insert(self, entry: DBBuyOrder) -> None:
+        inserted = self._locked.session.execute(
+            insert(DBBuyOrder)
+            .values({
+                DBBuyOrder.id: entry.id,
+                DBBuyOrder.request_id: entry.request_id,
+                DBBuyOrder.paid: entry.paid,
+                DBBuyOrder.bought: entry.bought,
+                DBBuyOrder._currency: entry._currency,
+                DBBuyOrder._price: entry._price,
+                DBBuyOrder._rate_date: entry._rate_date,
+            })
+            .on_conflict_do_nothing(index_elements=[DBBuyOrder.request_id])
+            .returning(DBBuyOrder.id)
+        ).one_or_none()
+        if inserted is None:
+            raise OrderAlreadyExists(
+                self._locked.session.query(DBBuyOrder.id)
+                .filter_by(request_id=entry.request_id)
+                .scalar()
+            )
+
+    def _book(self, bought: Satoshi) -> None:
+        self._locked.balance.bought += bought
+
     def emit(self, event: Event) -> None:
-        self._pending_events.append(event)
+        self._locked.pending_events.append(event)
+
+    def get_order_ids(
+            self, for_request_ids: Collection[UUID],
+    ) -> Dict[UUID, UUID]:
+        if not for_request_ids:
+            return {}
 
-    def get_order_id(self, for_request_id: UUID) -> BuyOrder | None:
         with self._transaction() as session:
             result = (
-                session.query(DBBuyOrder.id)
-                .filter_by(request_id=for_request_id)
-                .one_or_none()
+                session.query(DBBuyOrder.request_id, DBBuyOrder.id)
+                .filter(DBBuyOrder.request_id.in_(for_request_ids))
+                .all()
+            )
+        return dict(result)
+
+
+@dataclass(frozen=True)
+class BalanceCheck:
+    ledger: Satoshi
+    orders: Satoshi
+    leased: Satoshi = Satoshi(0)
+
+    @property
+    def consistent(self) -> bool:
+        return self.ledger == self.orders + self.leased
+
+
+@inject
+class BalanceLedger:
+    def __init__(self, transaction: Transaction) -> None:
+        self._transaction = transaction
+
+    def verify(self) -> BalanceCheck:
+        with self._transaction() as session:
+            balance = (
+                session.query(DBBuyOrdersBalance)
+                .with_for_update(read=True)
+                .one()
+            )
+            orders, = session.query(func.sum(DBBuyOrder.bought)).one()
+            granted, used = session.query(
+                func.sum(DBBudgetLease.granted), func.sum(DBBudgetLease.used),
+            ).one()
+            return BalanceCheck(
+                ledger=balance.bought,
+                orders=Satoshi(int(orders or 0)),
+                leased=Satoshi(int((granted or 0) - (used or 0))),
             )
-        return result and result[0]
@@ -1,26 +1,29 @@
 from abc import abstractmethod
-from decimal import Decimal
-from typing import ContextManager, Optional, Protocol
+from typing import Collection, ContextManager, Dict, Protocol
 from uuid import UUID
 
 from application.bus import Event
-from currency import BTCRate
+from currency import BTCRate, FiatUnits, Satoshi
 
 
 class BuyOrder:
     id: UUID
     request_id: UUID
-    paid: Decimal
-    bought: Decimal
+    paid: FiatUnits
+    bought: Satoshi
     exchange_rate: BTCRate
 
 
 class Repository(Protocol):
     @abstractmethod
-    def lock(self) -> ContextManager[Decimal]:
+    def lock(
+            self, expected: Satoshi = Satoshi(0),
+    ) -> ContextManager[Satoshi]:
         """
         Locks balance of BuyOrders.
-        :return: Context manager with current balance
+        :param expected: Satoshis caller is going to order under the lock
+        :return: Context manager with current balance in satoshis, 0 when
+            repository enforces the limit itself on create
         """
         ...
 
@@ -28,12 +31,15 @@ class Repository(Protocol):
     def create(
             self,
             request_id: UUID,
-            paid: Decimal,
-            bought: Decimal,
+            paid: FiatUnits,
+            bought: Satoshi,
             with_rate: BTCRate,
     ) -> BuyOrder:
         """
         Usage: Needs locked context before creating BuyOrder.
+        :raises OrderAlreadyExists: When order for request_id already exists
+        :raises BalanceLimitExceeded: When repository enforces the limit
+            itself and the order would exceed it
         """
         ...
 
@@ -45,5 +51,10 @@ class Repository(Protocol):
         ...
 
     @abstractmethod
-    def get_order_id(self, for_request_id: UUID) -> Optional[UUID]:
+    def get_order_ids(
+            self, for_request_ids: Collection[UUID],
+    ) -> Dict[UUID, UUID]:
+        """
+        :return: Order ids of already created orders by their request ids
+        """
         ...
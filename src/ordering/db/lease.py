@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import os
+import socket
+from contextlib import contextmanager
+from datetime import timedelta
+from threading import Lock
+from time import monotonic
+from typing import ContextManager, List, Optional
+
+from injector import inject
+from sqlalchemy import delete, func, update
+from sqlalchemy.orm import Session
+
+from application.bus import Event
+from application.db import Transaction
+from application.metrics import Metrics
+from application.tracing import Tracer
+from currency import Satoshi
+
+from ..errors import BudgetLeaseExpired
+from .balance import DBBudgetLease, DBBuyOrdersBalance
+from .buy_order import LockedState, ORMRepository
+from .outbox import EventPublisher
+
+
+class BudgetLease:
+    """
+    Slice of the ordered bitcoins limit reserved by this process. Orders are
+    admitted against the slice under a local lock only; the balance ledger
+    is locked just to top the slice up, reclaim expired leases or release.
+    """
+
+    def __init__(
+            self,
+            transaction: Transaction,
+            limit: Satoshi,
+            size: Satoshi,
+            ttl: timedelta,
+            holder: Optional[str] = None,
+    ) -> None:
+        self._transaction = transaction
+        self._limit = limit
+        self._size = size
+        self._ttl = ttl
+        self._holder = holder or f"{socket.gethostname()}:{os.getpid()}"
+        self._local = Lock()
+        self._id: Optional[int] = None
+        self._remaining = Satoshi(0)
+        self._renew_at = 0.0
+
+    @property
+    def balance(self) -> Satoshi:
+        return self._limit - self._remaining
+
+    @contextmanager
+    def hold(self, expected: Satoshi) -> ContextManager[BudgetLease]:
+        with self._local:
+            if self._needs_renewal(expected):
+                self._reserve(expected)
+            yield self
+
+    def consume(self, session: Session, satoshis: Satoshi) -> None:
+        if not satoshis:
+            return
+
+        consumed = session.execute(
+            update(DBBudgetLease)
+            .where(
+                DBBudgetLease.id == self._id,
+                DBBudgetLease.expires_at > func.now(),
+                DBBudgetLease.used + satoshis <= DBBudgetLease.granted,
+            )
+            .values(used=DBBudgetLease.used + satoshis)
+            .execution_options(synchronize_session=False)
+        )
+        if consumed.rowcount != 1:
+            lease_id, self._id, self._remaining = self._id, None, Satoshi(0)
+            raise BudgetLeaseExpired(lease_id)
+        self._remaining -= satoshis
+
+    def release(self) -> None:
+        with self._local:
+            if self._id is None:
+                return
+
+            with self._transaction() as session:
+                balance = self._lock_balance(session)
+                lease = (
+                    session.query(DBBudgetLease)
+                    .filter_by(id=self._id)
+                    .with_for_update()
+                    .one_or_none()
+                )
+                if lease is not None:
+                    balance.bought -= lease.granted - lease.used
+                    session.delete(lease)
+
+            self._id, self._remaining = None, Satoshi(0)
+
+    def _needs_renewal(self, expected: Satoshi) -> bool:
+        return (
+            self._id is None
+            or self._remaining < expected
+            or monotonic() >= self._renew_at
+        )
+
+    def _reserve(self, expected: Satoshi) -> None:
+        with self._transaction() as session:
+            balance = self._lock_balance(session)
+            self._reclaim_expired(session, balance)
+
+            lease = self._id and session.get(DBBudgetLease, self._id)
+            remaining = lease.granted - lease.used if lease else Satoshi(0)
+            wanted = max(self._size, expected) - remaining
+            grant = max(min(wanted, self._limit - balance.bought), 0)
+            balance.bought += grant
+
+            if not lease:
+                lease = DBBudgetLease(
+                    holder=self._holder, granted=grant, used=0,
+                )
+                session.add(lease)
+            else:
+                lease.granted += grant
+            lease.expires_at = func.now() + self._ttl
+            session.flush()
+
+            self._id, self._remaining = lease.id, remaining + grant
+        self._renew_at = monotonic() + self._ttl.total_seconds() / 2
+
+    @staticmethod
+    def _lock_balance(session: Session) -> DBBuyOrdersBalance:
+        return session.query(DBBuyOrdersBalance).with_for_update().one()
+
+    @staticmethod
+    def _reclaim_expired(session: Session, balance: DBBuyOrdersBalance) -> None:
+        expired = session.execute(
+            delete(DBBudgetLease)
+            .where(DBBudgetLease.expires_at <= func.now())
+            .returning(DBBudgetLease.granted, DBBudgetLease.used)
+            .execution_options(synchronize_session=False)
+        )
+        for granted, used in expired:
+            balance.bought -= granted - used
+
+
+class LeasedState(LockedState):
+    leased: Satoshi
+
+
+@inject
+class LeasedRepository(ORMRepository):
+    def __init__(
+            self,
+            transaction: Transaction,
+            publisher: EventPublisher,
+            metrics: Metrics,
+            tracer: Tracer,
+            lease: BudgetLease,
+    ) -> None:
+        super().__init__(transaction, publisher, metrics, tracer)
+        self._lease = lease
+        self._locked = LeasedState()
+
+    @contextmanager
+    def lock(
+            self, expected: Satoshi = Satoshi(0),
+    ) -> ContextManager[Satoshi]:
+        events: List[Event] = []
+        with self._lease.hold(expected) as lease:
+            with self._transaction() as session:
+                self._locked.session = session
+                self._locked.pending_events = events
+                self._locked.leased = Satoshi(0)
+
+                yield lease.balance
+
+                session.flush()
+                lease.consume(session, self._locked.leased)
+                self._publisher.stage(session, events)
+
+                del self._locked.session
+                del self._locked.leased
+                del self._locked.pending_events
+
+        self._publisher.publish(events)
+
+    def _book(self, bought: Satoshi) -> None:
+        self._locked.leased += bought
@@ -0,0 +1,82 @@
+"""Admit buy order in a single round trip
+
+Revision ID: 3f9c1d7a2b4e
+Revises: ff26863ba968
+Create Date: 2026-10-18 19:20:41.274013
+
+"""
+from alembic import op
+
+revision = '3f9c1d7a2b4e'
+down_revision = 'ff26863ba968'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute(
+        """
+        CREATE FUNCTION admit_buy_order(
+            p_order_id uuid,
+            p_request_id uuid,
+            p_paid bigint,
+            p_bought bigint,
+            p_currency varchar,
+            p_price bigint,
+            p_rate_date timestamp,
+            p_limit bigint,
+            OUT status text,
+            OUT order_id uuid
+        ) LANGUAGE plpgsql AS $$
+        DECLARE
+            balance bigint;
+        BEGIN
+            SELECT b.bought INTO balance
+            FROM buy_orders_balance b
+            FOR UPDATE;
+
+            SELECT o.order_id INTO order_id
+            FROM buy_orders o
+            WHERE o.request_id = p_request_id;
+            IF FOUND THEN
+                status := 'duplicate';
+                RETURN;
+            END IF;
+
+            IF balance + p_bought > p_limit THEN
+                status := 'limit_exceeded';
+                RETURN;
+            END IF;
+
+            INSERT INTO buy_orders AS o (
+                order_id, request_id, paid, bought,
+                currency, price, rate_date, when_created
+            )
+            VALUES (
+                p_order_id, p_request_id, p_paid, p_bought,
+                p_currency, p_price, p_rate_date, timezone('utc', now())
+            )
+            ON CONFLICT (request_id) DO NOTHING
+            RETURNING o.order_id INTO order_id;
+            IF NOT FOUND THEN
+                SELECT o.order_id INTO order_id
+                FROM buy_orders o
+                WHERE o.request_id = p_request_id;
+                status := 'duplicate';
+                RETURN;
+            END IF;
+
+            UPDATE buy_orders_balance SET bought = bought + p_bought;
+            status := 'created';
+        END;
+        $$
+        """
+    )
+
+
+def downgrade():
+    op.execute(
+        "DROP FUNCTION admit_buy_order("
+        "uuid, uuid, bigint, bigint, varchar, bigint, timestamp, bigint"
+        ")"
+    )
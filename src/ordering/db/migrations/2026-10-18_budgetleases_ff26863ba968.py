@@ -0,0 +1,33 @@
+"""Budget leases reserved from ordered bitcoins limit
+
+Revision ID: ff26863ba968
+Revises: b7826a6c6128
+Create Date: 2026-10-18 18:42:07.519203
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = 'ff26863ba968'
+down_revision = 'b7826a6c6128'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "budget_leases",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("holder", sa.String(255), nullable=False),
+        sa.Column("granted", sa.BigInteger, nullable=False),
+        sa.Column("used", sa.BigInteger, nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+    )
+    op.create_index(
+        "ix_budget_leases_expires_at", "budget_leases", ["expires_at"],
+    )
+
+
+def downgrade():
+    op.drop_index("ix_budget_leases_expires_at", "budget_leases")
+    op.drop_table("budget_leases")
@@ -0,0 +1,31 @@
+"""Balance ledger of bought bitcoins
+
+Revision ID: b7826a6c6128
+Revises: 83b698eb2648
+Create Date: 2026-10-18 18:10:21.102932
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = 'b7826a6c6128'
+down_revision = '83b698eb2648'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "buy_orders_balance",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("bought", sa.BigInteger, nullable=False),
+    )
+    op.execute("LOCK TABLE buy_orders IN EXCLUSIVE MODE")
+    op.execute(
+        "INSERT INTO buy_orders_balance (id, bought) "
+        "SELECT 1, COALESCE(SUM(bought), 0) FROM buy_orders"
+    )
+
+
+def downgrade():
+    op.drop_table("buy_orders_balance")
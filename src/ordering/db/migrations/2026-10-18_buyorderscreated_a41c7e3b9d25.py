@@ -0,0 +1,23 @@
+"""Index buy orders by creation for keyset pagination
+
+Revision ID: a41c7e3b9d25
+Revises: 8d4b6f2e1a07
+Create Date: 2026-10-18 21:12:07.530914
+
+"""
+from alembic import op
+
+revision = 'a41c7e3b9d25'
+down_revision = '8d4b6f2e1a07'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(
+        "ix_buy_orders_when_created", "buy_orders", ["when_created", "id"],
+    )
+
+
+def downgrade():
+    op.drop_index("ix_buy_orders_when_created", "buy_orders")
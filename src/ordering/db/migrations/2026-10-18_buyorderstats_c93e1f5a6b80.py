@@ -0,0 +1,67 @@
+"""Hourly buy order statistics kept by trigger
+
+Revision ID: c93e1f5a6b80
+Revises: a41c7e3b9d25
+Create Date: 2026-10-18 21:47:33.021586
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = 'c93e1f5a6b80'
+down_revision = 'a41c7e3b9d25'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "buy_order_stats",
+        sa.Column("bucket", sa.DateTime, primary_key=True),
+        sa.Column("currency", sa.String(3), primary_key=True),
+        sa.Column("orders", sa.BigInteger, nullable=False),
+        sa.Column("bought", sa.BigInteger, nullable=False),
+        sa.Column("paid", sa.BigInteger, nullable=False),
+    )
+    op.execute(
+        """
+        CREATE FUNCTION count_buy_order() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            INSERT INTO buy_order_stats AS s (
+                bucket, currency, orders, bought, paid
+            )
+            VALUES (
+                date_trunc(
+                    'hour',
+                    COALESCE(NEW.when_created, timezone('utc', now()))
+                ),
+                NEW.currency, 1, NEW.bought, NEW.paid
+            )
+            ON CONFLICT (bucket, currency) DO UPDATE SET
+                orders = s.orders + 1,
+                bought = s.bought + EXCLUDED.bought,
+                paid = s.paid + EXCLUDED.paid;
+            RETURN NULL;
+        END;
+        $$
+        """
+    )
+    op.execute(
+        "CREATE TRIGGER buy_orders_stats AFTER INSERT ON buy_orders "
+        "FOR EACH ROW EXECUTE FUNCTION count_buy_order()"
+    )
+    op.execute("LOCK TABLE buy_orders IN SHARE MODE")
+    op.execute(
+        "INSERT INTO buy_order_stats (bucket, currency, orders, bought, paid) "
+        "SELECT date_trunc('hour', when_created), currency, count(*), "
+        "sum(bought), sum(paid) FROM buy_orders "
+        "WHERE when_created IS NOT NULL "
+        "GROUP BY 1, 2"
+    )
+
+
+def downgrade():
+    op.execute("DROP TRIGGER buy_orders_stats ON buy_orders")
+    op.execute("DROP FUNCTION count_buy_order()")
+    op.drop_table("buy_order_stats")
@@ -0,0 +1,45 @@
+"""Queue of commands accepted for later processing
+
+Revision ID: 8d4b6f2e1a07
+Revises: 5c2e8a91d0f3
+Create Date: 2026-10-18 20:41:55.108362
+
+"""
+import sqlalchemy as sa
+import sqlalchemy_utils as sa_utils
+from alembic import op
+
+revision = '8d4b6f2e1a07'
+down_revision = '5c2e8a91d0f3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "command_queue",
+        sa.Column("id", sa.BigInteger, primary_key=True),
+        sa.Column(
+            "request_id", sa_utils.UUIDType, unique=True, nullable=False,
+        ),
+        sa.Column("payload", sa.Text, nullable=False),
+        sa.Column("status", sa.String(16), nullable=False),
+        sa.Column("order_id", sa_utils.UUIDType),
+        sa.Column("detail", sa.Text),
+        sa.Column(
+            "enqueued_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.func.now(),
+        ),
+        sa.Column("processed_at", sa.DateTime(timezone=True)),
+    )
+    op.create_index(
+        "ix_command_queue_pending", "command_queue", ["id"],
+        postgresql_where=sa.text("status = 'pending'"),
+    )
+
+
+def downgrade():
+    op.drop_index("ix_command_queue_pending", "command_queue")
+    op.drop_table("command_queue")
@@ -0,0 +1,33 @@
+"""Outbox of events awaiting delivery to listeners
+
+Revision ID: 5c2e8a91d0f3
+Revises: 3f9c1d7a2b4e
+Create Date: 2026-10-18 20:03:12.840291
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = '5c2e8a91d0f3'
+down_revision = '3f9c1d7a2b4e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "event_outbox",
+        sa.Column("id", sa.BigInteger, primary_key=True),
+        sa.Column("event_type", sa.String(255), nullable=False),
+        sa.Column("payload", sa.Text, nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.func.now(),
+        ),
+    )
+
+
+def downgrade():
+    op.drop_table("event_outbox")
@@ -0,0 +1,49 @@
+"""Retry failed outbox deliveries with backoff and keep dead letters
+
+Revision ID: e4a7b2c9d851
+Revises: c93e1f5a6b80
+Create Date: 2026-10-18 23:02:41.315208
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = 'e4a7b2c9d851'
+down_revision = 'c93e1f5a6b80'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "event_outbox",
+        sa.Column(
+            "status", sa.String(16), nullable=False, server_default="pending",
+        ),
+    )
+    op.add_column(
+        "event_outbox",
+        sa.Column("attempts", sa.Integer, nullable=False, server_default="0"),
+    )
+    op.add_column(
+        "event_outbox",
+        sa.Column(
+            "next_attempt_at",
+            sa.DateTime(timezone=True),
+            nullable=False,
+            server_default=sa.func.now(),
+        ),
+    )
+    op.add_column("event_outbox", sa.Column("last_error", sa.Text))
+    op.create_index(
+        "ix_event_outbox_due", "event_outbox", ["next_attempt_at"],
+        postgresql_where=sa.text("status = 'pending'"),
+    )
+
+
+def downgrade():
+    op.drop_index("ix_event_outbox_due", "event_outbox")
+    op.drop_column("event_outbox", "last_error")
+    op.drop_column("event_outbox", "next_attempt_at")
+    op.drop_column("event_outbox", "attempts")
+    op.drop_column("event_outbox", "status")
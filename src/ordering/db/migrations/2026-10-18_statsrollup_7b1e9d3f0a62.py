@@ -0,0 +1,49 @@
+"""Recount buy order statistics periodically instead of by trigger
+
+Revision ID: 7b1e9d3f0a62
+Revises: e4a7b2c9d851
+Create Date: 2026-10-18 23:31:08.662417
+
+"""
+from alembic import op
+
+revision = '7b1e9d3f0a62'
+down_revision = 'e4a7b2c9d851'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute("DROP TRIGGER buy_orders_stats ON buy_orders")
+    op.execute("DROP FUNCTION count_buy_order()")
+
+
+def downgrade():
+    op.execute(
+        """
+        CREATE FUNCTION count_buy_order() RETURNS trigger
+        LANGUAGE plpgsql AS $$
+        BEGIN
+            INSERT INTO buy_order_stats AS s (
+                bucket, currency, orders, bought, paid
+            )
+            VALUES (
+                date_trunc(
+                    'hour',
+                    COALESCE(NEW.when_created, timezone('utc', now()))
+                ),
+                NEW.currency, 1, NEW.bought, NEW.paid
+            )
+            ON CONFLICT (bucket, currency) DO UPDATE SET
+                orders = s.orders + 1,
+                bought = s.bought + EXCLUDED.bought,
+                paid = s.paid + EXCLUDED.paid;
+            RETURN NULL;
+        END;
+        $$
+        """
+    )
+    op.execute(
+        "CREATE TRIGGER buy_orders_stats AFTER INSERT ON buy_orders "
+        "FOR EACH ROW EXECUTE FUNCTION count_buy_order()"
+    )
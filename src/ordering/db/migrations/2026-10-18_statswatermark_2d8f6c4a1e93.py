@@ -0,0 +1,30 @@
+"""Time buy order statistics were last recounted at
+
+Revision ID: 2d8f6c4a1e93
+Revises: 7b1e9d3f0a62
+Create Date: 2026-10-18 23:58:41.207315
+
+"""
+import sqlalchemy as sa
+from alembic import op
+
+revision = '2d8f6c4a1e93'
+down_revision = '7b1e9d3f0a62'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        "buy_order_stats_watermark",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("counted_at", sa.DateTime),
+    )
+    op.execute(
+        "INSERT INTO buy_order_stats_watermark (id, counted_at) "
+        "VALUES (1, NULL)"
+    )
+
+
+def downgrade():
+    op.drop_table("buy_order_stats_watermark")
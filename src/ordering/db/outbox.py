@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import logging
+from abc import abstractmethod
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from enum import Enum
+from typing import Dict, Iterable, List, Optional, Protocol, Type
+
+import sqlalchemy as sa
+from injector import inject
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from application.bus import Event, EventBus
+from application.db import Base, Transaction
+from application.workers import BatchWorkers
+
+log = logging.getLogger(__name__)
+
+
+class DeliveryStatus(str, Enum):
+    PENDING = "pending"
+    DEAD = "dead"
+
+
+class DBOutboxEvent(Base):
+    __tablename__ = "event_outbox"
+    __table_args__ = (
+        sa.Index(
+            "ix_event_outbox_due", "next_attempt_at",
+            postgresql_where=sa.text("status = 'pending'"),
+        ),
+    )
+
+    id: int = sa.Column(sa.BigInteger, primary_key=True)
+    event_type: str = sa.Column(sa.String(255), nullable=False)
+    payload: str = sa.Column(sa.Text, nullable=False)
+    created_at: datetime = sa.Column(
+        sa.DateTime(timezone=True), nullable=False, server_default=func.now(),
+    )
+    status: DeliveryStatus = sa.Column(
+        sa.Enum(
+            DeliveryStatus,
+            native_enum=False,
+            length=16,
+            values_callable=lambda statuses: [s.value for s in statuses],
+        ),
+        nullable=False,
+        default=DeliveryStatus.PENDING,
+        server_default=DeliveryStatus.PENDING.value,
+    )
+    attempts: int = sa.Column(
+        sa.Integer, nullable=False, default=0, server_default="0",
+    )
+    next_attempt_at: datetime = sa.Column(
+        sa.DateTime(timezone=True), nullable=False, server_default=func.now(),
+    )
+    last_error: Optional[str] = sa.Column(sa.Text)
+
+
+class EventPublisher(Protocol):
+    @abstractmethod
+    def stage(self, session: Session, events: List[Event]) -> None:
+        """
+        Usage: Called within the transaction which produced the events.
+        """
+        ...
+
+    @abstractmethod
+    def publish(self, events: List[Event]) -> None:
+        """
+        Usage: Called once the transaction which produced events committed.
+        """
+        ...
+
+
+@inject
+class AfterCommitPublisher(EventPublisher):
+    def __init__(self, bus: EventBus) -> None:
+        self._bus = bus
+
+    def stage(self, session: Session, events: List[Event]) -> None:
+        pass
+
+    def publish(self, events: List[Event]) -> None:
+        for event in events:
+            self._bus.emit(event)
+
+
+class OutboxPublisher(EventPublisher):
+    def stage(self, session: Session, events: List[Event]) -> None:
+        session.add_all(
+            DBOutboxEvent(
+                event_type=_type_name(type(event)), payload=event.json(),
+            )
+            for event in events
+        )
+
+    def publish(self, events: List[Event]) -> None:
+        pass
+
+
+@dataclass(frozen=True)
+class OutboxLag:
+    pending: int
+    oldest: timedelta
+    dead: int = 0
+
+
+class OutboxRelay:
+    """
+    Delivers outbox events to EventBus listeners at least once. Workers
+    claim batches of due events with FOR UPDATE SKIP LOCKED, so they never
+    share events, call listeners directly, bypassing event lanes, and
+    delete delivered events in the claiming transaction once their
+    listeners returned. A failed delivery is retried after a backoff
+    doubling with every attempt; after `max_attempts` the event is kept as
+    a dead letter. Only `event_types` are relayed.
+    """
+
+    def __init__(
+            self,
+            transaction: Transaction,
+            bus: EventBus,
+            event_types: Iterable[Type[Event]],
+            batch_size: int = 100,
+            every: timedelta = timedelta(seconds=1),
+            workers: int = 1,
+            max_attempts: int = 10,
+            retry_backoff: timedelta = timedelta(seconds=1),
+    ) -> None:
+        self._transaction = transaction
+        self._bus = bus
+        self._event_types: Dict[str, Type[Event]] = {
+            _type_name(event_cls): event_cls for event_cls in event_types
+        }
+        self._batch_size = batch_size
+        self._max_attempts = max_attempts
+        self._retry_backoff = retry_backoff
+        self._batches = BatchWorkers(
+            self.relay, batch_size, every, workers, name="outbox-relay",
+        )
+
+    def relay(self) -> int:
+        """
+        Returns the number of claimed events, delivered or not.
+        """
+        with self._transaction() as session:
+            claimed = (
+                session.query(DBOutboxEvent)
+                .filter(
+                    DBOutboxEvent.status == DeliveryStatus.PENDING,
+                    DBOutboxEvent.next_attempt_at <= func.now(),
+                )
+                .order_by(DBOutboxEvent.id)
+                .limit(self._batch_size)
+                .with_for_update(skip_locked=True)
+                .all()
+            )
+            for entry in claimed:
+                try:
+                    self._bus.deliver(self._load(entry))
+                except Exception as error:
+                    log.exception("Could not deliver outbox event %s", entry.id)
+                    self._failed(entry, error)
+                else:
+                    session.delete(entry)
+        return len(claimed)
+
+    def drain(self) -> int:
+        return self._batches.drain()
+
+    def lag(self) -> OutboxLag:
+        is_pending = DBOutboxEvent.status == DeliveryStatus.PENDING
+        oldest_pending = func.min(DBOutboxEvent.created_at).filter(is_pending)
+        with self._transaction() as session:
+            pending, oldest, dead = session.query(
+                func.count(DBOutboxEvent.id).filter(is_pending),
+                func.now() - oldest_pending,
+                func.count(DBOutboxEvent.id).filter(~is_pending),
+            ).one()
+        return OutboxLag(
+            pending=pending, oldest=oldest or timedelta(0), dead=dead,
+        )
+
+    def start(self) -> None:
+        self._batches.start()
+
+    def join(self) -> None:
+        self._batches.join()
+
+    def stop(self) -> None:
+        self._batches.stop()
+
+    def _load(self, entry: DBOutboxEvent) -> Event:
+        event_cls = self._event_types.get(entry.event_type)
+        if event_cls is None:
+            raise LookupError(f"Unknown event type {entry.event_type}")
+        return event_cls.parse_raw(entry.payload)
+
+    def _failed(self, entry: DBOutboxEvent, error: Exception) -> None:
+        entry.attempts += 1
+        entry.last_error = repr(error)
+        if entry.attempts >= self._max_attempts:
+            entry.status = DeliveryStatus.DEAD
+            log.error(
+                "Outbox event %s dead after %d attempts",
+                entry.id,
+                entry.attempts,
+            )
+        else:
+            backoff = self._retry_backoff * 2 ** (entry.attempts - 1)
+            entry.next_attempt_at = func.now() + backoff
+
+
+def _type_name(event_cls: Type[Event]) -> str:
+    return f"{event_cls.__module__}:{event_cls.__qualname__}"
@@ -0,0 +1,48 @@
+from datetime import datetime
+from enum import Enum
+from typing import Optional
+from uuid import UUID
+
+import sqlalchemy as sa
+import sqlalchemy_utils as sa_utils
+from sqlalchemy import func
+
+from application.db import Base
+
+
+class CommandStatus(str, Enum):
+    PENDING = "pending"
+    CREATED = "created"
+    REJECTED = "rejected"
+
+
+class DBQueuedCommand(Base):
+    __tablename__ = "command_queue"
+    __table_args__ = (
+        sa.Index(
+            "ix_command_queue_pending", "id",
+            postgresql_where=sa.text("status = 'pending'"),
+        ),
+    )
+
+    id: int = sa.Column(sa.BigInteger, primary_key=True)
+    request_id: UUID = sa.Column(
+        sa_utils.UUIDType, unique=True, nullable=False,
+    )
+    payload: str = sa.Column(sa.Text, nullable=False)
+    status: CommandStatus = sa.Column(
+        sa.Enum(
+            CommandStatus,
+            native_enum=False,
+            length=16,
+            values_callable=lambda statuses: [s.value for s in statuses],
+        ),
+        nullable=False,
+        default=CommandStatus.PENDING,
+    )
+    order_id: Optional[UUID] = sa.Column(sa_utils.UUIDType)
+    detail: Optional[str] = sa.Column(sa.Text)
+    enqueued_at: datetime = sa.Column(
+        sa.DateTime(timezone=True), nullable=False, server_default=func.now(),
+    )
+    processed_at: Optional[datetime] = sa.Column(sa.DateTime(timezone=True))
@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from threading import Event, Thread
+from typing import Optional
+
+import sqlalchemy as sa
+from injector import inject
+from sqlalchemy import delete, func, insert, select, update
+
+from application.db import Base, Transaction
+from currency import Currency, FiatUnits, Satoshi
+
+from .buy_order import DBBuyOrder
+from .types import FiatUnitsColumn, SatoshiColumn
+
+log = logging.getLogger(__name__)
+
+DAY = timedelta(days=1)
+# First key of advisory locks taken per recounted day.
+STATS_LOCK = 0x5354
+
+
+class DBOrderStats(Base):
+    """
+    Hourly totals of buy orders per currency, recomputed from stored orders
+    by StatsRebuilder rather than updated by order writers, so admitting
+    orders never contends on a statistics row.
+    """
+
+    __tablename__ = "buy_order_stats"
+
+    bucket: datetime = sa.Column(sa.DateTime, primary_key=True)
+    currency: Currency = sa.Column(
+        sa.Enum(Currency, native_enum=False), primary_key=True,
+    )
+    orders: int = sa.Column(sa.BigInteger, nullable=False)
+    bought: Satoshi = sa.Column(SatoshiColumn, nullable=False)
+    paid: FiatUnits = sa.Column(FiatUnitsColumn, nullable=False)
+
+
+class DBStatsWatermark(Base):
+    """Single row with the time statistics were last recounted at."""
+
+    __tablename__ = "buy_order_stats_watermark"
+
+    id: int = sa.Column(sa.Integer, primary_key=True)
+    counted_at: Optional[datetime] = sa.Column(sa.DateTime)
+
+
+@inject
+class StatsRebuilder:
+    """
+    Recompute statistics from stored orders, one day per transaction with
+    days spread over parallel workers. Each day is recounted from a single
+    snapshot of buy_orders without locking it; an advisory lock per day
+    only keeps two recounts of the same day apart. Once done, the watermark
+    moves to when the recount started.
+    """
+
+    def __init__(self, transaction: Transaction) -> None:
+        self._transaction = transaction
+
+    def rebuild(self, workers: int = 4) -> int:
+        started = datetime.utcnow()
+        day = func.date_trunc("day", DBBuyOrder.when_created)
+        with self._transaction() as session:
+            first, last = session.query(func.min(day), func.max(day)).one()
+            outside = (
+                sa.true() if first is None
+                else sa.or_(
+                    DBOrderStats.bucket < first,
+                    DBOrderStats.bucket >= last + DAY,
+                )
+            )
+            session.execute(delete(DBOrderStats).where(outside))
+        if first is None:
+            self._counted(started)
+            return 0
+
+        days = [first + n * DAY for n in range((last - first).days + 1)]
+        with ThreadPoolExecutor(workers, thread_name_prefix="stats") as pool:
+            list(pool.map(self._rebuild_day, days))
+        self._counted(started)
+        return len(days)
+
+    def roll_up(self, since: datetime) -> int:
+        """
+        Recomputes hours from the one `since` falls into up to now and
+        returns the number of recounted days.
+        """
+        started = datetime.utcnow()
+        start = since.replace(minute=0, second=0, microsecond=0)
+        day = start.replace(hour=0)
+        today = started.replace(hour=0, minute=0, second=0, microsecond=0)
+        recounted = 0
+        while day <= today:
+            self._recount(max(start, day), day + DAY)
+            day += DAY
+            recounted += 1
+        self._counted(started)
+        return recounted
+
+    def _rebuild_day(self, day: datetime) -> None:
+        self._recount(day, day + DAY)
+
+    def _recount(self, start: datetime, end: datetime) -> None:
+        with self._transaction() as session:
+            day_lock = func.pg_advisory_xact_lock(STATS_LOCK, start.toordinal())
+            session.execute(select(day_lock))
+            session.execute(
+                delete(DBOrderStats).where(
+                    DBOrderStats.bucket >= start, DBOrderStats.bucket < end,
+                )
+            )
+            session.execute(self._count(start, end))
+
+    def _counted(self, started: datetime) -> None:
+        # GREATEST skips NULL and keeps a later concurrent recount's time.
+        with self._transaction() as session:
+            session.execute(
+                update(DBStatsWatermark).values(
+                    counted_at=func.greatest(
+                        DBStatsWatermark.counted_at, started,
+                    )
+                )
+            )
+
+    @staticmethod
+    def _count(start: datetime, end: datetime) -> sa.sql.Insert:
+        hour = func.date_trunc("hour", DBBuyOrder.when_created)
+        return insert(DBOrderStats).from_select(
+            ["bucket", "currency", "orders", "bought", "paid"],
+            select(
+                hour,
+                DBBuyOrder._currency,
+                func.count(),
+                func.sum(DBBuyOrder.bought),
+                func.sum(DBBuyOrder.paid),
+            )
+            .where(
+                DBBuyOrder.when_created >= start,
+                DBBuyOrder.when_created < end,
+            )
+            .group_by(hour, DBBuyOrder._currency),
+        )
+
+
+class StatsRollup:
+    """
+    Periodically recounts the statistics of hours within `window` of now,
+    so they follow new orders, including ones committed late, with a delay
+    of at most `every`.
+    """
+
+    def __init__(
+            self,
+            rebuilder: StatsRebuilder,
+            window: timedelta = timedelta(hours=1),
+            every: timedelta = timedelta(seconds=10),
+    ) -> None:
+        self._rebuilder = rebuilder
+        self._window = window
+        self._interval = every.total_seconds()
+        self._stopped = Event()
+        self._thread: Optional[Thread] = None
+
+    def start(self) -> None:
+        self._stopped.clear()
+        self._thread = Thread(
+            target=self._run, name="stats-rollup", daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def roll_up(self) -> None:
+        try:
+            self._rebuilder.roll_up(datetime.utcnow() - self._window)
+        except Exception:
+            log.exception("Could not roll up order statistics")
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self._interval):
+            self.roll_up()
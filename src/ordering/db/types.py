@@ -1,4 +1,5 @@
 import decimal
+from datetime import datetime, timezone
 from decimal import Decimal
 
 import sqlalchemy as sa
@@ -9,24 +10,30 @@ class PreciseNumber(sa.types.TypeDecorator):
     python_type = Decimal
     cache_ok = True
 
-    def __init__(self, precision, rounding=None) -> None:
-        self._multiplier = 10 ** precision
-        self._exp = Decimal("1." + "0" * precision)
+    def __init__(self, precision, rounding=decimal.ROUND_HALF_EVEN) -> None:
+        self._precision = precision
         self._rounding = rounding
         super().__init__()
 
-    def _quantize(self, value: Decimal) -> Decimal:
-        return value.quantize(self._exp, rounding=self._rounding)
-
     def process_bind_param(self, value, dialect):
-        return int(self._quantize(value) * self._multiplier)
+        scaled = Decimal(value).scaleb(self._precision)
+        return int(scaled.to_integral_value(self._rounding))
 
     def process_result_value(self, value, dialect):
         if value is None:
             return None
-        as_decimal = Decimal(value) / self._multiplier
-        return self._quantize(as_decimal)
+        return Decimal(value).scaleb(-self._precision)
 
 
 FiatAmountColumn = PreciseNumber(4)
-BtcAmountColumn = PreciseNumber(8, decimal.ROUND_UP)
+
+# Amounts the ordering domain computes with are kept as plain integers.
+SatoshiColumn = sa.BigInteger
+FiatUnitsColumn = sa.BigInteger
+
+
+def as_utc(moment: datetime) -> datetime:
+    """`moment` as naive UTC, the way order timestamps are stored."""
+    if moment.tzinfo is None:
+        return moment
+    return moment.astimezone(timezone.utc).replace(tzinfo=None)
@@ -1,13 +1,30 @@
 from dataclasses import dataclass
 from decimal import Decimal
+from typing import Text
 from uuid import UUID
 
+from currency import Satoshi, from_satoshi
+
 
 @dataclass(frozen=True)
 class BalanceLimitExceeded(Exception):
-    limit: Decimal
+    limit: Satoshi
+
+    @property
+    def limit_btc(self) -> Decimal:
+        return from_satoshi(self.limit).normalize()
 
 
 @dataclass(frozen=True)
 class OrderAlreadyExists(Exception):
     order_id: UUID
+
+
+@dataclass(frozen=True)
+class BudgetLeaseExpired(Exception):
+    lease_id: int
+
+
+@dataclass(frozen=True)
+class InvalidCursor(Exception):
+    cursor: Text
@@ -1,10 +1,18 @@
+from typing import Hashable
 from uuid import UUID
 
 from pydantic import condecimal
 
 from application.bus import Event
+from currency import Currency
 
 
 class BuyOrderCreated(Event):
     order_id: UUID
     bitcoins: condecimal(decimal_places=8)
+    paid: condecimal(decimal_places=4)
+    currency: Currency
+
+    @property
+    def ordering_key(self) -> Hashable:
+        return self.order_id
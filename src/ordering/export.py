@@ -0,0 +1,50 @@
+import csv
+from enum import Enum
+from io import StringIO
+from typing import Iterable, Iterator, List, Text
+
+from .queries import BuyOrder
+
+FIELDS = ("id", "request_id", "bitcoins", "bought_for", "currency")
+
+
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+    @property
+    def media_type(self) -> Text:
+        if self is ExportFormat.CSV:
+            return "text/csv"
+        return "application/x-ndjson"
+
+
+def encode_orders(
+        chunks: Iterable[List[BuyOrder]], as_format: ExportFormat,
+) -> Iterator[Text]:
+    """Encode chunks of orders lazily, yielding one piece of text per chunk."""
+    if as_format is ExportFormat.CSV:
+        yield _to_csv([FIELDS])
+        for orders in chunks:
+            yield _to_csv(
+                (
+                    order.id,
+                    order.request_id,
+                    f"{order.bitcoins:f}",
+                    f"{order.bought_for:f}",
+                    order.currency.value,
+                )
+                for order in orders
+            )
+    else:
+        for orders in chunks:
+            yield "".join(f"{order.json()}\n" for order in orders)
+
+
+def _to_csv(rows: Iterable[Iterable]) -> Text:
+    buffer = StringIO()
+    csv.writer(buffer, lineterminator="\n").writerows(rows)
+    return buffer.getvalue()
+
+
+__all__ = ["encode_orders", "ExportFormat"]
@@ -1,14 +1,36 @@
 from __future__ import annotations
 
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from functools import partial
+from threading import Lock
+from time import monotonic
+from typing import Callable, Iterator, List, Optional, Sequence, Text, Tuple
 from uuid import UUID
 
+import sqlalchemy as sa
 from injector import inject
 from pydantic import BaseModel, condecimal
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session
 
-from currency import Currency
+from application.db import ReadSessions
+from currency import (
+    Currency,
+    FiatUnits,
+    Satoshi,
+    bulk_from_fiat_units,
+    bulk_from_satoshi,
+    from_fiat_units,
+    from_satoshi,
+)
 
 from .db.buy_order import DBBuyOrder
+from .db.queue import CommandStatus, DBQueuedCommand
+from .db.types import as_utc
+from .errors import InvalidCursor
+from .events import BuyOrderCreated
 
 
 class BuyOrder(BaseModel):
@@ -23,32 +45,286 @@ class BuyOrder(BaseModel):
         return cls(
             id=entry.id,
             request_id=entry.request_id,
-            bitcoins=entry.bought,
-            bought_for=entry.paid,
+            bitcoins=from_satoshi(entry.bought),
+            bought_for=from_fiat_units(entry.paid),
             currency=entry.exchange_rate.currency,
         )
 
+    @classmethod
+    def from_rows(
+            cls,
+            rows: Sequence[Tuple[UUID, UUID, Satoshi, FiatUnits, Currency]],
+    ) -> List[BuyOrder]:
+        """
+        Orders from (id, request_id, bought, paid, currency) rows. Amounts
+        are scaled a column at a time; columns already come typed from the
+        database and scale exactly, so validation is skipped too.
+        """
+        if not rows:
+            return []
+        ids, request_ids, bought, paid, currencies = zip(*rows)
+        return [
+            cls.construct(
+                id=order_id,
+                request_id=request_id,
+                bitcoins=bitcoins,
+                bought_for=bought_for,
+                currency=currency,
+            )
+            for order_id, request_id, bitcoins, bought_for, currency in zip(
+                ids,
+                request_ids,
+                bulk_from_satoshi(bought),
+                bulk_from_fiat_units(paid),
+                currencies,
+            )
+        ]
+
+
+class OrderPage(BaseModel):
+    orders: List[BuyOrder]
+    next_cursor: Optional[Text] = None
+
+
+@dataclass(frozen=True)
+class OrderCursor:
+    """Position after the last listed order in (when_created, id) order."""
+
+    when_created: datetime
+    db_id: int
+
+    def encode(self) -> Text:
+        position = f"{self.when_created.isoformat()}|{self.db_id}"
+        return urlsafe_b64encode(position.encode()).decode()
+
+    @classmethod
+    def decode(cls, cursor: Text) -> OrderCursor:
+        try:
+            position = urlsafe_b64decode(cursor.encode()).decode()
+            when_created, db_id = position.split("|")
+            return cls(datetime.fromisoformat(when_created), int(db_id))
+        except ValueError as error:
+            raise InvalidCursor(cursor) from error
+
+
+class OrderStatus(BaseModel):
+    request_id: UUID
+    status: CommandStatus
+    order_id: Optional[UUID] = None
+    detail: Optional[str] = None
+
+    @classmethod
+    def from_db(cls, entry: DBQueuedCommand) -> OrderStatus:
+        return cls(
+            request_id=entry.request_id,
+            status=entry.status,
+            order_id=entry.order_id,
+            detail=entry.detail,
+        )
+
+
+class BuyOrderCache:
+    """
+    Bounded LRU of buy orders by id. Orders never change once created, so a
+    found order stays until evicted and is never replaced by a miss loaded
+    concurrently; a missing one is remembered only for `negative_ttl`. A
+    size of 0 disables caching.
+    """
+
+    def __init__(self, size: int, negative_ttl: timedelta) -> None:
+        self._size = size
+        self._negative_ttl = negative_ttl.total_seconds()
+        self._entries: OrderedDict[
+            UUID, Tuple[float, Optional[BuyOrder]]
+        ] = OrderedDict()
+        self._lock = Lock()
+
+    def get(
+            self,
+            order_id: UUID,
+            load: Callable[[UUID], Optional[BuyOrder]],
+            skip_misses: bool = False,
+    ) -> Optional[BuyOrder]:
+        """
+        With `skip_misses` a remembered missing order is loaded again.
+        """
+        with self._lock:
+            entry = self._entries.get(order_id)
+            if (
+                    entry is not None
+                    and monotonic() < entry[0]
+                    and not (skip_misses and entry[1] is None)
+            ):
+                self._entries.move_to_end(order_id)
+                return entry[1]
+
+        order = load(order_id)
+        self.put(order_id, order)
+        return order
+
+    def put(self, order_id: UUID, order: Optional[BuyOrder]) -> None:
+        if not self._size:
+            return
+
+        expires_at = (
+            monotonic() + self._negative_ttl if order is None else float("inf")
+        )
+        with self._lock:
+            cached = self._entries.get(order_id)
+            if order is None and cached is not None and cached[1] is not None:
+                return
+            self._entries[order_id] = (expires_at, order)
+            self._entries.move_to_end(order_id)
+            while len(self._entries) > self._size:
+                self._entries.popitem(last=False)
+
+    def warm(self, event: BuyOrderCreated) -> None:
+        self.put(event.order_id, BuyOrder(
+            id=event.order_id,
+            request_id=event.command_id,
+            bitcoins=event.bitcoins,
+            bought_for=event.paid,
+            currency=event.currency,
+        ))
+
 
 @inject
 class BuyOrdersQueries:
-    def __init__(self, session_maker: sessionmaker) -> None:
-        self._session_maker = session_maker
-
-    def get_order_id(self, request_id: UUID) -> UUID | None:
-        query = (
-            self._session_maker()
-            .query(DBBuyOrder.id)
-            .filter_by(request_id=request_id)
+    def __init__(self, sessions: ReadSessions, cache: BuyOrderCache) -> None:
+        self._sessions = sessions
+        self._cache = cache
+
+    def get_order_id(
+            self, request_id: UUID, consistent_with: Optional[Text] = None,
+    ) -> UUID | None:
+        with self._sessions(consistent_with) as session:
+            return _order_id(session, request_id)
+
+    def get_order(
+            self, order_id: UUID, consistent_with: Optional[Text] = None,
+    ) -> BuyOrder | None:
+        """
+        A consistency token bypasses remembered misses, which may predate
+        the write the token stands for.
+        """
+        load = partial(self._load_order, consistent_with=consistent_with)
+        return self._cache.get(
+            order_id, load, skip_misses=consistent_with is not None,
         )
-        return (result := query.one_or_none()) and result[0]
 
-    def get_order(self, order_id: UUID) -> BuyOrder | None:
-        session = self._session_maker()
+    def _load_order(
+            self, order_id: UUID, consistent_with: Optional[Text] = None,
+    ) -> BuyOrder | None:
+        session = self._sessions(consistent_with)
         query = session.query(DBBuyOrder).filter_by(id=order_id)
         entry = query.one_or_none()
         session.expunge_all()
         session.rollback()
         return entry and BuyOrder.from_db(entry)
 
+    def list_orders(
+            self,
+            limit: int,
+            after: Optional[Text] = None,
+            currency: Optional[Currency] = None,
+            created_from: Optional[datetime] = None,
+            created_to: Optional[datetime] = None,
+    ) -> OrderPage:
+        """
+        Page through orders oldest first. Pages continue from the cursor by
+        seeking the (when_created, id) index, so deep pages cost as much as
+        the first one.
+        """
+        position = sa.tuple_(DBBuyOrder.when_created, DBBuyOrder._db_id)
+        with self._sessions() as session:
+            query = session.query(
+                DBBuyOrder.when_created, DBBuyOrder._db_id, *_ORDER_COLUMNS,
+            )
+            if after is not None:
+                cursor = OrderCursor.decode(after)
+                query = query.filter(
+                    position > sa.tuple_(cursor.when_created, cursor.db_id)
+                )
+            if currency is not None:
+                query = query.filter(DBBuyOrder._currency == currency)
+            if created_from is not None:
+                query = query.filter(
+                    DBBuyOrder.when_created >= as_utc(created_from)
+                )
+            if created_to is not None:
+                query = query.filter(
+                    DBBuyOrder.when_created < as_utc(created_to)
+                )
+            rows = (
+                query.order_by(DBBuyOrder.when_created, DBBuyOrder._db_id)
+                .limit(limit + 1)
+                .all()
+            )
+
+        page = rows[:limit]
+        next_cursor = None
+        if len(rows) > limit:
+            when_created, db_id, *_ = page[-1]
+            next_cursor = OrderCursor(when_created, db_id).encode()
+        return OrderPage(
+            orders=BuyOrder.from_rows([row[2:] for row in page]),
+            next_cursor=next_cursor,
+        )
+
+    def export_orders(
+            self, chunk_size: int = 1000,
+    ) -> Iterator[List[BuyOrder]]:
+        """
+        Stream all orders in chunks from a server-side cursor, so only one
+        chunk of rows is held in memory however large the table is.
+        """
+        with self._sessions() as session:
+            result = session.execute(
+                sa.select(*_ORDER_COLUMNS)
+                .order_by(DBBuyOrder._db_id)
+                .execution_options(stream_results=True)
+            )
+            for rows in result.partitions(chunk_size):
+                yield BuyOrder.from_rows(rows)
+
+    def get_order_status(
+            self, request_id: UUID, consistent_with: Optional[Text] = None,
+    ) -> OrderStatus | None:
+        with self._sessions(consistent_with) as session:
+            query = (
+                session.query(DBQueuedCommand).filter_by(request_id=request_id)
+            )
+            if (entry := query.one_or_none()) is not None:
+                return OrderStatus.from_db(entry)
+            order_id = _order_id(session, request_id)
+
+        return order_id and OrderStatus(
+            request_id=request_id,
+            status=CommandStatus.CREATED,
+            order_id=order_id,
+        )
+
+
+def _order_id(session: Session, request_id: UUID) -> UUID | None:
+    query = session.query(DBBuyOrder.id).filter_by(request_id=request_id)
+    return (result := query.one_or_none()) and result[0]
+
+
+_ORDER_COLUMNS = (
+    DBBuyOrder.id,
+    DBBuyOrder.request_id,
+    DBBuyOrder.bought,
+    DBBuyOrder.paid,
+    DBBuyOrder._currency,
+)
+
 
-__all__ = ["BuyOrder", "BuyOrdersQueries"]
+__all__ = [
+    "BuyOrder",
+    "BuyOrderCache",
+    "BuyOrdersQueries",
+    "CommandStatus",
+    "OrderCursor",
+    "OrderPage",
+    "OrderStatus",
+]
@@ -0,0 +1,106 @@
+from __future__ import annotations
+
+import logging
+from datetime import timedelta
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert
+
+from application.db import Transaction
+from application.workers import BatchWorkers
+
+from .commands import CreateBuyOrder
+from .db.queue import CommandStatus, DBQueuedCommand
+from .errors import BalanceLimitExceeded, OrderAlreadyExists
+from .service import Outcome, Service
+
+log = logging.getLogger(__name__)
+
+
+class CommandQueue:
+    """
+    Durable queue of CreateBuyOrder commands accepted for later processing.
+    Workers claim pending commands with FOR UPDATE SKIP LOCKED and admit
+    each claimed batch with a single Service call.
+    """
+
+    def __init__(
+            self,
+            transaction: Transaction,
+            ordering: Service,
+            batch_size: int = 100,
+            every: timedelta = timedelta(seconds=1),
+            workers: int = 1,
+    ) -> None:
+        self._transaction = transaction
+        self._ordering = ordering
+        self._batch_size = batch_size
+        self._batches = BatchWorkers(
+            self.process, batch_size, every, workers, name="command-queue",
+        )
+
+    def enqueue(self, command: CreateBuyOrder) -> None:
+        """
+        Handler[CreateBuyOrder] accepting the command for later processing.
+        Repeated commands are queued once.
+        """
+        log.info(command)
+        with self._transaction() as session:
+            session.execute(
+                insert(DBQueuedCommand)
+                .values(
+                    request_id=command.id,
+                    payload=command.json(),
+                    status=CommandStatus.PENDING,
+                )
+                .on_conflict_do_nothing(
+                    index_elements=[DBQueuedCommand.request_id],
+                )
+            )
+
+    def process(self) -> int:
+        with self._transaction() as session:
+            claimed = (
+                session.query(DBQueuedCommand)
+                .filter_by(status=CommandStatus.PENDING)
+                .order_by(DBQueuedCommand.id)
+                .limit(self._batch_size)
+                .with_for_update(skip_locked=True)
+                .all()
+            )
+            if not claimed:
+                return 0
+
+            outcomes = self._ordering.create_buy_order_batch([
+                CreateBuyOrder.parse_raw(entry.payload) for entry in claimed
+            ])
+            for entry, outcome in zip(claimed, outcomes):
+                self._complete(entry, outcome)
+        return len(claimed)
+
+    def drain(self) -> int:
+        return self._batches.drain()
+
+    def start(self) -> None:
+        self._batches.start()
+
+    def join(self) -> None:
+        self._batches.join()
+
+    def stop(self) -> None:
+        self._batches.stop()
+
+    @staticmethod
+    def _complete(entry: DBQueuedCommand, outcome: Outcome) -> None:
+        entry.processed_at = func.now()
+        if isinstance(outcome, BalanceLimitExceeded):
+            entry.status = CommandStatus.REJECTED
+            entry.detail = (
+                f"Exceeded {outcome.limit_btc:f}BTC ordering limit"
+            )
+        elif isinstance(outcome, OrderAlreadyExists):
+            entry.status = CommandStatus.CREATED
+            entry.order_id = outcome.order_id
+        else:
+            entry.status = CommandStatus.CREATED
+            entry.order_id = outcome
@@ -1,50 +1,143 @@
 import logging
-from decimal import Decimal
+from typing import Dict, List, Sequence, Union
+from uuid import UUID
 
 from injector import inject
 
-from currency import BTC, ExchangeRateService
+from application.tracing import Tracer
+from currency import (
+    BTCRate,
+    ExchangeRateService,
+    Satoshi,
+    from_satoshi,
+    satoshis_for,
+    to_fiat_units,
+)
 
-from .commands import CreateBuyOrder
+from .commands import CreateBuyOrder, CreateBuyOrders
 from .db import Repository
 from .errors import BalanceLimitExceeded, OrderAlreadyExists
 from .events import BuyOrderCreated
 
 log = logging.getLogger(__name__)
 
+Outcome = Union[UUID, OrderAlreadyExists, BalanceLimitExceeded]
+
 
 @inject
 class Service:
     def __init__(
             self,
-            ordered_btc_limit: Decimal,
+            ordered_btc_limit: Satoshi,
             repository: Repository,
             exchange_rates: ExchangeRateService,
+            tracer: Tracer,
     ) -> None:
         self._bought_btc_limit = ordered_btc_limit
         self._repository = repository
-        self._get_btc_rate = exchange_rates.get_bitcoin_rate
+        self._get_btc_rates = exchange_rates.get_bitcoin_rates
+        self._tracer = tracer
 
-    def create_buy_order(self, command: CreateBuyOrder) -> None:
-        log.info(command)
+    def create_buy_order(self, command: CreateBuyOrder) -> UUID:
+        outcome, = self.create_buy_order_batch([command])
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
 
-        if (order_id := self._repository.get_order_id(command.id)) is not None:
-            raise OrderAlreadyExists(order_id)
+    def create_buy_orders(self, command: CreateBuyOrders) -> List[Outcome]:
+        return self.create_buy_order_batch(
+            command.orders, atomic=command.atomic,
+        )
 
-        rate = self._get_btc_rate(command.currency)
-        btc = BTC(command.amount / rate.price)
+    def create_buy_order_batch(
+            self, batch: Sequence[CreateBuyOrder], atomic: bool = False,
+    ) -> List[Outcome]:
+        with self._tracer.span(
+                "Service.create_buy_order_batch",
+                orders=len(batch),
+                atomic=atomic,
+        ):
+            return self._create_batch(batch, atomic)
 
-        with self._repository.lock() as current_balance:
-            if current_balance + btc > self._bought_btc_limit:
-                raise BalanceLimitExceeded(self._bought_btc_limit)
+    def _create_batch(
+            self, batch: Sequence[CreateBuyOrder], atomic: bool,
+    ) -> List[Outcome]:
+        for command in batch:
+            log.info(command)
 
-            order = self._repository.create(
-                command.id, command.amount, btc, rate,
-            )
-            created = BuyOrderCreated(
-                command_id=command.id,
-                order_id=order.id,
-                bitcoins=btc,
+        rates = self._get_btc_rates(command.currency for command in batch)
+        satoshis = [
+            satoshis_for(
+                to_fiat_units(command.amount),
+                to_fiat_units(rates[command.currency].price),
             )
-            log.info(created)
-            self._repository.emit(created)
+            for command in batch
+        ]
+
+        outcomes: List[Outcome] = []
+        expected = Satoshi(sum(satoshis))
+        with self._repository.lock(expected) as current_balance:
+            created: Dict[UUID, UUID] = {}
+            for command, bought in zip(batch, satoshis):
+                if command.id in created:
+                    outcomes.append(OrderAlreadyExists(created[command.id]))
+                    continue
+
+                if current_balance + bought > self._bought_btc_limit:
+                    outcomes.append(
+                        BalanceLimitExceeded(self._bought_btc_limit)
+                    )
+                    continue
+
+                try:
+                    order_id = self._create(
+                        command, bought, rates[command.currency],
+                    )
+                except (OrderAlreadyExists, BalanceLimitExceeded) as rejected:
+                    outcomes.append(rejected)
+                    continue
+
+                current_balance += bought
+                created[command.id] = order_id
+                outcomes.append(order_id)
+
+            outcomes = self._replays_over_limit(batch, outcomes)
+            if atomic and any(
+                    isinstance(outcome, BalanceLimitExceeded)
+                    for outcome in outcomes
+            ):
+                raise BalanceLimitExceeded(self._bought_btc_limit)
+
+        return outcomes
+
+    def _replays_over_limit(
+            self, batch: Sequence[CreateBuyOrder], outcomes: List[Outcome],
+    ) -> List[Outcome]:
+        rejected = {
+            command.id
+            for command, outcome in zip(batch, outcomes)
+            if isinstance(outcome, BalanceLimitExceeded)
+        }
+        existing = self._repository.get_order_ids(rejected)
+        return [
+            OrderAlreadyExists(existing[command.id])
+            if command.id in existing else outcome
+            for command, outcome in zip(batch, outcomes)
+        ]
+
+    def _create(
+            self, command: CreateBuyOrder, bought: Satoshi, rate: BTCRate,
+    ) -> UUID:
+        order = self._repository.create(
+            command.id, to_fiat_units(command.amount), bought, rate,
+        )
+        event = BuyOrderCreated(
+            command_id=command.id,
+            order_id=order.id,
+            bitcoins=from_satoshi(bought),
+            paid=command.amount,
+            currency=command.currency,
+        )
+        log.info(event)
+        self._repository.emit(event)
+        return order.id
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+from datetime import datetime
+from decimal import Decimal
+from enum import Enum
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel, condecimal
+from sqlalchemy import func
+
+from application.db import ReadSessions
+from currency import Currency, from_fiat_units, from_satoshi
+
+from .db.balance import DBBuyOrdersBalance
+from .db.stats import DBOrderStats, DBStatsWatermark
+from .db.types import as_utc
+
+
+class BucketSize(str, Enum):
+    HOUR = "hour"
+    DAY = "day"
+
+
+class StatsBucket(BaseModel):
+    start: datetime
+    currency: Currency
+    orders: int
+    bitcoins: condecimal(decimal_places=8)
+    paid: condecimal(decimal_places=4)
+
+
+class CurrencyTotals(BaseModel):
+    currency: Currency
+    orders: int = 0
+    bitcoins: condecimal(decimal_places=8) = Decimal(0)
+    paid: condecimal(decimal_places=4) = Decimal(0)
+
+
+class OrderStats(BaseModel):
+    as_of: Optional[datetime]
+    limit: condecimal(decimal_places=8)
+    booked: condecimal(decimal_places=8)
+    headroom: condecimal(decimal_places=8)
+    totals: List[CurrencyTotals]
+    buckets: List[StatsBucket]
+
+
+class StatsQueries:
+    """
+    Totals read from precomputed hourly statistics instead of summing
+    buy_orders. Daily buckets are rolled up from the hourly ones. `as_of`
+    tells when the statistics were last recounted, so orders created
+    since then may be missing; it is None until the first recount.
+    """
+
+    def __init__(self, sessions: ReadSessions, limit: Decimal) -> None:
+        self._sessions = sessions
+        self._limit = limit
+
+    def get_stats(
+            self,
+            bucket_size: BucketSize = BucketSize.DAY,
+            currency: Optional[Currency] = None,
+            created_from: Optional[datetime] = None,
+            created_to: Optional[datetime] = None,
+    ) -> OrderStats:
+        start = func.date_trunc(bucket_size.value, DBOrderStats.bucket)
+        with self._sessions() as session:
+            booked, = session.query(DBBuyOrdersBalance.bought).one()
+            as_of, = session.query(DBStatsWatermark.counted_at).one()
+            query = session.query(
+                start,
+                DBOrderStats.currency,
+                func.sum(DBOrderStats.orders),
+                func.sum(DBOrderStats.bought),
+                func.sum(DBOrderStats.paid),
+            )
+            if currency is not None:
+                query = query.filter(DBOrderStats.currency == currency)
+            if created_from is not None:
+                query = query.filter(
+                    DBOrderStats.bucket >= as_utc(created_from)
+                )
+            if created_to is not None:
+                query = query.filter(
+                    DBOrderStats.bucket < as_utc(created_to)
+                )
+            rows = (
+                query.group_by(start, DBOrderStats.currency)
+                .order_by(start, DBOrderStats.currency)
+                .all()
+            )
+
+        buckets = [
+            StatsBucket(
+                start=bucket_start,
+                currency=bucket_currency,
+                orders=orders,
+                bitcoins=from_satoshi(bitcoins),
+                paid=from_fiat_units(paid),
+            )
+            for bucket_start, bucket_currency, orders, bitcoins, paid in rows
+        ]
+        return OrderStats(
+            as_of=as_of,
+            limit=self._limit,
+            booked=from_satoshi(booked),
+            headroom=max(self._limit - from_satoshi(booked), Decimal(0)),
+            totals=list(_totals(buckets).values()),
+            buckets=buckets,
+        )
+
+
+def _totals(buckets: List[StatsBucket]) -> Dict[Currency, CurrencyTotals]:
+    totals: Dict[Currency, CurrencyTotals] = {}
+    for bucket in buckets:
+        total = totals.setdefault(
+            bucket.currency, CurrencyTotals(currency=bucket.currency),
+        )
+        total.orders += bucket.orders
+        total.bitcoins += bucket.bitcoins
+        total.paid += bucket.paid
+    return totals
+
+
+__all__ = [
+    "BucketSize",
+    "CurrencyTotals",
+    "OrderStats",
+    "StatsBucket",
+    "StatsQueries",
+]
@@ -1,5 +1,6 @@
 from decimal import Decimal
 from random import random
+from typing import Text
 from unittest.mock import ANY, Mock
 from uuid import UUID, uuid4
 
@@ -7,16 +8,27 @@ from fastapi import FastAPI
 from injector import InstanceProvider
 from mockito import when
 from pytest import fixture, mark
+from sqlalchemy.orm import sessionmaker
 
-from currency import Currency
+from application.api import ordering as api_ordering
+from application.api.ordering import MAX_PAGE_SIZE
+from application.db import ReadSessions
+from currency import Currency, StaleExchangeRate, from_satoshi, to_satoshi
 from ordering import Service as OrderingService
 from ordering import commands, errors
+from ordering.db import StatsRollup
+from ordering.export import ExportFormat
 from ordering.queries import BuyOrdersQueries
 from tests.ordering.factories import BuyOrderFactory as BuyOrder
+from tests.ordering.factories import DBBuyOrderFactory as DBBuyOrder
 
 from .factories import ApiCreateBuyOrderRequestFactory as CreateBuyOrder
 
 CREATE_ORDER_URL = "/orders/"
+BATCH_URL = "/orders/batch"
+LIST_URL = "/orders/"
+EXPORT_URL = "/orders/export"
+STATS_URL = "/orders/stats"
 
 
 class TestCreateBuyOrderRequest:
@@ -67,6 +79,19 @@ class TestCreateBuyOrderController:
         assert response.status_code == 201
         assert response.headers["Location"] == order_url
 
+    def test_location_carries_consistency_token_with_replicas(
+            self, api_client, container, create_buy_order, order_url,
+    ):
+        sessions = Mock(ReadSessions)
+        sessions.consistency_token.return_value = "0/16B3748"
+        container.binder.bind(ReadSessions, to=InstanceProvider(sessions))
+
+        response = api_client.post(CREATE_ORDER_URL, json=create_buy_order)
+
+        assert response.headers["Location"] == (
+            f"{order_url}?consistent_with=0%2F16B3748"
+        )
+
     def test_301_when_already_created(
             self, api_client, ordering, order_id, order_url,
     ):
@@ -81,7 +106,7 @@ class TestCreateBuyOrderController:
 
     def test_409_when_order_limit_exceeded(self, api_client, ordering):
         when(ordering).create_buy_order(...).thenRaise(
-            errors.BalanceLimitExceeded(Decimal(100))
+            errors.BalanceLimitExceeded(to_satoshi(100))
         )
 
         response = api_client.post(CREATE_ORDER_URL, json=CreateBuyOrder())
@@ -89,6 +114,24 @@ class TestCreateBuyOrderController:
         assert response.status_code == 409
         assert response.json()["detail"] == "Exceeded 100BTC ordering limit"
 
+    def test_503_when_exchange_rate_is_stale(self, api_client, ordering):
+        when(ordering).create_buy_order(...).thenRaise(StaleExchangeRate(None))
+
+        response = api_client.post(CREATE_ORDER_URL, json=CreateBuyOrder())
+
+        assert response.status_code == 503
+        assert response.json()["detail"] == "Exchange rate is not available"
+
+    def test_503_when_budget_lease_expired(self, api_client, ordering):
+        when(ordering).create_buy_order(...).thenRaise(
+            errors.BudgetLeaseExpired(1)
+        )
+
+        response = api_client.post(CREATE_ORDER_URL, json=CreateBuyOrder())
+
+        assert response.status_code == 503
+        assert "retry" in response.json()["detail"]
+
     @fixture
     def create_buy_order(self) -> dict:
         return CreateBuyOrder()
@@ -107,11 +150,7 @@ class TestCreateBuyOrderController:
     ) -> OrderingService:
         service = Mock(spec=OrderingService)
         container.binder.bind(OrderingService, to=InstanceProvider(service))
-        queries = Mock(spec=BuyOrdersQueries)
-        container.binder.bind(BuyOrdersQueries, to=InstanceProvider(queries))
-
         request_id = UUID(hex=create_buy_order["request_id"])
-        when(queries).get_order_id(request_id).thenReturn(order_id)
         when(service).create_buy_order(
             commands.CreateBuyOrder.construct(
                 id=request_id,
@@ -126,6 +165,161 @@ class TestCreateBuyOrderController:
         return service
 
 
+class TestCreateBuyOrdersRequest:
+    def test_reports_result_of_each_order(self, api_client, coindesk):
+        existing = CreateBuyOrder()
+        created = api_client.post(CREATE_ORDER_URL, json=existing)
+        orders = [existing, CreateBuyOrder(currency="USD")]
+        coindesk.set_current(Decimal(1), Currency.EUR)
+        orders.append(CreateBuyOrder(currency="EUR", amount=101))
+
+        response = api_client.post(BATCH_URL, json={"orders": orders})
+
+        assert response.status_code == 200
+        results = response.json()["results"]
+        assert [result["status"] for result in results] == [
+            "exists", "created", "limit_exceeded",
+        ]
+        assert results[0]["location"] == created.headers["Location"]
+        assert api_client.get(results[1]["location"]).status_code == 200
+        assert results[2]["detail"] == "Exceeded 100BTC ordering limit"
+
+    def test_rejects_whole_batch_when_atomic(self, api_client, coindesk):
+        coindesk.set_current(Decimal(1), Currency.EUR)
+        orders = [
+            CreateBuyOrder(currency="EUR", amount=60),
+            CreateBuyOrder(currency="EUR", amount=60),
+        ]
+
+        response = api_client.post(
+            BATCH_URL, json={"orders": orders, "atomic": True},
+        )
+
+        assert response.status_code == 409
+        assert response.json()["detail"] == "Exceeded 100BTC ordering limit"
+        first = api_client.post(CREATE_ORDER_URL, json=orders[0])
+        assert first.status_code == 201
+
+    @mark.parametrize("orders", [[], [{"request_id": "ILLEGAL"}]])
+    def test_reject_when_invalid_orders(self, api_client, orders):
+        response = api_client.post(BATCH_URL, json={"orders": orders})
+        assert response.status_code == 422
+
+    def test_503_when_exchange_rate_is_stale(self, api_client, container):
+        service = Mock(spec=OrderingService)
+        container.binder.bind(OrderingService, to=InstanceProvider(service))
+        when(service).create_buy_orders(...).thenRaise(StaleExchangeRate(None))
+
+        response = api_client.post(
+            BATCH_URL, json={"orders": [CreateBuyOrder()]},
+        )
+
+        assert response.status_code == 503
+
+    def test_503_when_budget_lease_expired(self, api_client, container):
+        service = Mock(spec=OrderingService)
+        container.binder.bind(OrderingService, to=InstanceProvider(service))
+        when(service).create_buy_orders(...).thenRaise(
+            errors.BudgetLeaseExpired(1)
+        )
+
+        response = api_client.post(
+            BATCH_URL, json={"orders": [CreateBuyOrder()]},
+        )
+
+        assert response.status_code == 503
+
+
+class TestListBuyOrdersController:
+    def test_lists_created_orders(self, api_client, container):
+        orders = DBBuyOrder.build_batch(3)
+        request_ids = [str(order.request_id) for order in orders]
+        with container.get(sessionmaker)() as session:
+            session.add_all(orders)
+            session.commit()
+
+        first = api_client.get(LIST_URL, params={"limit": 2}).json()
+        second = api_client.get(
+            LIST_URL, params={"limit": 2, "cursor": first["next_cursor"]},
+        ).json()
+
+        assert [
+            order["request_id"] for order in first["orders"] + second["orders"]
+        ] == request_ids
+        assert second["next_cursor"] is None
+
+    def test_400_when_cursor_invalid(self, api_client):
+        response = api_client.get(LIST_URL, params={"cursor": "invalid"})
+        assert response.status_code == 400
+
+    def test_page_size_capped(self, api_client):
+        response = api_client.get(
+            LIST_URL, params={"limit": MAX_PAGE_SIZE + 1},
+        )
+        assert response.status_code == 422
+
+
+class TestExportBuyOrdersController:
+    @mark.parametrize("export_format", list(ExportFormat))
+    def test_streams_all_orders(self, api_client, container, export_format):
+        orders = DBBuyOrder.build_batch(3)
+        with container.get(sessionmaker)() as session:
+            session.add_all(orders)
+            session.commit()
+            request_ids = [str(order.request_id) for order in orders]
+
+        response = api_client.get(
+            EXPORT_URL, params={"format": export_format.value},
+        )
+
+        assert response.status_code == 200
+        assert response.headers["Content-Type"].startswith(
+            export_format.media_type
+        )
+        for request_id in request_ids:
+            assert request_id in response.text
+
+    def test_empty_export_when_no_orders(self, api_client):
+        response = api_client.get(EXPORT_URL)
+        assert response.status_code == 200
+        assert response.text == ""
+
+
+class TestGetStatsController:
+    def test_totals_of_stored_orders(self, api_client, container):
+        order = DBBuyOrder()
+        with container.get(sessionmaker)() as session:
+            session.add(order)
+            session.commit()
+            currency, bought = order.exchange_rate.currency, order.bought
+        container.get(StatsRollup).roll_up()
+
+        response = api_client.get(STATS_URL, params={"bucket": "hour"})
+
+        assert response.status_code == 200
+        stats = response.json()
+        assert stats["totals"] == [{
+            "currency": currency.value,
+            "orders": 1,
+            "bitcoins": float(from_satoshi(bought)),
+            "paid": ANY,
+        }]
+        assert stats["headroom"] == stats["limit"] - stats["booked"]
+        assert stats["as_of"] is not None
+
+
+class TestGetOrderStatusController:
+    def test_404_when_no_order_status(self, api_client):
+        response = api_client.get(f"/orders/requests/{uuid4()}")
+        assert response.status_code == 404
+
+    def test_422_when_consistency_token_malformed(self, api_client):
+        response = api_client.get(
+            f"/orders/requests/{uuid4()}", params={"consistent_with": "x"},
+        )
+        assert response.status_code == 422
+
+
 class TestGetBuyOrderController:
     def test_404_when_no_order(self, api_client):
         response = api_client.get(f"/orders/{uuid4()}")
@@ -141,6 +335,74 @@ class TestGetBuyOrderController:
             "currency": order.currency.name,
         }
 
+    def test_order_cacheable_forever(self, api_client, order):
+        response = api_client.get(f"/orders/{order.id}")
+        assert response.headers["ETag"] == self.tag_of(api_client, order)
+        assert "immutable" in response.headers["Cache-Control"]
+
+    def test_tag_changes_with_representation(
+            self, api_client, order, monkeypatch,
+    ):
+        tag = self.tag_of(api_client, order)
+        monkeypatch.setattr(api_ordering, "ORDER_REPRESENTATION", 2)
+
+        assert self.tag_of(api_client, order) != tag
+
+    def test_tag_follows_order_data(self, api_client, order, queries):
+        tag = self.tag_of(api_client, order)
+        changed = order.copy(update={"bitcoins": order.bitcoins + 1})
+        when(queries).get_order(order.id, None).thenReturn(changed)
+
+        assert self.tag_of(api_client, order) != tag
+
+    def test_unknown_order_not_cacheable(self, api_client):
+        response = api_client.get(f"/orders/{uuid4()}")
+        assert "ETag" not in response.headers
+        assert "Cache-Control" not in response.headers
+
+    @mark.parametrize("tag", ['{}', 'W/{}', '"other", {}'])
+    def test_304_when_order_tag_matches(self, api_client, order, tag):
+        current = self.tag_of(api_client, order)
+
+        response = api_client.get(
+            f"/orders/{order.id}",
+            headers={"If-None-Match": tag.format(current)},
+        )
+
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["ETag"] == current
+
+    def test_404_when_unknown_order_tag_given(self, api_client):
+        order_id = uuid4()
+        response = api_client.get(
+            f"/orders/{order_id}", headers={"If-None-Match": f'"{order_id}"'},
+        )
+        assert response.status_code == 404
+
+    def test_order_data_when_other_tag_given(self, api_client, order):
+        response = api_client.get(
+            f"/orders/{order.id}", headers={"If-None-Match": f'"{uuid4()}"'},
+        )
+        assert response.status_code == 200
+        assert response.json()["id"] == str(order.id)
+
+    def test_304_for_any_tag_when_order_exists(self, api_client, order):
+        response = api_client.get(
+            f"/orders/{order.id}", headers={"If-None-Match": "*"},
+        )
+        assert response.status_code == 304
+
+    def test_404_for_any_tag_when_no_order(self, api_client):
+        response = api_client.get(
+            f"/orders/{uuid4()}", headers={"If-None-Match": "*"},
+        )
+        assert response.status_code == 404
+
+    @staticmethod
+    def tag_of(api_client, order: BuyOrder) -> Text:
+        return api_client.get(f"/orders/{order.id}").headers["ETag"]
+
     @fixture
     def order(self) -> BuyOrder:
         return BuyOrder()
@@ -149,6 +411,6 @@ class TestGetBuyOrderController:
     def queries(self, container, order) -> BuyOrdersQueries:
         queries = Mock(BuyOrdersQueries)
         when(queries).get_order(...).thenReturn(None)
-        when(queries).get_order(order.id).thenReturn(order)
+        when(queries).get_order(order.id, None).thenReturn(order)
         container.binder.bind(BuyOrdersQueries, to=InstanceProvider(queries))
         return queries
@@ -5,7 +5,7 @@ from fastapi.responses import PlainTextResponse
 from injector import InstanceProvider, UnknownProvider
 from pytest import fixture, mark, raises
 
-from application.api.tools import Injects
+from application.api.tools import Injects, RouteTemplates
 
 Controller = Callable[[], str]
 
@@ -35,3 +35,25 @@ class TestInjects:
 
         app.include_router(router, prefix="/tests")
         return router
+
+
+class TestRouteTemplates:
+    def test_template_of_matched_route(self, app):
+        route = next(
+            route for route in app.routes if route.name == "orders:get_order"
+        )
+        templates = RouteTemplates()
+
+        assert templates({"app": app, "endpoint": route.endpoint}) == (
+            "/orders/{order_id}"
+        )
+        assert templates({"app": FastAPI(), "endpoint": route.endpoint}) == (
+            "/orders/{order_id}"
+        )
+
+    def test_unmatched_without_endpoint(self, app):
+        assert RouteTemplates()({"app": app}) == "unmatched"
+
+    def test_unmatched_for_endpoint_of_mounted_app(self, app):
+        scope = {"app": app, "endpoint": lambda request: None}
+        assert RouteTemplates()(scope) == "unmatched"
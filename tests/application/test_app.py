@@ -0,0 +1,177 @@
+from threading import Event
+from threading import enumerate as enumerate_threads
+from time import sleep
+
+from fastapi.testclient import TestClient
+from injector import Injector
+
+from application.app import create_app
+from application.bus import Listener
+from application.metrics import Metrics
+from ordering import CommandQueue
+from ordering.db import BalanceLedger
+from ordering.events import BuyOrderCreated
+
+from .factories import ApiCreateBuyOrderRequestFactory as CreateBuyOrder
+
+
+class TestRatePolling:
+    def test_orders_priced_from_rates_polled_on_startup(
+            self, monkeypatch, coindesk,
+    ):
+        monkeypatch.setenv("COINDESK_POLL_INTERVAL", "3600")
+        app = create_app(Injector())
+
+        with TestClient(app) as client:
+            first = client.post("/orders/", json=CreateBuyOrder())
+            second = client.post("/orders/", json=CreateBuyOrder())
+
+        assert first.status_code == second.status_code == 201
+        assert coindesk.requests_count == 1
+
+
+class TestPipelineWorkers:
+    def test_orders_processed_on_worker_pool(self, monkeypatch, coindesk):
+        monkeypatch.setenv("PIPELINE_WORKERS", "4")
+        app = create_app(Injector())
+
+        with TestClient(app) as client:
+            created = client.post("/orders/", json=CreateBuyOrder())
+            order = client.get(created.headers["Location"])
+
+        assert created.status_code == 201
+        assert order.status_code == 200
+
+
+class TestOrderBatching:
+    def test_orders_admitted_through_batcher(self, monkeypatch, coindesk):
+        monkeypatch.setenv("ORDER_BATCH_WINDOW", "0.01")
+        monkeypatch.setenv("PIPELINE_WORKERS", "4")
+        app = create_app(Injector())
+
+        with TestClient(app) as client:
+            created = client.post("/orders/", json=CreateBuyOrder())
+            order = client.get(created.headers["Location"])
+
+        assert created.status_code == 201
+        assert order.status_code == 200
+        metrics = app.state.injector.get(Metrics)
+        assert "order_batch_size_sum 1" in metrics.render()
+
+
+class TestStatsRollup:
+    def test_stats_follow_orders_while_app_runs(self, monkeypatch, coindesk):
+        monkeypatch.setenv("STATS_ROLLUP_INTERVAL", "0.01")
+        app = create_app(Injector())
+
+        with TestClient(app) as client:
+            client.post("/orders/", json=CreateBuyOrder())
+            totals = []
+            while not totals:
+                sleep(0.01)
+                totals = client.get("/orders/stats").json()["totals"]
+
+        assert totals[0]["orders"] == 1
+
+    def test_rollup_runs_by_default(self):
+        app = create_app(Injector())
+
+        with TestClient(app):
+            running = [thread.name for thread in enumerate_threads()]
+
+        assert "stats-rollup" in running
+        assert "stats-rollup" not in [
+            thread.name for thread in enumerate_threads()
+        ]
+
+    def test_rollup_turned_off_by_zero_interval(self, monkeypatch):
+        monkeypatch.setenv("STATS_ROLLUP_INTERVAL", "0")
+        app = create_app(Injector())
+
+        with TestClient(app):
+            running = [thread.name for thread in enumerate_threads()]
+
+        assert "stats-rollup" not in running
+
+
+class TestBudgetLeases:
+    def test_orders_admitted_against_lease(self, monkeypatch, coindesk):
+        monkeypatch.setenv("BUDGET_LEASE_SIZE", "10")
+        app = create_app(Injector())
+
+        with TestClient(app) as client:
+            created = client.post("/orders/", json=CreateBuyOrder())
+
+        assert created.status_code == 201
+        check = app.state.injector.get(BalanceLedger).verify()
+        assert check.leased == 0
+        assert check.consistent
+
+
+class TestSQLAdmission:
+    def test_orders_admitted_by_database_function(self, monkeypatch, coindesk):
+        monkeypatch.setenv("SQL_ADMISSION", "true")
+        app = create_app(Injector())
+
+        with TestClient(app) as client:
+            request = CreateBuyOrder()
+            created = client.post("/orders/", json=request)
+            repeated = client.post(
+                "/orders/", json=request, allow_redirects=False,
+            )
+
+        assert created.status_code == 201
+        assert repeated.status_code == 301
+        assert repeated.headers["Location"] == created.headers["Location"]
+        check = app.state.injector.get(BalanceLedger).verify()
+        assert check.ledger > 0
+        assert check.consistent
+
+
+class TestEventOutbox:
+    def test_order_events_left_for_relay(self, monkeypatch, coindesk):
+        monkeypatch.setenv("EVENT_OUTBOX", "true")
+        app = create_app(Injector())
+
+        with TestClient(app) as client:
+            created = client.post("/orders/", json=CreateBuyOrder())
+            outbox = client.get(app.url_path_for("monitors:outbox"))
+
+        assert created.status_code == 201
+        assert outbox.json()["pending"] == 1
+
+
+class TestAcceptOrdersLater:
+    def test_order_accepted_and_processed_later(self, monkeypatch, coindesk):
+        monkeypatch.setenv("ACCEPT_ORDERS_LATER", "true")
+        app = create_app(Injector())
+
+        with TestClient(app) as client:
+            accepted = client.post("/orders/", json=CreateBuyOrder())
+            pending = client.get(accepted.headers["Location"])
+            app.state.injector.get(CommandQueue).drain()
+            created = client.get(accepted.headers["Location"])
+
+        assert accepted.status_code == 202
+        assert accepted.json()["location"] == accepted.headers["Location"]
+        assert pending.json()["status"] == "pending"
+        assert created.json()["status"] == "created"
+        order = created.json()["order_id"]
+        assert client.get(f"/orders/{order}").status_code == 200
+
+
+class TestEventLanes:
+    def test_events_delivered_on_lanes(self, monkeypatch, coindesk):
+        monkeypatch.setenv("EVENT_LANES", "2")
+        app = create_app(Injector())
+        delivered = Event()
+        app.state.injector.binder.multibind(
+            list[Listener[BuyOrderCreated]],
+            to=[lambda event: delivered.set()],
+        )
+
+        with TestClient(app) as client:
+            created = client.post("/orders/", json=CreateBuyOrder())
+
+        assert created.status_code == 201
+        assert delivered.is_set()
@@ -1,8 +1,14 @@
+import logging
+from datetime import timedelta
+from threading import Barrier
+from threading import Event as Signal
+from threading import Thread
+from time import sleep
 from unittest.mock import Mock, call
 from uuid import uuid4
 
-from injector import InstanceProvider, UnknownProvider
-from pytest import fixture, raises
+from injector import CallableProvider, InstanceProvider, UnknownProvider
+from pytest import fixture, mark, raises
 
 from application.bus import (
     Command,
@@ -11,7 +17,9 @@ from application.bus import (
     EventBus,
     Handler,
     Listener,
+    ListenerLanes,
 )
+from application.metrics import Metrics
 
 
 class TestCommandBus:
@@ -29,6 +37,44 @@ class TestCommandBus:
         bus.handle(command)
         handler.assert_called_once_with(command)
 
+    def test_resolves_handler_once_per_command_type(
+            self, container, bus, command,
+    ):
+        handler, resolved = Mock(), []
+        container.binder.bind(
+            Handler[Command],
+            to=CallableProvider(lambda: resolved.append(handler) or handler),
+        )
+
+        bus.handle(command)
+        bus.handle(command)
+
+        assert resolved == [handler]
+        assert handler.call_count == 2
+
+    def test_prepare_fails_when_command_has_no_handler(self, bus):
+        with raises(UnknownProvider):
+            bus.prepare(Command)
+
+    def test_returns_result_of_handler(self, bus, command, handler):
+        handler.return_value = 42
+        assert bus.handle(command) == 42
+
+    def test_times_commands_and_counts_failures(
+            self, container, bus, command, handler,
+    ):
+        bus.handle(command)
+        handler.side_effect = ValueError
+        with raises(ValueError):
+            bus.handle(command)
+
+        rendered = container.get(Metrics).render()
+        assert 'command_duration_seconds_count{command="Command"} 2' in rendered
+        assert (
+            'command_failures_total{command="Command",error="ValueError"} 1'
+            in rendered
+        )
+
     @fixture
     def command(self) -> Command:
         return Command()
@@ -55,6 +101,36 @@ class TestEventBus:
         bus.emit(event)
         assert listener.call_args == call(event)
 
+    def test_resolves_listeners_once_per_event_type(
+            self, container, bus, event,
+    ):
+        listener, resolved = Mock(Listener[Event]), []
+
+        def listeners() -> list:
+            resolved.append(listener)
+            return [listener]
+
+        container.binder.multibind(
+            list[Listener[Event]], to=CallableProvider(listeners),
+        )
+
+        bus.emit(event)
+        bus.emit(event)
+
+        assert resolved == [listener]
+        assert listener.call_count == 2
+
+    def test_prepared_event_type_keeps_listeners_resolved_up_front(
+            self, container, bus, event,
+    ):
+        bus.prepare(Event)
+        listener = Mock(Listener[Event])
+        container.binder.multibind(list[Listener[Event]], to=[listener])
+
+        bus.emit(event)
+
+        listener.assert_not_called()
+
     def test_call_all_listeners_when_event_emitted(self, container, bus, event):
         listeners = [Mock(Listener[Event]) for _ in range(5)]
         container.binder.multibind(list[Listener[Event]], to=listeners)
@@ -62,6 +138,21 @@ class TestEventBus:
         bus.emit(event)
         assert all(listener.call_args == call(event) for listener in listeners)
 
+    def test_times_each_listener(self, container, bus, event):
+        container.binder.multibind(
+            list[Listener[Event]], to=[Mock(Listener[Event])],
+        )
+
+        bus.emit(event)
+        bus.emit(event)
+
+        rendered = container.get(Metrics).render()
+        assert 'events_emitted_total{event="Event"} 2' in rendered
+        assert (
+            'listener_duration_seconds_count{event="Event",listener="Mock"} 2'
+            in rendered
+        )
+
     @fixture
     def event(self) -> Event:
         return Event(command_id=uuid4())
@@ -69,3 +160,142 @@ class TestEventBus:
     @fixture
     def bus(self, container) -> EventBus:
         return container.get(EventBus)
+
+
+class TestListenerLanes:
+    def test_listeners_of_event_run_in_parallel(self, lanes_bus, listen):
+        barrier, reached = Barrier(2, timeout=1), []
+        listen(
+            lambda event: reached.append(barrier.wait()),
+            lambda event: reached.append(barrier.wait()),
+        )
+
+        lanes_bus.emit(Event(command_id=uuid4()))
+        lanes_bus.lanes.stop()
+
+        assert sorted(reached) == [0, 1]
+
+    def test_events_with_same_key_delivered_in_order(self, lanes_bus, listen):
+        received, command_id = [], uuid4()
+        listen(lambda event: sleep(0.001) or received.append(event))
+        events = [Event(command_id=command_id) for _ in range(20)]
+
+        for event in events:
+            lanes_bus.emit(event)
+        lanes_bus.lanes.stop()
+
+        assert received == events
+
+    @mark.parametrize("timeout", [timedelta(milliseconds=50)])
+    def test_slow_listener_times_out_without_stalling_others(
+            self, lanes_bus, listen, caplog,
+    ):
+        released, received = Signal(), []
+        listen(lambda event: released.wait(), received.append)
+        events = [Event(command_id=uuid4()) for _ in range(2)]
+
+        with caplog.at_level(logging.ERROR):
+            for event in events:
+                lanes_bus.emit(event)
+            lanes_bus.lanes.stop()
+        released.set()
+
+        assert sorted(received, key=id) == sorted(events, key=id)
+        assert "timed out" in caplog.text
+
+    def test_failing_listener_isolated(self, lanes_bus, listen, caplog):
+        received = []
+        listen(Mock(side_effect=RuntimeError), received.append)
+        event = Event(command_id=uuid4())
+
+        lanes_bus.emit(event)
+        lanes_bus.lanes.stop()
+
+        assert received == [event]
+        assert "failed" in caplog.text
+
+    def test_skips_listener_when_hung_calls_hold_all_workers(
+            self, container, listen, caplog,
+    ):
+        released, received = Signal(), []
+        hung = Mock(side_effect=lambda event: released.wait())
+        listen(hung, received.append)
+        lanes = ListenerLanes(
+            1, queue_size=10, workers=1, timeout=timedelta(milliseconds=50),
+        )
+        bus = EventBus(container, lanes)
+
+        with caplog.at_level(logging.ERROR):
+            bus.emit(Event(command_id=uuid4()))
+            bus.emit(Event(command_id=uuid4()))
+            lanes.stop()
+        released.set()
+
+        assert hung.call_count == 1
+        assert received == []
+        assert "No worker free" in caplog.text
+
+    def test_deliver_bypasses_lanes(self, lanes_bus, listen):
+        received = []
+        listen(received.append)
+        event = Event(command_id=uuid4())
+
+        lanes_bus.deliver(event)
+
+        assert received == [event]
+        lanes_bus.lanes.stop()
+
+    def test_deliver_raises_what_listener_raises(self, lanes_bus, listen):
+        listen(Mock(side_effect=RuntimeError))
+
+        with raises(RuntimeError):
+            lanes_bus.deliver(Event(command_id=uuid4()))
+        lanes_bus.lanes.stop()
+
+    def test_emit_blocks_when_lane_is_full(self, container, listen):
+        released = Signal()
+        listen(lambda event: released.wait())
+        lanes = ListenerLanes(
+            1, queue_size=1, workers=1, timeout=timedelta(seconds=5),
+        )
+        bus = EventBus(container, lanes)
+        bus.emit(Event(command_id=uuid4()))
+        sleep(0.05)
+        bus.emit(Event(command_id=uuid4()))
+
+        blocked = Thread(target=bus.emit, args=(Event(command_id=uuid4()),))
+        blocked.start()
+        blocked.join(0.1)
+        assert blocked.is_alive()
+
+        released.set()
+        blocked.join()
+        lanes.stop()
+
+    def test_nothing_submitted_when_no_listeners(self, lanes_bus):
+        lanes_bus.emit(Event(command_id=uuid4()))
+        lanes_bus.lanes.stop()
+
+    def test_events_ordered_by_command_by_default(self):
+        event = Event(command_id=uuid4())
+        assert event.ordering_key == event.command_id
+
+    @fixture
+    def listen(self, container):
+        def listen(*listeners) -> None:
+            container.binder.multibind(
+                list[Listener[Event]], to=list(listeners),
+            )
+
+        return listen
+
+    @fixture
+    def lanes_bus(self, container, timeout) -> EventBus:
+        lanes = ListenerLanes(2, queue_size=10, workers=4, timeout=timeout)
+        bus = EventBus(container, lanes)
+        bus.lanes = lanes
+        return bus
+
+    @fixture
+    def timeout(self) -> timedelta:
+        return timedelta(seconds=1)
@@ -0,0 +1,82 @@
+from unittest.mock import Mock
+
+from pytest import fixture
+from sqlalchemy.orm import sessionmaker
+
+from application.cli import main
+from application.workers import BatchWorkers
+from tests.ordering.factories import DBBuyOrderFactory as DBBuyOrder
+
+
+class TestVerifyBalance:
+    def test_succeeds_when_ledger_matches_orders(self, capsys):
+        assert main(["verify-balance"]) == 0
+        assert capsys.readouterr().out.strip() == (
+            "ledger=0.00000000BTC orders=0.00000000BTC"
+        )
+
+    def test_fails_when_ledger_drifted_from_orders(self, session):
+        session.add(DBBuyOrder(bought=10 ** 8))
+        session.commit()
+
+        assert main(["verify-balance"]) == 1
+
+
+class TestRelayEvents:
+    def test_delivers_pending_events_once(self, capsys):
+        assert main(["relay-events", "--once"]) == 0
+        assert capsys.readouterr().out.strip() == "relayed=0"
+
+    def test_relays_until_interrupted(self, monkeypatch):
+        monkeypatch.setattr(BatchWorkers, "join", Mock(
+            side_effect=[KeyboardInterrupt, None],
+        ))
+        assert main(["relay-events"]) == 0
+
+
+class TestProcessOrders:
+    def test_processes_pending_orders_once(self, capsys):
+        assert main(["process-orders", "--once"]) == 0
+        assert capsys.readouterr().out.strip() == "processed=0"
+
+    def test_processes_until_interrupted(self, monkeypatch):
+        monkeypatch.setattr(BatchWorkers, "join", Mock(
+            side_effect=[KeyboardInterrupt, None],
+        ))
+        assert main(["process-orders"]) == 0
+
+
+class TestExportOrders:
+    def test_writes_orders_to_standard_output(self, capsys, session):
+        order = DBBuyOrder()
+        session.add(order)
+        session.commit()
+
+        assert main(["export-orders"]) == 0
+        assert str(order.request_id) in capsys.readouterr().out
+
+    def test_writes_csv_to_file(self, tmp_path):
+        output = tmp_path / "orders.csv"
+
+        assert main([
+            "export-orders", "--format", "csv", "--output", str(output),
+        ]) == 0
+        assert output.read_text() == (
+            "id,request_id,bitcoins,bought_for,currency\n"
+        )
+
+
+class TestRebuildStats:
+    def test_rebuilds_statistics(self, capsys, session):
+        session.add(DBBuyOrder())
+        session.commit()
+
+        assert main(["rebuild-stats", "--workers", "2"]) == 0
+        assert capsys.readouterr().out.strip() == "rebuilt_days=1"
+
+
+@fixture
+def session(container):
+    session = container.get(sessionmaker)()
+    yield session
+    session.close()
@@ -0,0 +1,134 @@
+import logging
+from datetime import timedelta
+from typing import Callable
+from uuid import uuid4
+
+from injector import Injector
+from pytest import fixture
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
+
+from application.db import DBModule
+from application.db.instrumentation import TimedQueuePool, normalize, redact
+from application.metrics import Metrics
+from application.settings import Settings
+
+
+class TestEngineMetrics:
+    def test_times_statements_by_normalized_sql(self, db_container, engine):
+        with engine.connect() as connection:
+            connection.execute(text("SELECT :value"), {"value": 1})
+
+        assert (
+            'db_statement_duration_seconds_count{engine="primary",'
+            'statement="SELECT ?"} 1'
+        ) in db_container.get(Metrics).render()
+
+    def test_reports_pool_state(self, db_container, engine):
+        with engine.connect():
+            rendered = db_container.get(Metrics).render()
+
+        assert 'db_pool_size{engine="primary"} 5' in rendered
+        assert 'db_pool_checked_out{engine="primary"} 1' in rendered
+        assert 'db_pool_overflow{engine="primary"} -4' in rendered
+        assert (
+            'db_pool_checkout_wait_seconds_count{engine="primary"} 1'
+            in rendered
+        )
+
+    def test_keeps_timing_checkouts_after_pool_recreated(
+            self, db_container, engine,
+    ):
+        engine.dispose()
+
+        with engine.connect():
+            pass
+
+        assert (
+            'db_pool_checkout_wait_seconds_count{engine="primary"} 1'
+            in db_container.get(Metrics).render()
+        )
+
+    def test_logs_slow_statements_without_parameter_values(
+            self, engine_with, caplog,
+    ):
+        engine = engine_with(slow_query=timedelta(microseconds=1))
+        secret = uuid4().hex
+
+        with caplog.at_level(logging.WARNING, "application.db.slow"):
+            with engine.connect() as connection:
+                connection.execute(text("SELECT :secret"), {"secret": secret})
+
+        assert "SELECT %(secret)s parameters={'secret': '<str>'}" in (
+            caplog.text
+        )
+        assert secret not in caplog.text
+
+    def test_applies_statement_timeout(self, engine_with):
+        engine = engine_with(statement_timeout=timedelta(seconds=2))
+
+        with engine.connect() as connection:
+            timeout = connection.execute(text("SHOW statement_timeout"))
+
+            assert timeout.scalar() == "2s"
+
+    @fixture
+    def engine_with(self) -> Callable[..., Engine]:
+        engines = []
+
+        def create(**options) -> Engine:
+            module = DBModule(Settings().database_url, **options)
+            engines.append(Injector([module]).get(Engine))
+            return engines[-1]
+
+        yield create
+        for engine in engines:
+            engine.dispose()
+
+    @fixture
+    def db_container(self) -> Injector:
+        container = Injector([DBModule(Settings().database_url)])
+        yield container
+        container.get(Engine).dispose()
+
+    @fixture
+    def engine(self, db_container) -> Engine:
+        return db_container.get(Engine)
+
+
+class TestTimedQueuePool:
+    def test_plain_queue_pool_when_not_instrumented(self):
+        engine = create_engine(
+            Settings().database_url, future=True, poolclass=TimedQueuePool,
+        )
+
+        with engine.connect() as connection:
+            assert connection.execute(text("SELECT 1")).scalar() == 1
+        engine.dispose()
+
+
+class TestNormalize:
+    def test_one_line_with_placeholders(self):
+        statement = "SELECT *\n  FROM orders\n WHERE id = %(id_1)s AND x = %s"
+
+        assert normalize(statement) == (
+            "SELECT * FROM orders WHERE id = ? AND x = ?"
+        )
+
+    def test_collapses_expanded_lists(self):
+        statement = "SELECT 1 WHERE id IN (%(id_1_1)s, %(id_1_2)s, %(id_1_3)s)"
+
+        assert normalize(statement) == "SELECT 1 WHERE id IN (?, ...)"
+
+
+class TestRedact:
+    def test_named_parameters_keep_names(self):
+        assert redact({"id": 1, "name": "x"}) == {
+            "id": "<int>", "name": "<str>",
+        }
+
+    def test_positional_parameters(self):
+        assert redact((1, None)) == ("<int>", "<NoneType>")
+
+    def test_counts_parameter_sets_of_executemany(self):
+        assert redact([{"id": 1}, {"id": 2}]) == "<2 parameter sets>"
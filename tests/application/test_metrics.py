@@ -0,0 +1,69 @@
+from pytest import fixture, raises
+
+from application.metrics import Metrics
+
+
+class TestMetrics:
+    def test_counts_per_label_values(self, metrics):
+        counter = metrics.counter("jobs_total", "Jobs done.", labels=("kind",))
+
+        counter.inc("a")
+        counter.inc("a")
+        counter.inc("b", amount=0.5)
+
+        assert metrics.render() == (
+            "# HELP jobs_total Jobs done.\n"
+            "# TYPE jobs_total counter\n"
+            'jobs_total{kind="a"} 2\n'
+            'jobs_total{kind="b"} 0.5\n'
+        )
+
+    def test_histogram_buckets_are_cumulative(self, metrics):
+        histogram = metrics.histogram(
+            "wait_seconds", "Waits.", buckets=(0.1, 1.0),
+        )
+
+        for seconds in (0.05, 0.1, 0.5, 2.0):
+            histogram.observe(seconds)
+
+        assert metrics.render().splitlines()[2:] == [
+            'wait_seconds_bucket{le="0.1"} 2',
+            'wait_seconds_bucket{le="1"} 3',
+            'wait_seconds_bucket{le="+Inf"} 4',
+            "wait_seconds_count 4",
+            "wait_seconds_sum 2.65",
+        ]
+
+    def test_times_block_even_when_it_raises(self, metrics):
+        histogram = metrics.histogram("run_seconds", "Runs.", labels=("job",))
+
+        with raises(ValueError):
+            with histogram.time("failing"):
+                raise ValueError
+
+        assert 'run_seconds_count{job="failing"} 1' in metrics.render()
+
+    def test_returns_registered_metric_for_same_name(self, metrics):
+        first = metrics.counter("jobs_total", "Jobs done.")
+
+        assert metrics.counter("jobs_total", "Jobs done.") is first
+
+    def test_reads_sampled_metric_when_rendered(self, metrics):
+        state = {"size": 1}
+        metrics.sampled(
+            "gauge", "size", "Size.", lambda: [((), state["size"])],
+        )
+        state["size"] = 3
+
+        assert metrics.render().splitlines()[-1] == "size 3"
+
+    def test_escapes_label_values(self, metrics):
+        counter = metrics.counter("seen_total", "Seen.", labels=("value",))
+
+        counter.inc('a"b\\c\nd')
+
+        assert r'seen_total{value="a\"b\\c\nd"} 1' in metrics.render()
+
+    @fixture
+    def metrics(self) -> Metrics:
+        return Metrics()
@@ -1,4 +1,37 @@
+from uuid import uuid4
+
+
 class TestMonitors:
     def test_200_ok_when_ping(self, api_client):
         url = api_client.app.url_path_for("monitors:ping")
         assert api_client.get(url).status_code == 200
+
+    def test_outbox_lag_when_nothing_pending(self, api_client):
+        url = api_client.app.url_path_for("monitors:outbox")
+        assert api_client.get(url).json() == {
+            "pending": 0, "lag_seconds": 0, "dead": 0,
+        }
+
+    def test_metrics_in_prometheus_text_format(self, api_client):
+        url = api_client.app.url_path_for("monitors:metrics")
+
+        response = api_client.get(url)
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith(
+            "text/plain; version=0.0.4"
+        )
+
+    def test_metrics_time_requests_per_route_template(self, api_client):
+        api_client.get(f"/orders/{uuid4()}")
+        api_client.get(f"/orders/{uuid4()}")
+        api_client.get("/no-such-page")
+
+        url = api_client.app.url_path_for("monitors:metrics")
+        rendered = api_client.get(url).text
+
+        assert (
+            'http_request_duration_seconds_count{method="GET",'
+            'route="/orders/{order_id}",status="404"} 2'
+        ) in rendered
+        assert 'route="unmatched",status="404"} 1' in rendered
@@ -0,0 +1,70 @@
+from datetime import timedelta
+
+from injector import Injector
+from pytest import fixture
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker
+
+from application.db import DBModule, ReadSessions
+from application.settings import Settings
+
+
+class TestReadSessions:
+    def test_primary_sessions_without_replicas(self, primary):
+        sessions = ReadSessions(primary)
+
+        with sessions("0/0") as session:
+            assert session.bind is primary.kw["bind"]
+        assert sessions.consistency_token() is None
+
+    def test_replicas_used_in_turn(self, primary, replica):
+        other = sessionmaker(bind=replica.kw["bind"])
+        sessions = ReadSessions(primary, [replica, other])
+
+        binds = []
+        for _ in range(3):
+            with sessions() as session:
+                binds.append(session.bind)
+
+        assert binds == [
+            replica.kw["bind"], other.kw["bind"], replica.kw["bind"],
+        ]
+
+    def test_replica_used_once_it_replayed_token(self, primary, replica):
+        sessions = ReadSessions(primary, [replica])
+
+        with sessions(sessions.consistency_token()) as session:
+            assert session.bind is replica.kw["bind"]
+
+    def test_falls_back_to_primary_when_replica_lags(self, primary, replica):
+        sessions = ReadSessions(
+            primary,
+            [replica],
+            wait=timedelta(milliseconds=30),
+            poll_interval=timedelta(milliseconds=10),
+        )
+
+        with sessions("FFFFFFFF/0") as session:
+            assert session.bind is primary.kw["bind"]
+
+    @fixture
+    def primary(self, container) -> sessionmaker:
+        return container.get(sessionmaker)
+
+    @fixture
+    def replica(self, container) -> sessionmaker:
+        engine = create_engine(container.get(Engine).url, future=True)
+        yield sessionmaker(bind=engine)
+        engine.dispose()
+
+
+class TestDBModule:
+    def test_read_sessions_from_configured_replicas(self):
+        url = Settings().database_url
+        container = Injector([DBModule(url, replica_urls=[url])])
+
+        sessions = container.get(ReadSessions)
+
+        with sessions() as session:
+            assert session.bind is not container.get(Engine)
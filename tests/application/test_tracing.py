@@ -0,0 +1,293 @@
+import atexit
+import json
+import logging
+from datetime import timedelta
+from threading import Event as Signal
+from threading import current_thread
+from time import sleep
+from typing import List, Sequence, Set
+from unittest.mock import Mock
+from uuid import UUID, uuid4
+
+from fastapi import FastAPI
+from injector import Injector, InstanceProvider
+from pytest import fixture, raises
+
+from application.app import create_app
+from application.bus import Event, EventBus, Listener, ListenerLanes
+from application.tracing import (
+    OTLPFileExporter,
+    Span,
+    SpanExporter,
+    Tracer,
+    TracingModule,
+    current_span,
+)
+
+from .factories import ApiCreateBuyOrderRequestFactory as CreateBuyOrder
+
+SAMPLED = UUID("00000000-0000-0000-0000-000000000000")
+DROPPED = UUID("ffffffff-ffff-ffff-ffff-ffffffffffff")
+
+
+class TestTracer:
+    def test_records_nothing_without_exporter(self):
+        tracer = Tracer(sample_rate=1.0)
+
+        with tracer.span("root", trace_id=SAMPLED) as span:
+            assert not span.sampled
+            assert current_span() is None
+
+    def test_nested_spans_share_trace(self, exporter):
+        tracer = Tracer(exporter, sample_rate=1.0)
+
+        with tracer.span("root", trace_id=SAMPLED) as root:
+            with tracer.span("child", size=1) as child:
+                assert current_span() is child
+            assert current_span() is root
+        tracer.flush()
+
+        child, root = exporter.spans
+        assert root.trace_id == child.trace_id == SAMPLED.hex
+        assert root.parent_id is None
+        assert child.parent_id == root.span_id
+        assert child.attributes == {"size": 1}
+        assert root.start_ns <= child.start_ns <= child.end_ns <= root.end_ns
+
+    def test_drops_whole_trace_when_root_not_sampled(self, exporter):
+        tracer = Tracer(exporter, sample_rate=0.5)
+
+        with tracer.span("root", trace_id=DROPPED) as root:
+            with tracer.span("child") as child:
+                child.set(size=1)
+        tracer.flush()
+
+        assert not root.sampled
+        assert child is root
+        assert child.attributes == {}
+        assert exporter.spans == []
+
+    def test_samples_by_trace_id(self, exporter):
+        tracer = Tracer(exporter, sample_rate=0.5)
+
+        with tracer.span("root", trace_id=SAMPLED) as root:
+            pass
+
+        assert root.sampled
+
+    def test_links_sampled_spans_only(self, exporter):
+        tracer = Tracer(exporter, sample_rate=1.0)
+        dropped = Span("dropped", DROPPED.hex, "1" * 16, sampled=False)
+        other = Span("other", SAMPLED.hex, "2" * 16)
+
+        with tracer.span("root", links=[None, dropped, other]) as span:
+            pass
+
+        assert span.links == [(SAMPLED.hex, "2" * 16)]
+
+    def test_records_error_of_span(self, exporter):
+        tracer = Tracer(exporter, sample_rate=1.0)
+
+        with raises(ValueError):
+            with tracer.span("failing"):
+                raise ValueError
+        tracer.flush()
+
+        assert exporter.spans[0].error == "ValueError"
+
+    def test_exports_full_batch_in_background(self, exporter):
+        tracer = Tracer(exporter, sample_rate=1.0, batch_size=2)
+
+        for _ in range(3):
+            with tracer.span("root"):
+                pass
+
+        assert exporter.exported.wait(1)
+        assert exporter.threads == {"span-exporter"}
+        tracer.flush()
+        assert len(exporter.spans) == 3
+
+    def test_drops_batches_when_export_queue_full(self, exporter, caplog):
+        released = Signal()
+        exporter.export = Mock(side_effect=lambda spans: released.wait())
+        tracer = Tracer(exporter, sample_rate=1.0, batch_size=1, max_queued=1)
+
+        with caplog.at_level(logging.WARNING):
+            for _ in range(3):
+                with tracer.span("root"):
+                    sleep(0.01)
+        released.set()
+        tracer.flush()
+
+        assert exporter.export.call_count == 2
+        assert "Dropped 1 spans" in caplog.text
+
+    def test_logs_export_failure(self, caplog):
+        exporter = SpanExporter()
+        tracer = Tracer(exporter, sample_rate=1.0, batch_size=1)
+
+        with caplog.at_level(logging.ERROR):
+            with tracer.span("root"):
+                pass
+            tracer.flush()
+
+        assert "Could not export 1 spans" in caplog.text
+
+    @fixture
+    def exporter(self) -> "CollectingExporter":
+        return CollectingExporter()
+
+
+class TestOTLPFileExporter:
+    def test_appends_otlp_json_line_per_export(self, tmp_path):
+        path = tmp_path / "spans.json"
+        exporter = OTLPFileExporter(str(path))
+        span = Span(
+            "child",
+            SAMPLED.hex,
+            "1" * 16,
+            parent_id="2" * 16,
+            attributes={"flag": True, "count": 2, "ratio": 0.5, "id": "x"},
+            start_ns=1,
+            end_ns=2,
+            error="ValueError",
+            links=[(DROPPED.hex, "3" * 16)],
+        )
+
+        exporter.export([span])
+        exporter.export([span])
+
+        lines = path.read_text().splitlines()
+        assert len(lines) == 2
+        otlp, = json.loads(lines[0])["resourceSpans"][0]["scopeSpans"][0][
+            "spans"
+        ]
+        assert otlp == {
+            "traceId": SAMPLED.hex,
+            "spanId": "1" * 16,
+            "parentSpanId": "2" * 16,
+            "name": "child",
+            "kind": 1,
+            "startTimeUnixNano": "1",
+            "endTimeUnixNano": "2",
+            "attributes": [
+                {"key": "flag", "value": {"boolValue": True}},
+                {"key": "count", "value": {"intValue": "2"}},
+                {"key": "ratio", "value": {"doubleValue": 0.5}},
+                {"key": "id", "value": {"stringValue": "x"}},
+            ],
+            "status": {"code": 2, "message": "ValueError"},
+            "links": [{"traceId": DROPPED.hex, "spanId": "3" * 16}],
+        }
+
+
+class TestTracingModule:
+    def test_tracer_disabled_without_export_path(self):
+        tracer = Injector([TracingModule(sample_rate=1.0)]).get(Tracer)
+
+        with tracer.span("root") as span:
+            assert not span.sampled
+
+    def test_flushes_at_exit(self, monkeypatch, tmp_path):
+        register = Mock()
+        monkeypatch.setattr(atexit, "register", register)
+        module = TracingModule(str(tmp_path / "spans.json"), sample_rate=1.0)
+
+        tracer = Injector([module]).get(Tracer)
+
+        register.assert_called_once_with(tracer.flush)
+
+
+class TestListenerLanesTrace:
+    def test_listener_span_joins_trace_of_emitter(self):
+        exporter = CollectingExporter()
+        tracer = Tracer(exporter, sample_rate=1.0)
+        container = Injector()
+        container.binder.bind(Tracer, to=InstanceProvider(tracer))
+        container.binder.multibind(
+            list[Listener[Event]], to=[lambda event: None],
+        )
+        lanes = ListenerLanes(
+            1, queue_size=1, workers=1, timeout=timedelta(seconds=1),
+        )
+        bus = EventBus(container, lanes)
+
+        with tracer.span("POST /orders/", trace_id=SAMPLED) as root:
+            bus.emit(Event(command_id=uuid4()))
+        lanes.stop()
+        tracer.flush()
+
+        listener, = [
+            span for span in exporter.spans if span.span_id != root.span_id
+        ]
+        assert listener.trace_id == root.trace_id
+        assert listener.parent_id == root.span_id
+
+
+class TestRequestTrace:
+    def test_spans_from_route_down_to_repository(
+            self, api_client, coindesk, spans_path, container,
+    ):
+        request = CreateBuyOrder()
+
+        api_client.post("/orders/", json=request)
+        container.get(Tracer).flush()
+
+        spans = [
+            span
+            for line in spans_path.read_text().splitlines()
+            for span in json.loads(line)["resourceSpans"][0]["scopeSpans"][0][
+                "spans"
+            ]
+        ]
+        by_name = {span["name"]: span for span in spans}
+        assert {
+            "POST /orders/",
+            "command CreateBuyOrder",
+            "Service.create_buy_order_batch",
+            "CoinDesk current prices",
+            "ORMRepository.lock",
+            "ORMRepository.create",
+            "listener BuyOrderCache.warm",
+        } <= set(by_name)
+        assert len({span["traceId"] for span in spans}) == 1
+        command = by_name["command CreateBuyOrder"]
+        assert command["parentSpanId"] == by_name["POST /orders/"]["spanId"]
+        assert {
+            "key": "command_id",
+            "value": {"stringValue": request["request_id"]},
+        } in command["attributes"]
+
+    def test_command_outside_request_traced_by_its_id(
+            self, container, spans_path,
+    ):
+        tracer = container.get(Tracer)
+        command_id = uuid4()
+
+        with tracer.span("command", trace_id=command_id):
+            pass
+        tracer.flush()
+
+        assert command_id.hex in spans_path.read_text()
+
+    @fixture
+    def spans_path(self, tmp_path):
+        return tmp_path / "spans.json"
+
+    @fixture
+    def app(self, monkeypatch, spans_path) -> FastAPI:
+        monkeypatch.setenv("TRACE_EXPORT_PATH", str(spans_path))
+        monkeypatch.setenv("TRACE_SAMPLE_RATE", "1")
+        return create_app(Injector())
+
+
+class CollectingExporter(SpanExporter):
+    def __init__(self) -> None:
+        self.spans: List[Span] = []
+        self.threads: Set[str] = set()
+        self.exported = Signal()
+
+    def export(self, spans: Sequence[Span]) -> None:
+        self.spans.extend(spans)
+        self.threads.add(current_thread().name)
+        self.exported.set()
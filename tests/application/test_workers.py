@@ -0,0 +1,84 @@
+import asyncio
+from contextvars import ContextVar
+from datetime import timedelta
+from threading import Event, current_thread, main_thread
+from time import sleep
+from unittest.mock import Mock
+
+from pytest import fixture, raises
+
+from application.workers import BatchWorkers, WorkerPool
+
+request_id: ContextVar[str] = ContextVar("request_id")
+
+
+class TestWorkerPool:
+    def test_runs_inline_when_no_workers(self):
+        pool = WorkerPool(0)
+        assert self.run(pool, current_thread) is main_thread()
+
+    def test_runs_on_worker_thread_when_workers(self, pool):
+        worker = self.run(pool, current_thread)
+        assert worker is not main_thread()
+        assert worker.name.startswith("pipeline")
+
+    def test_passes_arguments_and_returns_result(self, pool):
+        assert self.run(pool, divmod, 7, 2) == (3, 1)
+
+    def test_raises_when_step_fails(self, pool):
+        with raises(ZeroDivisionError):
+            self.run(pool, divmod, 1, 0)
+
+    def test_step_sees_callers_context(self, pool):
+        async def in_request() -> str:
+            request_id.set("expected")
+            return await pool(request_id.get)
+
+        assert asyncio.run(in_request()) == "expected"
+
+    def test_nothing_when_shutting_down_without_workers(self):
+        WorkerPool(0).shutdown()
+
+    @staticmethod
+    def run(pool: WorkerPool, func, *args):
+        return asyncio.run(pool(func, *args))
+
+    @fixture
+    def pool(self) -> WorkerPool:
+        pool = WorkerPool(2)
+        yield pool
+        pool.shutdown()
+
+
+class TestBatchWorkers:
+    def test_drains_until_partial_batch(self):
+        step = Mock(side_effect=[2, 2, 1, 2])
+        workers = BatchWorkers(step, batch_size=2, every=timedelta(0))
+
+        assert workers.drain() == 5
+        assert step.call_count == 3
+
+    def test_workers_call_step_until_stopped(self):
+        called = Event()
+        workers = BatchWorkers(
+            lambda: called.set() or 0,
+            batch_size=1,
+            every=timedelta(milliseconds=1),
+            workers=2,
+            name="test",
+        )
+
+        workers.start()
+        called.wait()
+        workers.stop()
+
+    def test_workers_survive_step_failures(self):
+        step = Mock(side_effect=[RuntimeError, RuntimeError, 0, 0, 0])
+        workers = BatchWorkers(
+            step, batch_size=1, every=timedelta(milliseconds=1),
+        )
+
+        workers.start()
+        while step.call_count < 3:
+            sleep(0.001)
+        workers.stop()
@@ -1,3 +1,7 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
+from time import sleep
 from unittest.mock import ANY
 
 from hypothesis import HealthCheck, given, settings
@@ -5,7 +9,18 @@ from hypothesis.strategies import decimals, integers
 from pytest import fixture, mark, raises
 from requests import HTTPError
 
-from currency import BTCRate, Currency, ExchangeRateService
+from application.metrics import Metrics
+from currency import (
+    BTCRate,
+    CacheStats,
+    Currency,
+    ExchangeRateService,
+    RatePoller,
+    StaleExchangeRate,
+    exchange_rate,
+    pooled_session,
+)
+from tests.tools import Clock
 
 
 class TestExchangeRateService:
@@ -27,6 +42,224 @@ class TestExchangeRateService:
             with raises(HTTPError):
                 service.get_bitcoin_rate(Currency.EUR)
 
+    def test_prices_all_currencies_from_one_snapshot(self, coindesk, service):
+        coindesk.set_current(Decimal(2), Currency.EUR)
+        coindesk.set_current(Decimal(3), Currency.USD)
+
+        rates = service.get_bitcoin_rates([Currency.EUR, Currency.USD])
+
+        assert {rates[c].price for c in rates} == {Decimal(2), Decimal(3)}
+        assert len({rate.on_date for rate in rates.values()}) == 1
+        assert coindesk.requests_count == 1
+
+    def test_no_request_when_no_rates_needed(self, coindesk, service):
+        assert service.get_bitcoin_rates([]) == {}
+        assert coindesk.requests_count == 0
+
+    def test_fetches_with_connect_and_read_timeouts(self, coindesk, service):
+        service.get_bitcoin_rate(Currency.EUR)
+        assert coindesk.last_request.timeout == (3.0, 10.0)
+
     @fixture
     def service(self, container):
         return container.get(ExchangeRateService)
+
+
+class TestPooledSession:
+    def test_reuses_connections_from_pool(self):
+        session = pooled_session(pool_size=20, retries=3, backoff_factor=0.5)
+        adapter = session.get_adapter("https://api.coindesk.com/v1/")
+
+        assert adapter.poolmanager.connection_pool_kw["maxsize"] == 20
+        assert session.get_adapter("http://localhost/") is adapter
+
+    def test_retries_with_backoff_on_server_errors(self):
+        session = pooled_session(pool_size=20, retries=3, backoff_factor=0.5)
+        retry = session.get_adapter("https://api.coindesk.com/").max_retries
+
+        assert retry.total == 3
+        assert retry.backoff_factor == 0.5
+        assert 503 in retry.status_forcelist
+
+
+class TestCachedExchangeRateService:
+    def test_reuses_snapshot_when_within_ttl(self, coindesk, service):
+        cached = service.get_bitcoin_rate(Currency.EUR)
+        coindesk.set_current(Decimal(1), Currency.EUR)
+
+        assert service.get_bitcoin_rate(Currency.EUR) == cached
+        assert coindesk.requests_count == 1
+
+    def test_one_snapshot_covers_all_currencies(self, coindesk, service):
+        for currency in Currency:
+            service.get_bitcoin_rate(currency)
+
+        assert coindesk.requests_count == 1
+        assert service.stats == CacheStats(hits=2, misses=1, refreshes=1)
+
+    def test_fetches_again_when_ttl_expired(self, coindesk, service, clock):
+        service.get_bitcoin_rate(Currency.EUR)
+        coindesk.set_current(Decimal(1), Currency.EUR)
+        clock.advance(60)
+
+        assert service.get_bitcoin_rate(Currency.EUR).price == Decimal(1)
+        assert service.stats == CacheStats(hits=0, misses=2, refreshes=2)
+
+    def test_no_refresh_when_upstream_not_updated(
+            self, coindesk, service, clock,
+    ):
+        service.get_bitcoin_rate(Currency.EUR)
+        clock.advance(60)
+        service.get_bitcoin_rate(Currency.EUR)
+
+        assert service.stats == CacheStats(hits=0, misses=2, refreshes=1)
+
+    def test_exposes_fetch_latency_and_cache_results(
+            self, coindesk, settings, clock,
+    ):
+        metrics = Metrics()
+        service = ExchangeRateService(
+            settings.coindesk_api_url,
+            cache_ttl=timedelta(minutes=1),
+            metrics=metrics,
+        )
+
+        service.get_bitcoin_rate(Currency.EUR)
+        service.get_bitcoin_rate(Currency.EUR)
+
+        rendered = metrics.render()
+        assert "exchange_rate_fetch_duration_seconds_count 1" in rendered
+        assert 'exchange_rate_cache_total{result="hit"} 1' in rendered
+        assert 'exchange_rate_cache_total{result="miss"} 1' in rendered
+        assert "exchange_rate_refreshes_total 1" in rendered
+
+    def test_concurrent_misses_share_one_fetch(self, coindesk, service):
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            with coindesk.stalled():
+                rates = [
+                    pool.submit(service.get_bitcoin_rate, Currency.EUR)
+                    for _ in range(4)
+                ]
+                while not coindesk.requests_count:
+                    sleep(0.01)
+                sleep(0.1)
+
+            assert len({rate.result().price for rate in rates}) == 1
+
+        assert coindesk.requests_count == 1
+        assert service.stats == CacheStats(hits=3, misses=1, refreshes=1)
+
+    def test_counts_every_lookup_of_concurrent_callers(
+            self, coindesk, service,
+    ):
+        def look_up(_) -> None:
+            for _ in range(500):
+                service.get_bitcoin_rate(Currency.EUR)
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(look_up, range(8)))
+
+        assert service.stats == CacheStats(
+            hits=8 * 500 - 1, misses=1, refreshes=1,
+        )
+
+    @fixture
+    def service(self, settings, clock) -> ExchangeRateService:
+        return ExchangeRateService(
+            settings.coindesk_api_url, cache_ttl=timedelta(minutes=1),
+        )
+
+
+class TestPolledExchangeRateService:
+    def test_raises_when_nothing_polled_yet(self, coindesk, service):
+        with raises(StaleExchangeRate) as stale:
+            service.get_bitcoin_rate(Currency.EUR)
+
+        assert stale.value.last_update is None
+        assert coindesk.requests_count == 0
+
+    def test_serves_polled_snapshot_without_fetching(self, coindesk, service):
+        polled = service.refresh()
+        coindesk.set_current(Decimal(1), Currency.EUR)
+
+        rate = service.get_bitcoin_rate(Currency.EUR)
+
+        assert rate.price == polled.prices["EUR"]
+        assert coindesk.requests_count == 1
+
+    def test_serves_snapshot_when_within_max_staleness(
+            self, coindesk, service, clock,
+    ):
+        polled = service.refresh()
+        clock.advance(5 * 60)
+
+        assert service.get_bitcoin_rate(Currency.EUR).on_date == polled.updated
+
+    def test_raises_when_snapshot_older_than_max_staleness(
+            self, coindesk, service, clock,
+    ):
+        polled = service.refresh()
+        clock.advance(5 * 60 + 1)
+
+        with raises(StaleExchangeRate) as stale:
+            service.get_bitcoin_rate(Currency.EUR)
+
+        assert stale.value.last_update == polled.updated
+        assert service.stats == CacheStats(hits=0, misses=1, refreshes=1)
+
+    @fixture
+    def service(self, settings, clock) -> ExchangeRateService:
+        return ExchangeRateService(
+            settings.coindesk_api_url, max_staleness=timedelta(minutes=5),
+        )
+
+
+class TestRatePoller:
+    def test_polls_immediately_when_started(self, coindesk, service, poller):
+        poller.start()
+        poller.stop()
+
+        assert coindesk.requests_count == 1
+        assert service.get_bitcoin_rate(Currency.EUR)
+
+    def test_keeps_polling_until_stopped(self, coindesk, settings):
+        service = ExchangeRateService(
+            settings.coindesk_api_url, max_staleness=timedelta(minutes=5),
+        )
+        poller = RatePoller(service, every=timedelta(milliseconds=10))
+
+        poller.start()
+        while coindesk.requests_count < 3:
+            sleep(0.01)
+        poller.stop()
+
+        assert service.stats.refreshes >= 1
+
+    def test_keeps_last_snapshot_when_poll_fails(
+            self, coindesk, service, poller,
+    ):
+        poller.poll()
+        with coindesk.temporal_issue(503):
+            poller.poll()
+
+        assert service.get_bitcoin_rate(Currency.EUR)
+
+    def test_nothing_when_stopped_before_start(self, poller):
+        poller.stop()
+
+    @fixture
+    def service(self, settings, clock) -> ExchangeRateService:
+        return ExchangeRateService(
+            settings.coindesk_api_url, max_staleness=timedelta(minutes=5),
+        )
+
+    @fixture
+    def poller(self, service) -> RatePoller:
+        return RatePoller(service, every=timedelta(hours=1))
+
+
+@fixture
+def clock(monkeypatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(exchange_rate, "monotonic", clock)
+    return clock
@@ -0,0 +1,66 @@
+from decimal import Decimal
+
+from hypothesis import given
+from hypothesis.strategies import decimals, integers, lists
+
+from currency import (
+    BTC,
+    Fiat,
+    bulk_from_fiat_units,
+    bulk_from_satoshi,
+    from_fiat_units,
+    from_satoshi,
+    satoshis_for,
+    to_fiat_units,
+    to_satoshi,
+)
+
+
+class TestSatoshi:
+    def test_rounds_up_fractions_of_satoshi(self):
+        assert to_satoshi(Decimal("0.000000011")) == 2
+
+    def test_converts_whole_bitcoins(self):
+        assert to_satoshi(3) == 3 * 10 ** 8
+
+    @given(bitcoins=decimals(min_value=0, max_value=21_000_000, places=8))
+    def test_round_trips_through_satoshis(self, bitcoins):
+        assert from_satoshi(to_satoshi(bitcoins)) == bitcoins
+
+
+class TestFiatUnits:
+    def test_rounds_half_even(self):
+        assert to_fiat_units(Decimal("0.00005")) == 0
+        assert to_fiat_units(Decimal("0.00015")) == 2
+
+    @given(amount=decimals(min_value=0, max_value=10 ** 9, places=4))
+    def test_round_trips_through_fiat_units(self, amount):
+        assert from_fiat_units(to_fiat_units(amount)) == amount
+
+
+class TestSatoshisFor:
+    @given(
+        paid=decimals(min_value=0, max_value=1_000_000_000, places=4),
+        price=decimals(min_value=Decimal("0.0001"), max_value=10 ** 6,
+                       places=4),
+    )
+    def test_matches_decimal_bitcoin_amount(self, paid, price):
+        expected = BTC(Fiat(paid) / Fiat(price))
+
+        bought = satoshis_for(to_fiat_units(paid), to_fiat_units(price))
+
+        assert from_satoshi(bought) == expected
+
+
+class TestBulkConversion:
+    @given(column=lists(integers(min_value=0, max_value=10 ** 18)))
+    def test_matches_per_value_conversion(self, column):
+        assert bulk_from_satoshi(column) == [
+            from_satoshi(value) for value in column
+        ]
+        assert bulk_from_fiat_units(column) == [
+            from_fiat_units(value) for value in column
+        ]
+
+    def test_keeps_scale_of_each_value(self):
+        assert str(bulk_from_satoshi([1, 10 ** 8])[1]) == "1.00000000"
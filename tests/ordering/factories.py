@@ -21,8 +21,8 @@ class DBBuyOrderFactory(Factory):
         model = DBBuyOrder
 
     request_id = Faker("uuid4")
-    paid = Faker("pydecimal", right_digits=4, min_value=1, max_value=400)
-    bought = Faker("pydecimal", right_digits=8, min_value=1, max_value=10)
+    paid = Faker("pyint", min_value=10_000, max_value=4_000_000)
+    bought = Faker("pyint", min_value=10 ** 8, max_value=10 ** 9)
     exchange_rate = SubFactory(BTCRateFactory)
 
 
@@ -0,0 +1,89 @@
+from uuid import uuid4
+
+from pytest import fixture, raises
+from sqlalchemy.orm import sessionmaker
+
+from ordering.db import BalanceLedger, SQLAdmissionRepository
+from ordering.db.buy_order import DBBuyOrder
+from ordering.errors import BalanceLimitExceeded, OrderAlreadyExists
+from tests.currency.factories import BTCRateFactory as BTCRate
+
+LIMIT = 10
+
+
+class TestSQLAdmissionRepository:
+    def test_creates_order_and_books_it_in_ledger(
+            self, repository, ledger, session,
+    ):
+        request_id, rate = uuid4(), BTCRate()
+        with repository.lock(2) as balance:
+            assert balance == 0
+            order = repository.create(request_id, 7, 2, rate)
+            order_id = order.id
+
+        stored = session.query(DBBuyOrder).one()
+        assert (stored.id, stored.request_id) == (order_id, request_id)
+        assert (stored.paid, stored.bought) == (7, 2)
+        assert stored.exchange_rate == rate
+        assert stored.when_created is not None
+        assert ledger.verify().ledger == 2
+        assert ledger.verify().consistent
+
+    def test_raises_when_order_would_exceed_limit(
+            self, repository, ledger, session,
+    ):
+        with repository.lock():
+            repository.create(uuid4(), 1, 6, BTCRate())
+
+        with repository.lock():
+            with raises(BalanceLimitExceeded) as exceeded:
+                repository.create(uuid4(), 1, 5, BTCRate())
+
+        assert exceeded.value.limit == LIMIT
+        assert session.query(DBBuyOrder).count() == 1
+        assert ledger.verify().ledger == 6
+
+    def test_lock_yields_booked_balance(self, repository):
+        with repository.lock():
+            repository.create(uuid4(), 1, 6, BTCRate())
+
+        with repository.lock() as balance:
+            assert balance == 6
+
+    def test_reports_existing_order_before_checking_limit(self, repository):
+        request_id = uuid4()
+        with repository.lock():
+            order_id = repository.create(
+                request_id, 1, LIMIT, BTCRate(),
+            ).id
+
+        with repository.lock():
+            with raises(OrderAlreadyExists) as exists:
+                repository.create(request_id, 1, LIMIT, BTCRate())
+
+        assert exists.value.order_id == order_id
+
+    def test_nothing_booked_when_rolled_back(self, repository, ledger):
+        with raises(RuntimeError):
+            with repository.lock():
+                repository.create(uuid4(), 1, 1, BTCRate())
+                raise RuntimeError
+
+        assert ledger.verify().ledger == 0
+        assert ledger.verify().orders == 0
+
+    @fixture
+    def repository(self, container) -> SQLAdmissionRepository:
+        return container.create_object(
+            SQLAdmissionRepository, additional_kwargs={"limit": LIMIT},
+        )
+
+    @fixture
+    def ledger(self, container) -> BalanceLedger:
+        return container.get(BalanceLedger)
+
+    @fixture
+    def session(self, container):
+        session = container.get(sessionmaker)()
+        yield session
+        session.close()
@@ -0,0 +1,141 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from time import sleep
+from unittest.mock import Mock
+from uuid import uuid4
+
+from pytest import fixture, raises
+
+from application.metrics import Metrics
+from application.tracing import Span, SpanExporter, Tracer, current_span
+from currency import to_satoshi
+from ordering import OrderBatcher, Service
+from ordering.errors import BalanceLimitExceeded
+
+from .factories import CreateBuyOrderFactory as CreateBuyOrder
+
+
+class TestOrderBatcher:
+    def test_admits_concurrent_commands_in_one_batch(
+            self, service, batcher, metrics,
+    ):
+        commands = [CreateBuyOrder() for _ in range(4)]
+        service.create_buy_order_batch.side_effect = (
+            lambda batch: [command.id for command in batch]
+        )
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            order_ids = list(pool.map(batcher, commands))
+
+        assert order_ids == [command.id for command in commands]
+        assert service.create_buy_order_batch.call_count == 1
+        rendered = metrics.render()
+        assert "order_batches_total 1" in rendered
+        assert 'order_batch_size_bucket{le="2"} 0' in rendered
+        assert 'order_batch_size_bucket{le="5"} 1' in rendered
+        assert "order_batch_size_sum 4" in rendered
+
+    def test_each_caller_gets_own_outcome(self, service):
+        batcher = OrderBatcher(service, window=timedelta(seconds=5), max_size=2)
+        admitted, rejected = CreateBuyOrder(), CreateBuyOrder()
+        exceeded = BalanceLimitExceeded(to_satoshi(100))
+        service.create_buy_order_batch.side_effect = lambda batch: [
+            exceeded if command is rejected else command.id
+            for command in batch
+        ]
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            admitted_result = pool.submit(batcher, admitted)
+            rejected_result = pool.submit(batcher, rejected)
+
+        assert admitted_result.result() == admitted.id
+        with raises(BalanceLimitExceeded):
+            rejected_result.result()
+        batcher.stop()
+
+    def test_batch_traced_in_first_callers_trace(self, service):
+        exporter = Mock(SpanExporter)
+        tracer = Tracer(exporter, sample_rate=1.0)
+        batcher = OrderBatcher(
+            service, window=timedelta(seconds=5), max_size=2, tracer=tracer,
+        )
+        admitted_in = []
+        service.create_buy_order_batch.side_effect = lambda batch: (
+            admitted_in.append(current_span()) or [c.id for c in batch]
+        )
+
+        def call(name: str) -> Span:
+            with tracer.span(name) as span:
+                batcher(CreateBuyOrder())
+            return span
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            first = pool.submit(call, "first")
+            sleep(0.05)
+            second = pool.submit(call, "second")
+        batcher.stop()
+
+        batch_span, = admitted_in
+        first, second = first.result(), second.result()
+        assert batch_span.name == "OrderBatcher.admit"
+        assert batch_span.trace_id == first.trace_id
+        assert batch_span.parent_id == first.span_id
+        assert batch_span.links == [(second.trace_id, second.span_id)]
+
+    def test_flushes_partial_batch_when_window_elapsed(
+            self, service, metrics,
+    ):
+        batcher = OrderBatcher(
+            service,
+            window=timedelta(milliseconds=10),
+            max_size=100,
+            metrics=metrics,
+        )
+        order_id = uuid4()
+        service.create_buy_order_batch.return_value = [order_id]
+
+        assert batcher(CreateBuyOrder()) == order_id
+        assert "order_batch_size_sum 1" in metrics.render()
+        batcher.stop()
+
+    def test_all_callers_fail_when_batch_fails(self, service, batcher):
+        service.create_buy_order_batch.side_effect = ConnectionError
+
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            results = [pool.submit(batcher, CreateBuyOrder()) for _ in range(4)]
+
+        for result in results:
+            with raises(ConnectionError):
+                result.result()
+
+    def test_admits_collected_commands_when_stopped(self, service, batcher):
+        service.create_buy_order_batch.side_effect = (
+            lambda batch: [command.id for command in batch]
+        )
+        command = CreateBuyOrder()
+
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            result = pool.submit(batcher, command)
+            sleep(0.1)
+            batcher.stop()
+
+        assert result.result() == command.id
+
+    def test_nothing_when_stopped_before_first_command(self, batcher):
+        batcher.stop()
+
+    @fixture
+    def service(self) -> Service:
+        return Mock(Service)
+
+    @fixture
+    def metrics(self) -> Metrics:
+        return Metrics()
+
+    @fixture
+    def batcher(self, service, metrics) -> OrderBatcher:
+        batcher = OrderBatcher(
+            service, window=timedelta(seconds=5), max_size=4, metrics=metrics,
+        )
+        yield batcher
+        batcher.stop()
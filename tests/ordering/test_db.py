@@ -1,24 +1,36 @@
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from decimal import Decimal
+from threading import Event
+from time import sleep
 from uuid import uuid4
 
 from hypothesis import HealthCheck, given, settings
-from hypothesis.strategies import decimals
-from pytest import fixture, mark
+from hypothesis.strategies import decimals, integers
+from pytest import fixture, mark, raises
+from sqlalchemy.exc import NoResultFound
 from sqlalchemy.orm import Session, sessionmaker
 
 import currency
 import ordering.db
-from currency import BTC, Currency
+from application.metrics import Metrics
+from currency import Currency, satoshis_for, to_fiat_units
+from ordering.db import BalanceCheck
+from ordering.db.balance import DBBuyOrdersBalance
 from ordering.db.buy_order import DBBuyOrder
+from ordering.db.types import PreciseNumber
+from ordering.errors import OrderAlreadyExists
 from tests.currency.factories import BTCRateFactory as BTCRate
-from tests.tools import round_up, to_precision
+from tests.tools import to_precision
+
+from .factories import DBBuyOrderFactory
 
 
 class TestORMRepository:
     def test_properly_creates_buy_order(self, session, repository):
         request_id, rate = uuid4(), BTCRate()
-        paid, bought = Decimal(100), BTC(rate.price/100)
+        paid = to_fiat_units(Decimal(100))
+        bought = satoshis_for(paid, to_fiat_units(rate.price))
 
         with repository.lock():
             order = repository.create(request_id, paid, bought, rate)
@@ -30,7 +42,8 @@ class TestORMRepository:
 
     def test_can_read_when_using_balance(self, session, repository):
         request_id, rate = uuid4(), BTCRate()
-        paid, bought = Decimal(100), BTC(rate.price/100)
+        paid = to_fiat_units(Decimal(100))
+        bought = satoshis_for(paid, to_fiat_units(rate.price))
 
         with repository.lock():
             order_id = repository.create(request_id, paid, bought, rate).id
@@ -39,9 +52,9 @@ class TestORMRepository:
             assert session.query(DBBuyOrder).one().id == order_id
 
     @given(
-        paid=decimals(min_value=0.0001, max_value=100_000_000, allow_nan=False),
+        paid=integers(min_value=1, max_value=10 ** 12),
         rate=decimals(min_value=0.0001, max_value=100_000_000, allow_nan=False),
-        bought=decimals(min_value=0.0000_0001, max_value=100, allow_nan=False),
+        bought=integers(min_value=1, max_value=10 ** 10),
     )
     @settings(suppress_health_check=[HealthCheck.function_scoped_fixture])
     @mark.slow
@@ -56,9 +69,126 @@ class TestORMRepository:
         session.expunge_all()
 
         order = session.query(DBBuyOrder).filter_by(id=order_id).one()
-        assert order.paid == to_precision(paid, precision=4)
+        assert order.paid == paid
         assert order.exchange_rate.price == to_precision(rate, precision=4)
-        assert order.bought == round_up(bought, precision=8)
+        assert order.bought == bought
+
+    def test_balance_includes_created_orders(self, repository):
+        rate = BTCRate()
+        with repository.lock() as balance:
+            assert balance == 0
+            repository.create(uuid4(), 1_000_000, 150_000_000, rate)
+            repository.create(uuid4(), 1_000_000, 25_000_000, rate)
+
+        with repository.lock() as balance:
+            assert balance == 175_000_000
+
+    def test_balance_unchanged_when_creation_rolled_back(self, repository):
+        with raises(RuntimeError):
+            with repository.lock():
+                repository.create(uuid4(), 10_000, 10 ** 8, BTCRate())
+                raise RuntimeError
+
+        with repository.lock() as balance:
+            assert balance == 0
+
+    def test_concurrent_locks_keep_their_own_transactions(self, repository):
+        locked, rate = Event(), BTCRate()
+
+        def create(satoshis: int) -> None:
+            with repository.lock():
+                locked.set()
+                sleep(0.1)
+                repository.create(uuid4(), 10_000, satoshis, rate)
+
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            first = pool.submit(create, 1)
+            locked.wait()
+            second = pool.submit(create, 2)
+            first.result(), second.result()
+
+        with repository.lock() as balance:
+            assert balance == 3
+
+    def test_raises_when_order_for_request_exists(self, repository):
+        request_id, rate = uuid4(), BTCRate()
+        with repository.lock():
+            order_id = repository.create(request_id, 10_000, 1, rate).id
+
+        with repository.lock():
+            with raises(OrderAlreadyExists) as exists:
+                repository.create(request_id, 20_000, 2, rate)
+
+        assert exists.value.order_id == order_id
+        with repository.lock() as balance:
+            assert balance == 1
+
+    def test_finds_order_ids_of_created_orders(self, repository):
+        created, missing, rate = uuid4(), uuid4(), BTCRate()
+        with repository.lock():
+            order = repository.create(created, 10_000, 1, rate)
+            order_id = order.id
+
+        assert repository.get_order_ids([created, missing]) == {
+            created: order_id,
+        }
+        assert repository.get_order_ids([]) == {}
+
+    def test_times_waiting_for_and_holding_lock(self, container, repository):
+        with raises(ValueError):
+            with repository.lock():
+                raise ValueError
+
+        with repository.lock():
+            pass
+
+        rendered = container.get(Metrics).render()
+        assert "order_lock_wait_seconds_count 2" in rendered
+        assert "order_lock_hold_seconds_count 2" in rendered
+
+    def test_no_hold_time_when_lock_not_taken(
+            self, container, session, repository,
+    ):
+        session.query(DBBuyOrdersBalance).delete()
+        session.commit()
+
+        with raises(NoResultFound):
+            with repository.lock():
+                pass
+
+        assert "order_lock_hold_seconds_count" not in (
+            container.get(Metrics).render()
+        )
+
+    @fixture
+    def repository(self, container) -> ordering.db.ORMRepository:
+        return container.create_object(ordering.db.ORMRepository)
+
+
+class TestBalanceLedger:
+    def test_consistent_when_no_orders(self, ledger):
+        assert ledger.verify() == BalanceCheck(ledger=0, orders=0)
+        assert ledger.verify().consistent
+
+    def test_consistent_when_orders_created(self, ledger, repository):
+        with repository.lock():
+            repository.create(uuid4(), 10_000, 50_000_000, BTCRate())
+
+        assert ledger.verify() == BalanceCheck(
+            ledger=50_000_000, orders=50_000_000,
+        )
+
+    def test_inconsistent_when_order_bypassed_ledger(self, ledger, session):
+        session.add(DBBuyOrderFactory(bought=2))
+        session.commit()
+
+        check = ledger.verify()
+        assert check == BalanceCheck(ledger=0, orders=2)
+        assert not check.consistent
+
+    @fixture
+    def ledger(self, container) -> ordering.db.BalanceLedger:
+        return container.get(ordering.db.BalanceLedger)
 
     @fixture
     def repository(self, container) -> ordering.db.ORMRepository:
@@ -70,3 +200,16 @@ def session(container) -> Session:
     session = container.get(sessionmaker)()
     yield session
     session.close()
+
+
+class TestPreciseNumber:
+    def test_scales_to_integer_and_back(self):
+        column = PreciseNumber(4)
+
+        stored = column.process_bind_param(Decimal("1.23455"), None)
+
+        assert stored == 12346
+        assert column.process_result_value(stored, None) == Decimal("1.2346")
+
+    def test_passes_null_through(self):
+        assert PreciseNumber(4).process_result_value(None, None) is None
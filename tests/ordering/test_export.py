@@ -0,0 +1,45 @@
+import json
+from decimal import Decimal
+
+from currency import Currency
+from ordering.export import ExportFormat, encode_orders
+
+from .factories import BuyOrderFactory as BuyOrder
+
+
+class TestEncodeOrders:
+    def test_one_json_document_per_line(self):
+        chunks = [BuyOrder.build_batch(2), BuyOrder.build_batch(1)]
+
+        encoded = list(encode_orders(chunks, ExportFormat.NDJSON))
+
+        assert len(encoded) == len(chunks)
+        lines = "".join(encoded).splitlines()
+        assert [json.loads(line)["id"] for line in lines] == [
+            str(order.id) for chunk in chunks for order in chunk
+        ]
+
+    def test_csv_with_header_and_exact_amounts(self):
+        order = BuyOrder(
+            bitcoins=Decimal("0.00000001"),
+            bought_for=Decimal("1.5000"),
+            currency=Currency.EUR,
+        )
+
+        encoded = "".join(encode_orders([[order]], ExportFormat.CSV))
+
+        assert encoded.splitlines() == [
+            "id,request_id,bitcoins,bought_for,currency",
+            f"{order.id},{order.request_id},0.00000001,1.5000,EUR",
+        ]
+
+    def test_nothing_encoded_lazily_before_iterating(self):
+        def chunks():
+            raise AssertionError("chunks read too early")
+            yield  # pragma: no cover
+
+        encode_orders(chunks(), ExportFormat.NDJSON)
+
+    def test_media_types(self):
+        assert ExportFormat.NDJSON.media_type == "application/x-ndjson"
+        assert ExportFormat.CSV.media_type == "text/csv"
@@ -0,0 +1,188 @@
+from datetime import timedelta
+from uuid import uuid4
+
+from pytest import fixture, raises
+from sqlalchemy import func, update
+from sqlalchemy.orm import sessionmaker
+
+from application.db import Transaction
+from ordering.db import BalanceLedger, BudgetLease, LeasedRepository
+from ordering.db.balance import DBBudgetLease
+from ordering.db.buy_order import DBBuyOrder
+from ordering.errors import BudgetLeaseExpired
+from tests.currency.factories import BTCRateFactory as BTCRate
+
+LIMIT = 100
+
+
+class TestBudgetLease:
+    def test_reserves_slice_of_limit_in_ledger(self, new_lease, ledger):
+        with new_lease(size=10).hold(0) as lease:
+            assert lease.balance == LIMIT - 10
+
+        assert ledger.verify().ledger == 10
+        assert ledger.verify().consistent
+
+    def test_reserves_expected_bitcoins_over_slice_size(self, new_lease):
+        with new_lease(size=10).hold(25) as lease:
+            assert lease.balance == LIMIT - 25
+
+    def test_never_reserves_over_remaining_limit(self, new_lease, ledger):
+        with new_lease(size=60).hold(0):
+            pass
+
+        with new_lease(size=10).hold(50) as lease:
+            assert lease.balance == LIMIT - 40
+
+        assert ledger.verify().ledger == LIMIT
+
+    def test_tops_up_lease_when_expected_over_remaining(
+            self, new_lease, ledger,
+    ):
+        lease = new_lease(size=10)
+        with lease.hold(0):
+            pass
+
+        with lease.hold(15) as held:
+            assert held.balance == LIMIT - 15
+
+        assert ledger.verify() == ledger.verify().__class__(
+            ledger=15, orders=0, leased=15,
+        )
+
+    def test_releases_unused_bitcoins(self, new_lease, ledger):
+        lease = new_lease(size=10)
+        with lease.hold(0):
+            pass
+
+        lease.release()
+        lease.release()
+
+        assert ledger.verify().ledger == 0
+        assert ledger.verify().consistent
+
+    def test_release_skips_lease_reclaimed_by_others(
+            self, new_lease, ledger,
+    ):
+        crashed = new_lease(size=60, ttl=timedelta(0))
+        with crashed.hold(0):
+            pass
+        with new_lease(size=10).hold(0):
+            pass
+
+        crashed.release()
+
+        assert ledger.verify().ledger == 10
+        assert ledger.verify().consistent
+
+    def test_reclaims_leases_of_crashed_holders(self, new_lease, ledger):
+        with new_lease(size=60, ttl=timedelta(0)).hold(0):
+            pass
+
+        with new_lease(size=70).hold(0) as lease:
+            assert lease.balance == LIMIT - 70
+
+        assert ledger.verify().ledger == 70
+        assert ledger.verify().consistent
+
+    def test_renews_own_lease_when_reclaimed_by_others(
+            self, new_lease, ledger,
+    ):
+        lease = new_lease(size=10, ttl=timedelta(0))
+        with lease.hold(0):
+            pass
+
+        with lease.hold(0) as held:
+            assert held.balance == LIMIT - 10
+
+        assert ledger.verify().ledger == 10
+
+    @fixture
+    def ledger(self, container) -> BalanceLedger:
+        return container.get(BalanceLedger)
+
+
+class TestLeasedRepository:
+    def test_creates_orders_against_lease(self, repository, ledger, session):
+        with repository.lock(1) as balance:
+            assert balance == LIMIT - 10
+            repository.create(uuid4(), 1, 1, BTCRate())
+
+        with repository.lock(0) as balance:
+            assert balance == LIMIT - 9
+
+        check = ledger.verify()
+        assert (check.orders, check.leased) == (1, 9)
+        assert check.consistent
+
+    def test_nothing_created_when_lease_expired(
+            self, repository, transaction, session,
+    ):
+        with repository.lock(0):
+            pass
+        with transaction() as expiring:
+            expiring.execute(
+                update(DBBudgetLease).values(
+                    expires_at=func.now() - timedelta(seconds=1)
+                )
+            )
+
+        with raises(BudgetLeaseExpired):
+            with repository.lock(1):
+                repository.create(uuid4(), 1, 1, BTCRate())
+
+        assert session.query(DBBuyOrder).count() == 0
+
+    def test_retry_after_lease_expired_uses_fresh_lease(
+            self, repository, transaction, ledger,
+    ):
+        with repository.lock(0):
+            pass
+        with transaction() as expiring:
+            expiring.execute(
+                update(DBBudgetLease).values(
+                    expires_at=func.now() - timedelta(seconds=1)
+                )
+            )
+        with raises(BudgetLeaseExpired):
+            with repository.lock(1):
+                repository.create(uuid4(), 1, 1, BTCRate())
+
+        with repository.lock(1):
+            repository.create(uuid4(), 1, 1, BTCRate())
+
+        check = ledger.verify()
+        assert (check.orders, check.leased) == (1, 9)
+        assert check.consistent
+
+    @fixture
+    def repository(self, container, new_lease) -> LeasedRepository:
+        return container.create_object(
+            LeasedRepository, additional_kwargs={"lease": new_lease(size=10)},
+        )
+
+    @fixture
+    def ledger(self, container) -> BalanceLedger:
+        return container.get(BalanceLedger)
+
+
+@fixture
+def transaction(container) -> Transaction:
+    return container.get(Transaction)
+
+
+@fixture
+def new_lease(transaction):
+    def lease(size: int, ttl: timedelta = timedelta(minutes=1)) -> BudgetLease:
+        return BudgetLease(
+            transaction, limit=LIMIT, size=size, ttl=ttl,
+        )
+
+    return lease
+
+
+@fixture
+def session(container):
+    session = container.get(sessionmaker)()
+    yield session
+    session.close()
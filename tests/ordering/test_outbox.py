@@ -0,0 +1,253 @@
+from datetime import timedelta
+from time import sleep
+from typing import Callable
+from unittest.mock import Mock
+from uuid import uuid4
+
+from pytest import fixture
+from sqlalchemy import func
+from sqlalchemy.orm import sessionmaker
+
+from application.bus import EventBus, Listener, ListenerLanes
+from application.db import Transaction
+from currency import from_fiat_units, from_satoshi
+from ordering.db import ORMRepository, OutboxPublisher, OutboxRelay
+from ordering.db.outbox import DBOutboxEvent
+from ordering.events import BuyOrderCreated
+from tests.currency.factories import BTCRateFactory as BTCRate
+
+
+class TestOutboxPublisher:
+    def test_events_stored_with_order_instead_of_emitted(
+            self, create_order, listener, relay,
+    ):
+        event = create_order()
+
+        listener.assert_not_called()
+        assert relay.lag().pending == 1
+        assert relay.relay() == 1
+        listener.assert_called_once_with(event)
+        assert relay.lag().pending == 0
+
+    def test_nothing_stored_when_order_rolled_back(self, repository, relay):
+        try:
+            with repository.lock():
+                repository.emit(BuyOrderCreated(
+                    command_id=uuid4(),
+                    order_id=uuid4(),
+                    bitcoins=1,
+                    paid=1,
+                    currency="EUR",
+                ))
+                raise RuntimeError
+        except RuntimeError:
+            pass
+
+        assert relay.lag().pending == 0
+
+
+class TestOutboxRelay:
+    def test_retries_event_later_when_listener_fails(
+            self, create_order, listener, relay, session,
+    ):
+        create_order()
+        listener.side_effect = RuntimeError
+
+        assert relay.relay() == 1
+        assert relay.relay() == 0
+        assert relay.lag().pending == 1
+        entry = session.query(DBOutboxEvent).one()
+        assert entry.attempts == 1
+        assert entry.last_error == "RuntimeError()"
+        assert entry.next_attempt_at > entry.created_at
+
+    def test_backoff_doubles_with_every_attempt(
+            self, create_order, listener, relay_with, session,
+    ):
+        relay = relay_with(retry_backoff=timedelta(hours=1))
+        create_order()
+        listener.side_effect = RuntimeError
+        relay.relay()
+        session.query(DBOutboxEvent).update(
+            {DBOutboxEvent.next_attempt_at: func.now()},
+        )
+        session.commit()
+
+        relay.relay()
+
+        entry = session.query(DBOutboxEvent).one()
+        assert entry.attempts == 2
+        assert entry.next_attempt_at - entry.created_at > timedelta(hours=2)
+
+    def test_dead_letter_after_max_attempts(
+            self, create_order, listener, relay_with, caplog,
+    ):
+        relay = relay_with(max_attempts=2, retry_backoff=timedelta(0))
+        create_order()
+        create_order()
+        listener.side_effect = [RuntimeError, None, RuntimeError]
+
+        assert relay.drain() == 3
+        lag = relay.lag()
+        assert (lag.pending, lag.dead) == (0, 1)
+        assert "dead after 2 attempts" in caplog.text
+
+    def test_failing_events_do_not_block_later_ones(
+            self, create_order, listener, relay,
+    ):
+        for _ in range(3):
+            create_order()
+        listener.side_effect = [RuntimeError, RuntimeError, None]
+
+        assert relay.drain() == 3
+        assert listener.call_count == 3
+        assert relay.lag().pending == 2
+
+    def test_retries_events_of_unregistered_type(
+            self, create_order, listener, relay_with,
+    ):
+        relay = relay_with(event_types=[])
+        create_order()
+
+        assert relay.relay() == 1
+        listener.assert_not_called()
+        assert relay.lag().pending == 1
+
+    def test_delivers_before_deleting_when_events_go_on_lanes(
+            self, container, create_order, listener,
+    ):
+        lanes = ListenerLanes(
+            1, queue_size=10, workers=1, timeout=timedelta(seconds=1),
+        )
+        relay = OutboxRelay(
+            container.get(Transaction),
+            EventBus(container, lanes),
+            event_types=[BuyOrderCreated],
+            retry_backoff=timedelta(0),
+        )
+        create_order()
+        listener.side_effect = RuntimeError
+
+        relay.relay()
+        assert relay.lag().pending == 1
+        listener.side_effect = None
+        relay.relay()
+        assert relay.lag().pending == 0
+        assert listener.call_count == 2
+        lanes.stop()
+
+    def test_drains_outbox_in_batches(self, create_order, listener, relay):
+        for _ in range(3):
+            create_order()
+
+        assert relay.drain() == 3
+        assert listener.call_count == 3
+
+    def test_skips_events_claimed_by_other_worker(
+            self, create_order, listener, relay, session,
+    ):
+        create_order()
+        session.query(DBOutboxEvent).with_for_update().all()
+
+        assert relay.relay() == 0
+        session.rollback()
+        assert relay.relay() == 1
+
+    def test_lag_of_oldest_pending_event(self, create_order, relay):
+        assert relay.lag().oldest == timedelta(0)
+        create_order()
+        sleep(0.01)
+
+        lag = relay.lag()
+        assert lag.pending == 1
+        assert lag.oldest > timedelta(0)
+
+    def test_workers_deliver_until_stopped(
+            self, create_order, listener, relay,
+    ):
+        relay.start()
+        create_order()
+        while not listener.called:
+            sleep(0.01)
+        relay.stop()
+
+        assert relay.lag().pending == 0
+
+    def test_relays_next_batch_at_once_when_batch_full(
+            self, container, create_order, listener,
+    ):
+        relay = OutboxRelay(
+            container.get(Transaction),
+            container.get(EventBus),
+            event_types=[BuyOrderCreated],
+            batch_size=1,
+            every=timedelta(hours=1),
+        )
+        create_order(), create_order()
+
+        relay.start()
+        while listener.call_count < 2:
+            sleep(0.01)
+        relay.stop()
+
+    @fixture
+    def session(self, container):
+        session = container.get(sessionmaker)()
+        yield session
+        session.close()
+
+
+@fixture
+def listener(container) -> Listener[BuyOrderCreated]:
+    listener = Mock(Listener[BuyOrderCreated])
+    container.binder.multibind(
+        list[Listener[BuyOrderCreated]], to=[listener],
+    )
+    return listener
+
+
+@fixture
+def repository(container) -> ORMRepository:
+    return container.create_object(
+        ORMRepository, additional_kwargs={"publisher": OutboxPublisher()},
+    )
+
+
+@fixture
+def create_order(repository):
+    def create() -> BuyOrderCreated:
+        with repository.lock():
+            order = repository.create(uuid4(), 10_000, 10 ** 8, BTCRate())
+            event = BuyOrderCreated(
+                command_id=order.request_id,
+                order_id=order.id,
+                bitcoins=from_satoshi(order.bought),
+                paid=from_fiat_units(order.paid),
+                currency=order.exchange_rate.currency,
+            )
+            repository.emit(event)
+        return event
+
+    return create
+
+
+@fixture
+def relay_with(container) -> Callable[..., OutboxRelay]:
+    def create(**options) -> OutboxRelay:
+        options = {
+            "event_types": [BuyOrderCreated],
+            "batch_size": 2,
+            "every": timedelta(milliseconds=10),
+            "workers": 2,
+            **options,
+        }
+        return OutboxRelay(
+            container.get(Transaction), container.get(EventBus), **options,
+        )
+
+    return create
+
+
+@fixture
+def relay(relay_with) -> OutboxRelay:
+    return relay_with()
@@ -1,10 +1,28 @@
+from datetime import datetime, timedelta, timezone
+from typing import Callable, List
+from unittest.mock import Mock
 from uuid import uuid4
 
-from pytest import fixture
+from pytest import fixture, raises
 from sqlalchemy.orm import sessionmaker
 
-from ordering.queries import BuyOrder, BuyOrdersQueries
+from application.bus import EventBus
+from application.db import ReadSessions
+from currency import Currency, from_fiat_units, from_satoshi
+from ordering.db.buy_order import DBBuyOrder as DBEntry
+from ordering.errors import InvalidCursor
+from ordering.events import BuyOrderCreated
+from ordering.queries import (
+    BuyOrder,
+    BuyOrderCache,
+    BuyOrdersQueries,
+    CommandStatus,
+    OrderCursor,
+    OrderStatus,
+)
+from tests.currency.factories import BTCRateFactory
 
+from .factories import BuyOrderFactory
 from .factories import DBBuyOrderFactory as DBBuyOrder
 
 
@@ -36,6 +54,36 @@ class TestGetOrder:
     def test_order_when_buy_order_found(self, queries, buy_order):
         assert queries.get_order(buy_order.id) == buy_order
 
+    def test_found_order_served_from_cache(self, queries, buy_order, session):
+        queries.get_order(buy_order.id)
+        session.query(DBEntry).filter_by(id=buy_order.id).delete()
+        session.commit()
+
+        assert queries.get_order(buy_order.id) == buy_order
+
+    def test_consistent_read_skips_remembered_miss(self, queries, session):
+        entry = DBBuyOrder()
+        assert queries.get_order(entry.id) is None
+        session.add(entry)
+        session.commit()
+
+        assert queries.get_order(entry.id) is None
+        assert queries.get_order(entry.id, consistent_with="0/0").id == (
+            entry.id
+        )
+
+    def test_created_order_served_without_query(self, container, queries):
+        order = BuyOrderFactory()
+        container.get(EventBus).emit(BuyOrderCreated(
+            command_id=order.request_id,
+            order_id=order.id,
+            bitcoins=order.bitcoins,
+            paid=order.bought_for,
+            currency=order.currency,
+        ))
+
+        assert queries.get_order(order.id) == order
+
     @fixture
     def buy_order(self, session):
         entry = DBBuyOrder()
@@ -45,8 +93,8 @@ class TestGetOrder:
         buy_order = BuyOrder(
             id=entry.id,
             request_id=entry.request_id,
-            bitcoins=entry.bought,
-            bought_for=entry.paid,
+            bitcoins=from_satoshi(entry.bought),
+            bought_for=from_fiat_units(entry.paid),
             currency=entry.exchange_rate.currency,
         )
 
@@ -54,6 +102,220 @@ class TestGetOrder:
         return buy_order
 
 
+class TestBuyOrderCache:
+    def test_loads_order_once(self, load):
+        cache = BuyOrderCache(10, negative_ttl=timedelta(minutes=1))
+        order = BuyOrderFactory()
+        load.return_value = order
+
+        assert cache.get(order.id, load) == order
+        assert cache.get(order.id, load) == order
+        load.assert_called_once_with(order.id)
+
+    def test_evicts_least_recently_used_order(self, load):
+        cache = BuyOrderCache(2, negative_ttl=timedelta(minutes=1))
+        first, second, third = BuyOrderFactory.create_batch(3)
+        load.return_value = None
+        for order in (first, second, first, third):
+            cache.put(order.id, order)
+
+        assert cache.get(first.id, load) == first
+        assert cache.get(third.id, load) == third
+        assert cache.get(second.id, load) is None
+        load.assert_called_once_with(second.id)
+
+    def test_remembers_missing_order_until_ttl_expires(self, load):
+        order_id = uuid4()
+        load.return_value = None
+        remembering = BuyOrderCache(10, negative_ttl=timedelta(minutes=1))
+        forgetting = BuyOrderCache(10, negative_ttl=timedelta(0))
+
+        for cache in (remembering, forgetting):
+            cache.get(order_id, load)
+            cache.get(order_id, load)
+
+        assert load.call_count == 3
+
+    def test_created_order_replaces_missing_one(self, load):
+        cache = BuyOrderCache(10, negative_ttl=timedelta(minutes=1))
+        order = BuyOrderFactory()
+        cache.put(order.id, None)
+
+        cache.put(order.id, order)
+
+        assert cache.get(order.id, load) == order
+        load.assert_not_called()
+
+    def test_missing_order_never_replaces_found_one(self, load):
+        cache = BuyOrderCache(10, negative_ttl=timedelta(minutes=1))
+        order = BuyOrderFactory()
+
+        def load_missing_while_order_created(order_id):
+            cache.put(order_id, order)
+            return None
+
+        load.side_effect = load_missing_while_order_created
+        cache.get(order.id, load)
+
+        assert cache.get(order.id, load) == order
+        load.assert_called_once_with(order.id)
+
+    def test_nothing_cached_when_disabled(self, load):
+        cache = BuyOrderCache(0, negative_ttl=timedelta(minutes=1))
+        order = BuyOrderFactory()
+        load.return_value = order
+        cache.put(order.id, order)
+
+        assert cache.get(order.id, load) == order
+        load.assert_called_once_with(order.id)
+
+    @fixture
+    def load(self) -> Mock:
+        return Mock()
+
+
+class TestListOrders:
+    def test_empty_page_when_no_orders(self, queries):
+        page = queries.list_orders(10)
+        assert page.orders == []
+        assert page.next_cursor is None
+
+    def test_pages_through_orders_oldest_first(self, queries, given_orders):
+        orders = given_orders(
+            NOW, NOW - timedelta(hours=1), NOW, NOW + timedelta(hours=1), NOW,
+        )
+
+        listed, cursor = [], None
+        while True:
+            page = queries.list_orders(2, after=cursor)
+            listed += page.orders
+            if (cursor := page.next_cursor) is None:
+                break
+
+        assert listed == [orders[1], orders[0], orders[2], orders[4], orders[3]]
+
+    def test_no_cursor_when_page_ends_at_last_order(
+            self, queries, given_orders,
+    ):
+        given_orders(NOW, NOW)
+        assert queries.list_orders(2).next_cursor is None
+
+    def test_filters_by_currency(self, queries, given_orders):
+        given_orders(NOW, currency=Currency.USD)
+        euro = given_orders(NOW, NOW, currency=Currency.EUR)
+
+        page = queries.list_orders(10, currency=Currency.EUR)
+
+        assert page.orders == euro
+
+    def test_filters_by_creation_range(self, queries, given_orders):
+        hour = timedelta(hours=1)
+        orders = given_orders(NOW - hour, NOW, NOW + hour)
+
+        page = queries.list_orders(
+            10,
+            created_from=NOW - hour,
+            created_to=(NOW + 2 * hour).replace(tzinfo=timezone(hour)),
+        )
+
+        assert page.orders == orders[:2]
+
+    def test_cursor_survives_encoding(self):
+        cursor = OrderCursor(NOW, 42)
+        assert OrderCursor.decode(cursor.encode()) == cursor
+
+    def test_rejects_malformed_cursor(self, queries):
+        with raises(InvalidCursor):
+            queries.list_orders(10, after="not a cursor")
+
+    @fixture
+    def given_orders(
+            self, session,
+    ) -> Callable[..., List[BuyOrder]]:
+        def create(*when_created: datetime, **rate) -> List[BuyOrder]:
+            entries = []
+            for moment in when_created:
+                entry = DBBuyOrder(exchange_rate=BTCRateFactory(**rate))
+                entry.when_created = moment
+                session.add(entry)
+                entries.append(entry)
+            session.commit()
+            orders = [BuyOrder.from_db(entry) for entry in entries]
+            session.expunge_all()
+            return orders
+
+        return create
+
+
+NOW = datetime(2026, 10, 18, 12)
+
+
+class TestExportOrders:
+    def test_streams_all_orders_in_chunks(self, queries, session):
+        entries = DBBuyOrder.build_batch(5)
+        session.add_all(entries)
+        session.commit()
+        orders = [BuyOrder.from_db(entry) for entry in entries]
+
+        chunks = list(queries.export_orders(chunk_size=2))
+
+        assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+        assert [order for chunk in chunks for order in chunk] == orders
+
+    def test_nothing_when_no_orders(self, queries):
+        assert list(queries.export_orders()) == []
+
+
+class TestBuyOrderFromRows:
+    def test_decodes_typed_columns(self):
+        order_id, request_id = uuid4(), uuid4()
+
+        orders = BuyOrder.from_rows(
+            [(order_id, request_id, 150_000_001, 12_345, Currency.EUR)]
+        )
+
+        assert orders == [
+            BuyOrder(
+                id=order_id,
+                request_id=request_id,
+                bitcoins=from_satoshi(150_000_001),
+                bought_for=from_fiat_units(12_345),
+                currency=Currency.EUR,
+            )
+        ]
+
+    def test_nothing_when_no_rows(self):
+        assert BuyOrder.from_rows([]) == []
+
+
+class TestGetOrderStatus:
+    def test_none_when_request_unknown(self, queries):
+        assert queries.get_order_status(uuid4()) is None
+
+    def test_looked_up_in_one_session(self, container, session):
+        order = DBBuyOrder()
+        session.add(order)
+        session.commit()
+        sessions = Mock(wraps=container.get(ReadSessions))
+        queries = BuyOrdersQueries(sessions, container.get(BuyOrderCache))
+
+        assert queries.get_order_status(order.request_id, "0/0").order_id
+
+        sessions.assert_called_once_with("0/0")
+
+    def test_created_when_order_created_directly(self, queries, session):
+        order = DBBuyOrder()
+        request_id, order_id = order.request_id, order.id
+        session.add(order)
+        session.commit()
+
+        assert queries.get_order_status(request_id) == OrderStatus(
+            request_id=request_id,
+            status=CommandStatus.CREATED,
+            order_id=order_id,
+        )
+
+
 @fixture
 def queries(container):
     return container.get(BuyOrdersQueries)
@@ -0,0 +1,115 @@
+from decimal import Decimal
+from time import sleep
+
+from pytest import fixture, raises
+from requests import HTTPError
+from sqlalchemy.orm import sessionmaker
+
+from currency import Currency
+from ordering import CommandQueue, Service
+from ordering.db.queue import CommandStatus, DBQueuedCommand
+from ordering.queries import BuyOrdersQueries
+
+from .factories import CreateBuyOrderFactory as CreateBuyOrder
+
+
+class TestCommandQueue:
+    def test_queued_order_pending_until_processed(self, queue, queries):
+        command = CreateBuyOrder()
+        queue.enqueue(command)
+
+        assert queries.get_order_status(command.id).status == (
+            CommandStatus.PENDING
+        )
+        assert queries.get_order_id(command.id) is None
+
+    def test_processing_creates_queued_orders(self, queue, queries, coindesk):
+        commands = [CreateBuyOrder(), CreateBuyOrder()]
+        for command in commands:
+            queue.enqueue(command)
+
+        assert queue.drain() == 2
+
+        for command in commands:
+            status = queries.get_order_status(command.id)
+            assert status.status == CommandStatus.CREATED
+            assert status.order_id == queries.get_order_id(command.id)
+
+    def test_repeated_command_queued_once(self, queue, coindesk):
+        command = CreateBuyOrder()
+        queue.enqueue(command)
+        queue.enqueue(command)
+
+        assert queue.drain() == 1
+
+    def test_rejects_order_exceeding_limit(self, queue, queries, coindesk):
+        coindesk.set_current(Decimal(1), Currency.EUR)
+        command = CreateBuyOrder(currency=Currency.EUR, amount=Decimal(101))
+        queue.enqueue(command)
+
+        queue.drain()
+
+        status = queries.get_order_status(command.id)
+        assert status.status == CommandStatus.REJECTED
+        assert status.detail == "Exceeded 100BTC ordering limit"
+        assert status.order_id is None
+
+    def test_created_when_order_already_exists(
+            self, queue, queries, coindesk, container,
+    ):
+        command = CreateBuyOrder()
+        container.get(Service).create_buy_order(command)
+        queue.enqueue(command)
+
+        queue.drain()
+
+        status = queries.get_order_status(command.id)
+        assert status.status == CommandStatus.CREATED
+        assert status.order_id == queries.get_order_id(command.id)
+
+    def test_stays_pending_when_processing_fails(
+            self, queue, queries, coindesk,
+    ):
+        command = CreateBuyOrder()
+        queue.enqueue(command)
+
+        with coindesk.temporal_issue(503):
+            with raises(HTTPError):
+                queue.process()
+
+        assert queries.get_order_status(command.id).status == (
+            CommandStatus.PENDING
+        )
+
+    def test_skips_commands_claimed_by_other_worker(
+            self, queue, session, coindesk,
+    ):
+        queue.enqueue(CreateBuyOrder())
+        session.query(DBQueuedCommand).with_for_update().all()
+
+        assert queue.process() == 0
+        session.rollback()
+        assert queue.process() == 1
+
+    def test_workers_process_until_stopped(self, queue, queries, coindesk):
+        command = CreateBuyOrder()
+        queue.enqueue(command)
+
+        queue.start()
+        while queries.get_order_id(command.id) is None:
+            sleep(0.01)
+        queue.stop()
+
+    @fixture
+    def queue(self, container) -> CommandQueue:
+        return container.get(CommandQueue)
+
+    @fixture
+    def queries(self, container) -> BuyOrdersQueries:
+        return container.get(BuyOrdersQueries)
+
+    @fixture
+    def session(self, container):
+        session = container.get(sessionmaker)()
+        yield session
+        session.close()
@@ -4,7 +4,7 @@ import os
 from contextlib import contextmanager
 from datetime import timedelta
 from decimal import Decimal
-from typing import ContextManager, Type
+from typing import Collection, ContextManager, Type
 from unittest.mock import ANY, Mock
 from uuid import UUID, uuid4
 
@@ -12,13 +12,20 @@ from hypothesis import HealthCheck, given, settings
 from hypothesis.strategies import decimals
 from injector import Injector
 from mockito import when
-from pytest import approx, fixture, mark, raises
+from pytest import fixture, mark, raises
 
 import ordering.db
 from application.bus import Event
 from application.settings import Settings
-from currency import Currency, ExchangeRateService
+from currency import (
+    Currency,
+    ExchangeRateService,
+    FiatUnits,
+    Satoshi,
+    to_satoshi,
+)
 from ordering import Service
+from ordering.commands import CreateBuyOrders
 from ordering.db import BuyOrder
 from ordering.errors import BalanceLimitExceeded, OrderAlreadyExists
 from ordering.events import BuyOrderCreated
@@ -42,13 +49,90 @@ class TestOrderingService:
         with raises(BalanceLimitExceeded) as exceeded:
             ordering.create_buy_order(amount=99_999)
 
-        assert float(exceeded.value.limit) == approx(0.0000_0001)
+        assert exceeded.value.limit == 1
 
     def test_emmit_event_when_buy_order_created(self, ordering):
         cmd_id = uuid4()
         ordering.create_buy_order(command_id=cmd_id)
         ordering.expect(BuyOrderCreated, command_id=cmd_id)
 
+    def test_returns_order_id_when_buy_order_created(self, ordering):
+        order_id = ordering.create_buy_order()
+        ordering.expect(BuyOrderCreated, order_id=order_id)
+
+    def test_admits_batch_in_arrival_order_until_limit(self, ordering):
+        ordering.set_exchange_rate(to=1000)
+        ordering.set_limit_on_ordered_btc(1)
+
+        outcomes = ordering.create_buy_order_batch(
+            CreateBuyOrder(amount=Decimal(600)),
+            CreateBuyOrder(amount=Decimal(300)),
+            CreateBuyOrder(amount=Decimal(200)),
+            CreateBuyOrder(amount=Decimal(100)),
+        )
+
+        assert [type(outcome) for outcome in outcomes] == [
+            UUID, UUID, BalanceLimitExceeded, UUID,
+        ]
+        assert ordering.locks_taken == 1
+
+    def test_batch_reports_existing_orders(self, ordering):
+        existing = CreateBuyOrder()
+        existing_id = ordering.create_buy_order(existing)
+        repeated = CreateBuyOrder()
+
+        outcomes = ordering.create_buy_order_batch(
+            existing, repeated, repeated,
+        )
+
+        assert outcomes[0] == OrderAlreadyExists(existing_id)
+        assert outcomes[2] == OrderAlreadyExists(outcomes[1])
+
+    def test_reports_existing_order_when_limit_reached(self, ordering):
+        ordering.set_exchange_rate(to=1000)
+        ordering.set_limit_on_ordered_btc(1)
+        existing = CreateBuyOrder(amount=Decimal(1000))
+        existing_id = ordering.create_buy_order(existing)
+
+        with raises(OrderAlreadyExists) as exists:
+            ordering.create_buy_order(existing)
+
+        assert exists.value.order_id == existing_id
+
+    def test_creates_orders_of_batch_command(self, ordering):
+        outcomes = ordering.create_buy_orders(
+            CreateBuyOrder(), CreateBuyOrder(),
+        )
+
+        assert [type(outcome) for outcome in outcomes] == [UUID, UUID]
+        assert ordering.orders_count == 2
+
+    def test_atomic_batch_rejected_as_whole_when_exceeding_limit(
+            self, ordering,
+    ):
+        ordering.set_exchange_rate(to=1000)
+        ordering.set_limit_on_ordered_btc(1)
+
+        with raises(BalanceLimitExceeded):
+            ordering.create_buy_orders(
+                CreateBuyOrder(amount=Decimal(600)),
+                CreateBuyOrder(amount=Decimal(600)),
+                atomic=True,
+            )
+
+        assert ordering.orders_count == 0
+
+    def test_atomic_batch_accepts_already_created_orders(self, ordering):
+        existing = CreateBuyOrder()
+        existing_id = ordering.create_buy_order(existing)
+
+        outcomes = ordering.create_buy_orders(
+            existing, CreateBuyOrder(), atomic=True,
+        )
+
+        assert outcomes[0] == OrderAlreadyExists(existing_id)
+        assert isinstance(outcomes[1], UUID)
+
     @settings(
         max_examples=1000,
         deadline=timedelta(seconds=20),
@@ -74,19 +158,30 @@ class InMemoryRepository(ordering.db.Repository):
 
     def __init__(self):
         self._orders_by_req_id: dict[UUID, BuyOrder] = {}
+        self.locks_taken = 0
 
     @contextmanager
-    def lock(self) -> ContextManager[Decimal]:
+    def lock(
+            self, expected: Satoshi = Satoshi(0),
+    ) -> ContextManager[Satoshi]:
         self.emitted = []
-        yield sum(order.bought for order in self._orders_by_req_id.values())
+        self.locks_taken += 1
+        orders = dict(self._orders_by_req_id)
+        try:
+            yield sum(order.bought for order in orders.values())
+        except Exception:
+            self._orders_by_req_id = orders
+            raise
 
     def create(
             self,
             request_id: UUID,
-            paid: Decimal,
-            bought: Decimal,
+            paid: FiatUnits,
+            bought: Satoshi,
             with_rate: BTCRate,
     ) -> BuyOrder:
+        if request_id in self._orders_by_req_id:
+            raise OrderAlreadyExists(self._orders_by_req_id[request_id].id)
         self._orders_by_req_id[request_id] = Mock(
             BuyOrder,
             id=uuid4(),
@@ -100,15 +195,22 @@ class InMemoryRepository(ordering.db.Repository):
     def emit(self, event: Event) -> None:
         self.emitted.append(event)
 
-    def get_order_id(self, for_request_id: UUID) -> UUID:
-        order = self._orders_by_req_id.get(for_request_id)
-        return order and order.id
+    def get_order_ids(
+            self, for_request_ids: Collection[UUID],
+    ) -> dict[UUID, UUID]:
+        return {
+            request_id: self._orders_by_req_id[request_id].id
+            for request_id in for_request_ids
+            if request_id in self._orders_by_req_id
+        }
 
 
 class OrderingSteps:
     def __init__(self, container: Injector) -> None:
         self._repository = InMemoryRepository()
-        self._btc_limit = container.get(Settings).ordered_btc_limit
+        self._btc_limit = to_satoshi(
+            container.get(Settings).ordered_btc_limit
+        )
         self._container = container
         self._exchange_rates = Mock(ExchangeRateService)
         self.set_exchange_rate(33_234)
@@ -125,24 +227,45 @@ class OrderingSteps:
         )
 
     def set_limit_on_ordered_btc(self, to: Decimal | float) -> None:
-        self._btc_limit = Decimal(to).quantize(Decimal(10)**-8)
+        self._btc_limit = to_satoshi(Decimal(str(to)))
 
     def create_buy_order(
             self,
             command: ordering.CreateBuyOrder | None = None,
             **attributes,
-    ) -> None:
+    ) -> UUID:
         if "command_id" in attributes:
             attributes["id"] = attributes.pop("command_id")
-        self._service.create_buy_order(
+        return self._service.create_buy_order(
             command or CreateBuyOrder(**attributes)
         )
 
+    def create_buy_order_batch(
+            self, *commands: ordering.CreateBuyOrder, atomic: bool = False,
+    ) -> list:
+        return self._service.create_buy_order_batch(commands, atomic=atomic)
+
+    def create_buy_orders(
+            self, *commands: ordering.CreateBuyOrder, atomic: bool = False,
+    ) -> list:
+        return self._service.create_buy_orders(
+            CreateBuyOrders(orders=list(commands), atomic=atomic)
+        )
+
+    @property
+    def orders_count(self) -> int:
+        return len(self._repository._orders_by_req_id)
+
+    @property
+    def locks_taken(self) -> int:
+        return self._repository.locks_taken
+
     def set_exchange_rate(self, to: Decimal | float | int) -> None:
         price = Decimal(to).quantize(Decimal(10) ** -4)
-        for c in Currency:
-            rate = BTCRate(currency=c, price=price)
-            when(self._exchange_rates).get_bitcoin_rate(c).thenReturn(rate)
+        rates = {c: BTCRate(currency=c, price=price) for c in Currency}
+        when(self._exchange_rates).get_bitcoin_rates(...).thenAnswer(
+            lambda currencies: {c: rates[c] for c in currencies}
+        )
 
     def expect(self, event_type: Type[Event], **event_attributes) -> None:
         fields = {
@@ -0,0 +1,265 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+from time import sleep
+from typing import Callable
+from unittest.mock import Mock
+
+from pytest import fixture
+from sqlalchemy.orm import sessionmaker
+
+from currency import Currency, to_fiat_units, to_satoshi
+from ordering.db import (
+    DBOrderStats,
+    DBStatsWatermark,
+    StatsRebuilder,
+    StatsRollup,
+)
+from ordering.db.balance import DBBuyOrdersBalance
+from ordering.stats import BucketSize, CurrencyTotals, StatsBucket, StatsQueries
+from tests.currency.factories import BTCRateFactory
+
+from .factories import DBBuyOrderFactory as DBBuyOrder
+
+NOW = datetime(2026, 10, 18, 12, 30)
+HOUR = timedelta(hours=1)
+
+
+class TestStatsQueries:
+    def test_orders_counted_in_hourly_buckets(self, given_order, stats):
+        given_order(NOW, Currency.EUR, bitcoins="0.5", paid="10")
+        given_order(NOW + timedelta(minutes=10), Currency.EUR, "0.25", "5")
+        given_order(NOW + HOUR, Currency.EUR, "1", "20")
+
+        buckets = stats.get_stats(BucketSize.HOUR).buckets
+
+        assert buckets == [
+            StatsBucket(
+                start=NOW.replace(minute=0),
+                currency=Currency.EUR,
+                orders=2,
+                bitcoins=Decimal("0.75"),
+                paid=Decimal(15),
+            ),
+            StatsBucket(
+                start=NOW.replace(minute=0) + HOUR,
+                currency=Currency.EUR,
+                orders=1,
+                bitcoins=Decimal(1),
+                paid=Decimal(20),
+            ),
+        ]
+
+    def test_days_rolled_up_with_totals_per_currency(self, given_order, stats):
+        given_order(NOW, Currency.EUR, "1", "10")
+        given_order(NOW + HOUR, Currency.EUR, "2", "20")
+        given_order(NOW + timedelta(days=1), Currency.EUR, "3", "30")
+        given_order(NOW, Currency.USD, "4", "40")
+
+        result = stats.get_stats(BucketSize.DAY)
+
+        assert [
+            (bucket.start.day, bucket.currency, bucket.orders)
+            for bucket in result.buckets
+        ] == [
+            (18, Currency.EUR, 2),
+            (18, Currency.USD, 1),
+            (19, Currency.EUR, 1),
+        ]
+        assert result.totals == [
+            CurrencyTotals(
+                currency=Currency.EUR, orders=3, bitcoins=6, paid=60,
+            ),
+            CurrencyTotals(
+                currency=Currency.USD, orders=1, bitcoins=4, paid=40,
+            ),
+        ]
+
+    def test_filters_by_currency_and_range(self, given_order, stats):
+        given_order(NOW - HOUR, Currency.EUR, "1", "10")
+        given_order(NOW, Currency.EUR, "2", "20")
+        given_order(NOW, Currency.USD, "3", "30")
+        given_order(NOW + HOUR, Currency.EUR, "4", "40")
+
+        result = stats.get_stats(
+            BucketSize.HOUR,
+            currency=Currency.EUR,
+            created_from=NOW.replace(minute=0),
+            created_to=NOW.replace(minute=0) + HOUR,
+        )
+
+        assert [bucket.bitcoins for bucket in result.buckets] == [2]
+
+    def test_headroom_left_under_limit(self, session, stats):
+        session.query(DBBuyOrdersBalance).one().bought = to_satoshi(30)
+        session.commit()
+
+        result = stats.get_stats()
+
+        assert (result.limit, result.booked, result.headroom) == (
+            Decimal(100), Decimal(30), Decimal(70),
+        )
+
+    def test_as_of_last_recount(self, container, stats):
+        assert stats.get_stats().as_of is None
+        before = datetime.utcnow()
+
+        container.get(StatsRebuilder).rebuild()
+
+        assert before <= stats.get_stats().as_of <= datetime.utcnow()
+
+    @fixture
+    def stats(self, container) -> StatsQueries:
+        return StatsQueries(container.get(sessionmaker), limit=Decimal(100))
+
+
+class TestStatsRebuilder:
+    def test_recomputes_buckets_from_orders(
+            self, given_order, rebuilder, session,
+    ):
+        for days in range(3):
+            given_order(NOW + timedelta(days=days), Currency.EUR, "1", "10")
+            given_order(NOW + timedelta(days=days), Currency.GBP, "2", "20")
+        expected = self.all_stats(session)
+        session.query(DBOrderStats).delete()
+        session.add(DBOrderStats(
+            bucket=NOW - timedelta(days=7),
+            currency=Currency.USD,
+            orders=1,
+            bought=10 ** 8,
+            paid=10 ** 4,
+        ))
+        session.commit()
+
+        assert rebuilder.rebuild(workers=2) == 3
+        assert self.all_stats(session) == expected
+
+    def test_orders_counted_only_when_recounted(self, rebuilder, session):
+        session.add(DBBuyOrder())
+        session.commit()
+        assert self.all_stats(session) == []
+
+        rebuilder.rebuild()
+
+        assert [row[2] for row in self.all_stats(session)] == [1]
+
+    def test_does_not_block_order_writers(self, container, rebuilder, session):
+        session.add(DBBuyOrder())
+        session.commit()
+        writer = container.get(sessionmaker)()
+        writer.add(DBBuyOrder())
+        writer.flush()
+
+        try:
+            assert rebuilder.rebuild() == 1
+        finally:
+            writer.rollback()
+            writer.close()
+
+    def test_roll_up_recounts_recent_hours_only(self, rebuilder, session):
+        now = datetime.utcnow()
+        old, recent = DBBuyOrder(), DBBuyOrder()
+        old.when_created = now - timedelta(days=3)
+        session.add_all([old, recent])
+        session.commit()
+
+        assert rebuilder.roll_up(now - HOUR) >= 1
+
+        assert [
+            (row[0], row[2]) for row in self.all_stats(session)
+        ] == [(now.replace(minute=0, second=0, microsecond=0), 1)]
+
+    def test_roll_up_moves_watermark_forward_only(self, rebuilder, session):
+        later = datetime.utcnow() + HOUR
+        session.query(DBStatsWatermark).one().counted_at = later
+        session.commit()
+
+        rebuilder.roll_up(datetime.utcnow() - HOUR)
+
+        session.expire_all()
+        assert session.query(DBStatsWatermark).one().counted_at == later
+
+    def test_clears_stats_when_no_orders(self, rebuilder, session):
+        session.add(DBOrderStats(
+            bucket=NOW,
+            currency=Currency.USD,
+            orders=1,
+            bought=10 ** 8,
+            paid=10 ** 4,
+        ))
+        session.commit()
+
+        assert rebuilder.rebuild() == 0
+        assert self.all_stats(session) == []
+
+    @staticmethod
+    def all_stats(session):
+        session.expire_all()
+        return [
+            (row.bucket, row.currency, row.orders, row.bought, row.paid)
+            for row in session.query(DBOrderStats).order_by(
+                DBOrderStats.bucket, DBOrderStats.currency,
+            )
+        ]
+
+    @fixture
+    def rebuilder(self, container) -> StatsRebuilder:
+        return container.get(StatsRebuilder)
+
+
+class TestStatsRollup:
+    def test_recounts_recent_hours_until_stopped(self, session):
+        rebuilder = Mock(StatsRebuilder)
+        rollup = StatsRollup(
+            rebuilder,
+            window=timedelta(minutes=5),
+            every=timedelta(milliseconds=1),
+        )
+
+        rollup.start()
+        while rebuilder.roll_up.call_count < 2:
+            sleep(0.001)
+        rollup.stop()
+
+        since, = rebuilder.roll_up.call_args.args
+        assert datetime.utcnow() - since >= timedelta(minutes=5)
+
+    def test_logs_failed_roll_up(self, caplog):
+        rebuilder = Mock(StatsRebuilder)
+        rebuilder.roll_up.side_effect = RuntimeError
+
+        StatsRollup(rebuilder).roll_up()
+
+        assert "Could not roll up" in caplog.text
+
+    def test_stop_when_not_started(self):
+        StatsRollup(Mock(StatsRebuilder)).stop()
+
+
+@fixture
+def given_order(session, container) -> Callable[..., None]:
+    rebuilder = container.get(StatsRebuilder)
+
+    def create(
+            when_created: datetime,
+            currency: Currency,
+            bitcoins: str,
+            paid: str,
+    ) -> None:
+        order = DBBuyOrder(
+            bought=to_satoshi(Decimal(bitcoins)),
+            paid=to_fiat_units(Decimal(paid)),
+            exchange_rate=BTCRateFactory(currency=currency),
+        )
+        order.when_created = when_created
+        session.add(order)
+        session.commit()
+        rebuilder.rebuild(workers=1)
+
+    return create
+
+
+@fixture
+def session(container):
+    session = container.get(sessionmaker)()
+    yield session
+    session.close()
@@ -4,6 +4,7 @@ import decimal
 from contextlib import contextmanager
 from datetime import datetime
 from decimal import Decimal
+from threading import Event
 from typing import Dict, Optional, Text
 from urllib.parse import urljoin
 
@@ -24,6 +25,9 @@ class CoinDeskApiStub:
             "USD": Decimal(46_269.1377),
         }
         self._mark_as_updated(at=when_last_update)
+        self.requests_count = 0
+        self._responding = Event()
+        self._responding.set()
 
     @contextmanager
     def __call__(self) -> CoinDeskApiStub:
@@ -35,6 +39,9 @@ class CoinDeskApiStub:
             yield self
 
     def _generate_response(self, request, context) -> Dict:
+        self.requests_count += 1
+        self.last_request = request
+        self._responding.wait()
         datetime_format = '%b %d, %Y %H:%M:%S %Z'
         utc = pytz.timezone("UTC").localize(self._last_update)
         bst = pytz.timezone("Europe/London").localize(self._last_update)
@@ -81,6 +88,14 @@ class CoinDeskApiStub:
         self._index[for_currency] = rate
         self._mark_as_updated()
 
+    @contextmanager
+    def stalled(self) -> None:
+        self._responding.clear()
+        try:
+            yield
+        finally:
+            self._responding.set()
+
     @contextmanager
     def temporal_issue(self, status_code: int) -> None:
         with requests_mock.mock(real_http=True) as http:
@@ -100,3 +115,14 @@ def to_precision(
 
 def round_up(value: float | Decimal, precision: int) -> Decimal:
     return to_precision(value, precision, rounding=decimal.ROUND_UP)
+
+
+class Clock:
+    def __init__(self, now: float = 1_000.0) -> None:
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds